@@ -8,16 +8,19 @@ TODO:
 [] - Definir sufixo do título do email a partir de configuração
 """
 
+import hashlib
 import logging
 import os
 import sys
 import textwrap
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
-from functools import reduce
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
 import json
 
-import pandas as pd
 from airflow import DAG, Dataset
 from airflow.utils.task_group import TaskGroup
 from airflow.hooks.base import BaseHook
@@ -30,7 +33,17 @@ from airflow.timetables.datasets import DatasetOrTimeSchedule
 from airflow.timetables.trigger import CronTriggerTimetable
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from utils import instrumentation
 from utils.date import get_trigger_date, template_ano_mes_dia_trigger_local_time
+from utils.search_domains import SearchDate, calculate_from_datetime
+from utils.term_list import TermList
+from hooks.rodou_db_hook import (
+    CachedTermList,
+    DigestReport,
+    RoDouDBHook,
+    SearchSnapshot,
+    SeenPublications,
+)
 from notification.notifier import Notifier
 from parsers import DAGConfig, YAMLParser
 from schemas import FetchTermsConfig
@@ -40,52 +53,140 @@ from searchers import BaseSearcher, DOUSearcher, QDSearcher, INLABSSearcher
 SearchResult = Dict[str, Dict[str, Dict[str, List[dict]]]]
 
 
+class BackfillQuery(NamedTuple):
+    """Source query planned by the backfill: the `source` of the
+    search number `counter` of a DAG, from `since` to `until`."""
+
+    counter: int
+    source: str
+    since: date
+    until: date
+
+
 def merge_results(*dicts: SearchResult) -> SearchResult:
     """
     Merge multiple dictionaries and sum/concatenate values of common keys,
     including nested dictionaries.
-    """
-
-    def merge_two(dict1, dict2):
-        merged = {}
-
-        # Combine keys from both dictionaries
-        all_keys = set(dict1) | set(dict2)
-
-        for key in all_keys:
-            value1 = dict1.get(key)
-
-            value2 = dict2.get(key)
-
-
-            if isinstance(value1, dict) and isinstance(value2, dict):
-                # If both values are dictionaries, merge them recursively
-                merged[key] = merge_results(value1, value2)
-            elif isinstance(value1, dict) or isinstance(value2, dict):
-                # If one of the values is a dict, prefer the dict (override with dict)
-                merged[key] = value1 if isinstance(value1, dict) else value2
-            else:
-                # Sum or concatenate the values, treating None or missing keys as 0
-                merged[key] = (value1) + (value2)
-
-        return merged
 
-    # Pre-processing step: Filter out dictionaries where the first key's value is empty
-    filtered_dicts = []
+    The merge is done in a single pass over the sources, accumulating
+    into one target structure: nested dicts and lists found in the
+    sources are reused (lists are extended in place) instead of being
+    copied at every nesting level, so the input dictionaries must not
+    be reused after merging.
+    """
+    merged = {}
 
     for d in dicts:
-        if d:  # Ensure the dictionary is not empty
-            first_key = next(iter(d))
-            first_value = d.get(first_key)
-            if first_value:  # Only include if the first key's value is non-empty
-                filtered_dicts.append(d)
+        # Filter out dictionaries where the first key's value is empty
+        if _has_content(d):
+            _merge_into(merged, d)
+
+    return merged
+
+
+def _has_content(d: dict) -> bool:
+    """Checks if the dictionary is not empty and its first key's value
+    is non-empty."""
+    return bool(d) and bool(next(iter(d.values())))
+
+
+def _merge_into(target: dict, source: dict) -> None:
+    """Merge `source` into `target` in place."""
+    for key, value in source.items():
+        if key not in target or target[key] is None:
+            target[key] = value
+            continue
+
+        current = target[key]
+        if isinstance(current, dict) and isinstance(value, dict):
+            # Nested dicts follow the same first key's value filter
+            if not _has_content(value):
+                if not _has_content(current):
+                    target[key] = {}
+            elif not _has_content(current):
+                target[key] = value
+            else:
+                _merge_into(current, value)
+        elif isinstance(current, dict) or isinstance(value, dict):
+            # If one of the values is a dict, prefer the dict (override with dict)
+            if isinstance(value, dict):
+                target[key] = value
+        elif value is None:
+            continue
+        elif isinstance(current, list):
+            # Extend the accumulated list instead of concatenating copies
+            current.extend(value)
+        else:
+            target[key] = current + value
 
-    # If no dictionaries remain after filtering, return an empty dictionary
-    if not filtered_dicts:
-        return {}
 
-    # Reduce the list of dictionaries by merging them two at a time
-    return reduce(merge_two, filtered_dicts)
+def merge_snapshot(
+    result: SearchResult,
+    snapshot: SearchResult,
+    window_since: date,
+    seen_publications: Optional[SeenPublications] = None,
+) -> SearchResult:
+    """
+    Add to the `result` of an incremental search, in place, the items of
+    the previous search `snapshot` that are still inside the report
+    window (published from `window_since`), were not found again and
+    were not reported yet, when `seen_publications` is informed.
+    """
+    for group, term_results in snapshot.items():
+        for term, dpt_results in term_results.items():
+            for dpt, items in dpt_results.items():
+                current = result.get(group, {}).get(term, {}).get(dpt, [])
+                found = {RoDouDBHook.publication_key(item) for item in current}
+                kept = [
+                    item
+                    for item in items
+                    if _published_since(item, window_since)
+                    and RoDouDBHook.publication_key(item) not in found
+                    and (term, RoDouDBHook.publication_key(item))
+                    not in (seen_publications or ())
+                ]
+                if kept:
+                    result.setdefault(group, {}).setdefault(term, {}).setdefault(
+                        dpt, []
+                    ).extend(kept)
+
+    return result
+
+
+def _published_since(item: dict, window_since: date) -> bool:
+    """Checks if the item was not reported before `window_since`."""
+    day = _report_day(item)
+    return day is None or day >= window_since
+
+
+def _report_day(item: dict) -> Optional[date]:
+    """Day of the DAG run that reports the item: its `date` (DD/MM/YYYY)
+    or, as QD gazettes are searched one day behind, the next day."""
+    try:
+        published = datetime.strptime(item["date"], "%d/%m/%Y").date()
+    except (KeyError, ValueError):
+        return None
+    if item.get("section", "").startswith("QD"):
+        published += timedelta(days=1)
+    return published
+
+
+def split_result(
+    result: SearchResult, key: Callable[[dict], Any]
+) -> Dict[Any, SearchResult]:
+    """Splits the items of the `result` by their `key`, each split
+    keeping the group, term and department of its items in the order
+    they were found."""
+    splits = {}
+    for group, term_results in result.items():
+        for term, dpt_results in term_results.items():
+            for dpt, items in dpt_results.items():
+                for item in items:
+                    splits.setdefault(key(item), {}).setdefault(
+                        group, {}
+                    ).setdefault(term, {}).setdefault(dpt, []).append(item)
+
+    return splits
 
 
 def result_as_html(specs: DAGConfig) -> bool:
@@ -109,6 +210,25 @@ class DouDigestDagGenerator:
     YAMLS_DIR_LIST = [dag_confs for dag_confs in YAMLS_DIR.split(":")]
     SLACK_CONN_ID = "slack_notify_rodou_dagrun"
     DEFAULT_SCHEDULE = "0 5 * * *"
+    DIGEST_SCHEDULE = "0 9 * * *"
+    DIGEST_DAG_ID = "ro-dou_digest_{}"
+    BACKFILL_DAG_ID = "ro-dou_backfill"
+    # Days covered by each query of a backfill. The INLABS database is
+    # queried in large windows, the DOU portal and the QD API one day at
+    # a time, so the days are searched concurrently
+    BACKFILL_WINDOW_DAYS = {
+        "DOU": 1,
+        "INLABS": 31,
+        "QD": 1,
+    }
+    BACKFILL_MAX_WORKERS = 4
+    # Default max duration, in seconds, of each source search, replaced
+    # by the `RO_DOU__SEARCH_TIMEOUT_<SOURCE>` environment variables
+    SEARCH_TIMEOUT = {
+        "DOU": 4 * 60 * 60,
+        "INLABS": 60 * 60,
+        "QD": 2 * 60 * 60,
+    }
 
     parser = YAMLParser
     searchers: Dict[str, BaseSearcher]
@@ -259,11 +379,25 @@ class DouDigestDagGenerator:
                     if any(ext in filename for ext in [".yaml", ".yml"]):
                         files_list.extend([os.path.join(dirpath, filename)])
 
-        for filepath in files_list:
+        digests: Dict[str, List[DAGConfig]] = {}
+        all_specs: List[DAGConfig] = []
+        for filepath in sorted(files_list):
             dag_specs = self.parser(filepath).parse()
             dag_id = dag_specs.id
             globals()[dag_id] = self.create_dag(dag_specs, filepath)
+            all_specs.append(dag_specs)
+            if dag_specs.report.digest:
+                digests.setdefault(dag_specs.report.digest, []).append(dag_specs)
+
+        for digest, members in digests.items():
+            dag = self.create_digest_dag(digest, members)
+            globals()[dag.dag_id] = dag
 
+        if all_specs:
+            dag = self.create_backfill_dag(all_specs)
+            globals()[dag.dag_id] = dag
+
+    @instrumentation.instrumented
     def perform_searches(
         self,
         header,
@@ -280,14 +414,136 @@ class DouDigestDagGenerator:
         use_summary: Optional[bool],
         result_as_email: Optional[bool],
         department: List[str],
+        only_new: bool = False,
+        incremental: bool = False,
+        local_index: bool = False,
         **context,
     ) -> dict:
-        """Performs the search in each source and merge the results"""
+        """Performs the search in each source concurrently and merge
+        the results. With `only_new` the publications already reported
+        by the DAG are removed from the results.
+
+        With `incremental` the search starts at the watermark (the last
+        date covered by the previous run) instead of the beginning of
+        the `search_date` window, and the results of the previous run
+        still inside the window are added back from its snapshot.
+
+        With `local_index` the DOU is searched on the portal only for
+        the days missing from the local index of the DOU publications.
+        """
         logging.info("Searching for: %s", term_list)
-        logging.info("Trigger date: %s", get_trigger_date(context, local_time=True))
+        reference_date = get_trigger_date(context, local_time=True)
+        logging.info("Trigger date: %s", reference_date)
+        dag_id = context["dag"].dag_id
+        seen_publications = (
+            RoDouDBHook().get_seen_publications(dag_id) if only_new else None
+        )
+
+        window_since = calculate_from_datetime(
+            reference_date, SearchDate[search_date]
+        ).date()
+        published_since = None
+        if incremental:
+            search_key = self._search_key(
+                sources=sources,
+                territory_id=territory_id,
+                term_list=term_list,
+                dou_sections=dou_sections,
+                search_date=search_date,
+                field=field,
+                is_exact_search=is_exact_search,
+                ignore_signature_match=ignore_signature_match,
+                force_rematch=force_rematch,
+                full_text=full_text,
+                use_summary=use_summary,
+                result_as_email=result_as_email,
+                department=department,
+                only_new=only_new,
+            )
+            snapshot = RoDouDBHook().get_search_snapshot(dag_id, search_key)
+            if snapshot and window_since <= snapshot.watermark <= reference_date.date():
+                # The watermark day is searched again, as more
+                # publications of that day may be available now
+                published_since = datetime.combine(
+                    snapshot.watermark, reference_date.timetz()
+                )
+                logging.info("Searching from watermark: %s", snapshot.watermark)
+
+        searches = self._source_searches(
+            sources=sources,
+            territory_id=territory_id,
+            term_list=term_list,
+            dou_sections=dou_sections,
+            search_date=search_date,
+            field=field,
+            is_exact_search=is_exact_search,
+            ignore_signature_match=ignore_signature_match,
+            force_rematch=force_rematch,
+            full_text=full_text,
+            use_summary=use_summary,
+            result_as_email=result_as_email,
+            department=department,
+            reference_date=reference_date,
+            seen_publications=seen_publications,
+            published_since=published_since,
+            local_index=local_index,
+        )
+        results = self._run_searches(searches)
+
+        if len(results) > 1:
+            # QD results come first in the report
+            with instrumentation.span("search.merge"):
+                result = merge_results(
+                    *(results[source] for source in ("QD", "DOU", "INLABS")
+                      if source in results)
+                )
+        else:
+            result = next(iter(results.values()))
+
+        if incremental:
+            if published_since:
+                result = merge_snapshot(
+                    result, snapshot.result, window_since, seen_publications
+                )
+            if not snapshot or snapshot.watermark <= reference_date.date():
+                RoDouDBHook().set_search_snapshot(
+                    dag_id, search_key, SearchSnapshot(reference_date.date(), result)
+                )
+
+        # Add more specs info
+        search_dict = {}
+        search_dict["result"] = result
+        search_dict["header"] = header
+        search_dict["department"] = department
+
+        return search_dict
 
+    def _source_searches(
+        self,
+        sources,
+        territory_id,
+        term_list,
+        dou_sections: List[str],
+        search_date,
+        field,
+        is_exact_search: Optional[bool],
+        ignore_signature_match: Optional[bool],
+        force_rematch: Optional[bool],
+        full_text: Optional[bool],
+        use_summary: Optional[bool],
+        result_as_email: Optional[bool],
+        department: List[str],
+        reference_date: datetime,
+        seen_publications: Optional[SeenPublications] = None,
+        published_since: Optional[datetime] = None,
+        local_index: bool = False,
+    ) -> Dict[str, Callable[[], dict]]:
+        """Returns the search of each source, ready to be dispatched.
+        The INLABS is searched only when the DOU is not."""
+        searches = {}
         if "DOU" in sources:
-            dou_result = self.searchers["DOU"].exec_search(
+            searches["DOU"] = partial(
+                self.searchers["DOU"].exec_search,
                 term_list=term_list,
                 dou_sections=dou_sections,
                 search_date=search_date,
@@ -296,10 +552,14 @@ class DouDigestDagGenerator:
                 ignore_signature_match=ignore_signature_match,
                 force_rematch=force_rematch,
                 department=department,
-                reference_date=get_trigger_date(context, local_time=True),
+                reference_date=reference_date,
+                seen_publications=seen_publications,
+                published_since=published_since,
+                local_index=local_index,
             )
         elif "INLABS" in sources:
-            inlabs_result = self.searchers["INLABS"].exec_search(
+            searches["INLABS"] = partial(
+                self.searchers["INLABS"].exec_search,
                 terms=term_list,
                 dou_sections=dou_sections,
                 search_date=search_date,
@@ -307,11 +567,14 @@ class DouDigestDagGenerator:
                 ignore_signature_match=ignore_signature_match,
                 full_text=full_text,
                 use_summary=use_summary,
-                reference_date=get_trigger_date(context, local_time=True),
+                reference_date=reference_date,
+                seen_publications=seen_publications,
+                published_since=published_since,
             )
 
         if "QD" in sources:
-            qd_result = self.searchers["QD"].exec_search(
+            searches["QD"] = partial(
+                self.searchers["QD"].exec_search,
                 territory_id=territory_id,
                 term_list=term_list,
                 dou_sections=dou_sections,
@@ -320,28 +583,90 @@ class DouDigestDagGenerator:
                 is_exact_search=is_exact_search,
                 ignore_signature_match=ignore_signature_match,
                 force_rematch=force_rematch,
-                reference_date=get_trigger_date(context, local_time=True),
+                reference_date=reference_date,
                 result_as_email=result_as_email,
+                seen_publications=seen_publications,
+                published_since=published_since,
             )
 
-        if "DOU" in sources and "QD" in sources:
-            result = merge_results(qd_result, dou_result)
-        elif "INLABS" in sources and "QD" in sources:
-            result = merge_results(qd_result, inlabs_result)
-        elif "DOU" in sources:
-            result = dou_result
-        elif "INLABS" in sources:
-            result = inlabs_result
-        else:
-            result = qd_result
+        return searches
 
-        # Add more specs info
-        search_dict = {}
-        search_dict["result"] = result
-        search_dict["header"] = header
-        search_dict["department"] = department
+    @staticmethod
+    def _search_key(**search_params) -> str:
+        """Identifies a search by its parameters, so the snapshot of a
+        search is not reused after its configuration changes."""
+        return hashlib.sha256(
+            json.dumps(search_params, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def search_timeout(self, source: str) -> float:
+        """Max duration, in seconds, of the `source` search, read from
+        the `RO_DOU__SEARCH_TIMEOUT_<SOURCE>` environment variable or,
+        when it is not set, from `SEARCH_TIMEOUT`."""
+        return float(
+            os.getenv(
+                f"RO_DOU__SEARCH_TIMEOUT_{source}", self.SEARCH_TIMEOUT[source]
+            )
+        )
 
-        return search_dict
+    def _run_searches(
+        self, searches: Dict[str, Callable[[], dict]]
+    ) -> Dict[str, dict]:
+        """Dispatches each source search to a worker thread at the same
+        time and waits for all of them, so the task lasts as long as the
+        slowest source. Each source must finish within its
+        `search_timeout` counted from the dispatch.
+
+        The timeout only fails the task: the search still running is not
+        interrupted and its worker thread goes on until the search ends,
+        so the task process may outlive the failure. Each request of the
+        searches is still bounded by the request timeout of its source.
+        """
+
+        def timed(source: str, search: Callable[[], dict]) -> dict:
+            start = time.perf_counter()
+            try:
+                with instrumentation.span(f"{source.lower()}.search"):
+                    return search()
+            finally:
+                logging.info(
+                    "Source %s search took %.2f seconds",
+                    source,
+                    time.perf_counter() - start,
+                )
+
+        executor = ThreadPoolExecutor(
+            max_workers=len(searches), thread_name_prefix="search"
+        )
+        dispatched_at = time.monotonic()
+        futures = {
+            source: executor.submit(timed, source, search)
+            for source, search in searches.items()
+        }
+        results = {}
+        try:
+            for source, future in futures.items():
+                timeout = self.search_timeout(source)
+                deadline = dispatched_at + timeout
+                try:
+                    results[source] = future.result(
+                        timeout=max(deadline - time.monotonic(), 0)
+                    )
+                except FuturesTimeoutError as e:
+                    raise TimeoutError(
+                        f"A busca na fonte {source} excedeu o limite de "
+                        f"{timeout:g} segundos."
+                    ) from e
+        finally:
+            # Do not wait for sources still running after a failure
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logging.info(
+            "All sources finished in %.2f seconds",
+            time.monotonic() - dispatched_at,
+        )
+
+        return results
 
     def get_xcom_pull_tasks(self, num_searches, **context):
         """Retrieve XCom values from multiple tasks and append them to a new list.
@@ -373,13 +698,77 @@ class DouDigestDagGenerator:
         else:
             return "send_notification"
 
-    def select_terms_from_db(self, sql: str, conn_id: str):
+    def split_terms(self, shard_size: int, search_kwargs: dict) -> List[dict]:
+        """Splits the `term_list` of a subsearch in shards of up to
+        `shard_size` terms and returns the `perform_searches` kwargs of
+        each shard, used to expand the mapped search task. Terms that
+        come from `select_terms_from_db` keep its `TermList` JSON
+        format, so the term groups are preserved in each shard.
+        """
+        term_list = search_kwargs["term_list"]
+
+        if isinstance(term_list, list):
+            shards = [
+                term_list[i : i + shard_size]
+                for i in range(0, len(term_list), shard_size)
+            ]
+        else:
+            terms = TermList.load(term_list)
+            shards = [
+                terms.slice(i, i + shard_size).to_json()
+                for i in range(0, len(terms.terms), shard_size)
+            ]
+
+        if not shards:
+            shards = [term_list]
+
+        logging.info("Term list split in %s shards", len(shards))
+
+        return [{**search_kwargs, "term_list": shard} for shard in shards]
+
+    def merge_search_shards(self, counter: int, **context) -> dict:
+        """Merges the results of the mapped `exec_search_shards_{counter}`
+        tasks into a single search result.
+        """
+        shards = list(
+            context["ti"].xcom_pull(
+                task_ids=f"exec_searchs.exec_search_shards_{counter}"
+            )
+        )
+        result = merge_results(*(shard["result"] for shard in shards))
+        if not result:
+            # Keep the empty result structure when nothing was found
+            result = shards[0]["result"]
+
+        return {
+            # The groups keep the order of the terms, as when not sharded
+            "result": result,
+            "header": shards[0]["header"],
+            "department": shards[0]["department"],
+        }
+
+    @instrumentation.instrumented
+    def select_terms_from_db(
+        self, sql: str, conn_id: str, version_sql: Optional[str] = None, **context
+    ) -> str:
         """Queries the `sql` and return the list of terms that will be
         used later in the DOU search. The first column of the select
         must contain the terms to be searched. The second column, which
         is optional, is a classifier that will be used to group and sort
         the email report and the generated CSV.
+
+        The terms are returned as a deduplicated `TermList` in JSON.
+        When the `version_sql` query is informed and returns the same
+        row of the previous run, the terms of that run are reused
+        without running the `sql`.
         """
+        return self._select_terms(sql, conn_id, version_sql, **context)
+
+    def _select_terms(
+        self, sql: str, conn_id: str, version_sql: Optional[str] = None, **context
+    ) -> str:
+        """Implements `select_terms_from_db`, recording its spans and
+        counters in the collector of the calling task."""
         conn_type = BaseHook.get_connection(conn_id).conn_type
         if conn_type == "mssql":
             db_hook = MsSqlHook(conn_id)
@@ -388,12 +777,31 @@ class DouDigestDagGenerator:
         else:
             raise Exception("Tipo de banco de dados não suportado: ", conn_type)
 
-        terms_df = db_hook.get_pandas_df(sql)
-        # Remove unnecessary spaces and change null for ''
-        terms_df = terms_df.applymap(lambda x: str.strip(x) if pd.notnull(x) else "")
+        if version_sql:
+            dag_id = context["dag"].dag_id
+            select_key = hashlib.sha256(f"{conn_id}\n{sql}".encode()).hexdigest()
+            version = json.dumps(db_hook.get_first(version_sql), default=str)
+            cached = RoDouDBHook().get_term_list(dag_id, select_key)
+            if cached and cached.version == version:
+                logging.info("Terms unchanged since version %s", version)
+                return cached.term_list
+
+        # Remove unnecessary spaces, change null for '' and deduplicate
+        with instrumentation.span("terms.sql"):
+            records = db_hook.get_records(sql)
+        instrumentation.incr("terms.rows", len(records))
+        term_list = TermList.from_records(records)
+        logging.info("%s terms selected", len(term_list.terms))
+        artifact = term_list.to_json()
+
+        if version_sql:
+            RoDouDBHook().set_term_list(
+                dag_id, select_key, CachedTermList(version, artifact)
+            )
 
-        return terms_df.to_json(orient="columns")
+        return artifact
 
+    @instrumentation.instrumented
     def send_notification(self,
                           num_searches: int,
                           specs: DAGConfig,
@@ -404,9 +812,395 @@ class DouDigestDagGenerator:
         search_report = self.get_xcom_pull_tasks(num_searches=num_searches,
                                                     **context)
 
+        if specs.report.digest:
+            RoDouDBHook().add_digest_report(
+                specs.report.digest,
+                DigestReport(context["dag"].dag_id, report_date, search_report),
+            )
+            logging.info("Report published to the digest %s", specs.report.digest)
+            return
+
+        self.notify(specs, search_report, report_date, **context)
+        if specs.report.only_new:
+            self.register_seen_publications(
+                search_report, specs.report.only_new_ttl_days, context["dag"].dag_id
+            )
+
+    @staticmethod
+    def notify(
+        specs: DAGConfig, search_report: List[dict], report_date: str, **context
+    ) -> None:
+        """Sends the notification of the DAG run to the channels of
+        `specs`, skipping the ones already sent by a previous try of the
+        task. The channels sent are stored in the Ro-DOU database, as
+        the XCom of a task is cleared at each try, and forgotten once
+        all of them succeed. Without the `ro_dou_db` connection the
+        channels are not tracked and a retry sends all of them again.
+        """
+        if not RoDouDBHook.is_configured():
+            Notifier(specs).send_notification(
+                search_report=search_report, report_date=report_date
+            )
+            return
+
+        db_hook = RoDouDBHook()
+        notification = (context["dag"].dag_id, context["run_id"], report_date)
+        Notifier(specs).send_notification(
+            search_report=search_report,
+            report_date=report_date,
+            delivered=db_hook.get_delivered_channels(*notification),
+            on_delivered=partial(db_hook.add_delivered_channel, *notification),
+        )
+        db_hook.delete_delivered_channels(*notification)
+
+    @staticmethod
+    def register_seen_publications(
+        search_report: List[dict], ttl_days: int, dag_id: str
+    ) -> None:
+        """Stores the publications sent in the notification as already
+        reported by the DAG and forgets the ones reported more than
+        `ttl_days` ago.
+        """
+        publications = [
+            (term, RoDouDBHook.publication_key(item))
+            for search in search_report
+            for term_results in search["result"].values()
+            for term, dpt_results in term_results.items()
+            for items in dpt_results.values()
+            for item in items
+        ]
+        db_hook = RoDouDBHook()
+        db_hook.add_seen_publications(dag_id, publications)
+        db_hook.evict_seen_publications(dag_id, timedelta(days=ttl_days))
+        logging.info("%s publications registered as reported", len(publications))
+
+    @instrumentation.instrumented
+    def send_digest(
+        self,
+        digest: str,
+        specs: DAGConfig,
+        only_new_ttl_days: Optional[Dict[str, int]] = None,
+        **context,
+    ) -> None:
+        """Sends, in a single notification, the reports published to the
+        `digest` by its DAGs since the last one sent, using the report
+        configuration of `specs`. The header of each search is prefixed
+        with the id of the DAG that published it. The reports are removed
+        from the digest only after all the channels receive them, and a
+        retry skips the channels already sent, as `notify` does. Once
+        sent, the publications of the DAGs in `only_new_ttl_days`, which
+        maps their ids to their `only_new_ttl_days`, are registered as
+        reported.
+        """
+        db_hook = RoDouDBHook()
+        reports = db_hook.get_digest_reports(digest)
+        if not reports:
+            logging.info("No reports published to the digest %s", digest)
+            return
+
+        search_report = [
+            {
+                **search,
+                "header": " - ".join(filter(None, [report.dag_id, search["header"]])),
+            }
+            for report in reports
+            for search in report.search_report
+        ]
+        report_dates = sorted(
+            {report.report_date for report in reports},
+            key=lambda report_date: datetime.strptime(report_date, "%d/%m/%Y"),
+        )
+        # A retry sends the digest only to the channels that failed
+        self.notify(specs, search_report, ", ".join(report_dates), **context)
+
+        only_new_ttl_days = only_new_ttl_days or {}
+        for report in reports:
+            if report.dag_id in only_new_ttl_days:
+                self.register_seen_publications(
+                    report.search_report,
+                    only_new_ttl_days[report.dag_id],
+                    report.dag_id,
+                )
+        db_hook.delete_digest_reports(digest, reports)
+        logging.info(
+            "Digest %s sent with the reports of %s DAG runs", digest, len(reports)
+        )
+
+    def create_digest_dag(self, digest: str, members: List[DAGConfig]) -> DAG:
+        """Creates the DAG that sends the reports published to the
+        `digest` by its `members` DAGs. The notification uses the report
+        configuration of the first member, which should be the same for
+        all of them.
+        """
+        specs = members[0]
+        for member in members[1:]:
+            if member.report != specs.report:
+                logging.warning(
+                    "DAG %s has a report configuration different from %s in "
+                    "the digest %s; the one of %s is used",
+                    member.id,
+                    specs.id,
+                    digest,
+                    specs.id,
+                )
+
+        dag = DAG(
+            self.DIGEST_DAG_ID.format(digest),
+            default_args={
+                "owner": ",".join(
+                    sorted({owner for member in members for owner in member.owner})
+                ),
+                "start_date": datetime(2021, 10, 18),
+                "depends_on_past": False,
+                "retries": 10,
+                "retry_delay": timedelta(minutes=20),
+                "on_retry_callback": self.on_retry_callback,
+                "on_failure_callback": self.on_failure_callback,
+            },
+            schedule=specs.report.digest_schedule or self.DIGEST_SCHEDULE,
+            description=f"Resumo {digest} das DAGs: "
+            + ", ".join(member.id for member in members),
+            catchup=False,
+            max_active_runs=1,
+            tags=["dou", "generated_dag", "digest"],
+        )
+
+        with dag:
+            PythonOperator(
+                task_id="send_digest",
+                python_callable=self.send_digest,
+                op_kwargs={
+                    "digest": digest,
+                    "specs": specs,
+                    "only_new_ttl_days": {
+                        member.id: member.report.only_new_ttl_days
+                        for member in members
+                        if member.report.only_new
+                    },
+                },
+            )
+
+        return dag
+
+    def plan_backfill(
+        self, specs: DAGConfig, since: date, until: date
+    ) -> List[BackfillQuery]:
+        """Plans the source queries that cover the searches of `specs`
+        from `since` to `until`, splitting the days in windows of up to
+        `BACKFILL_WINDOW_DAYS` of each source, from the most recent to
+        the oldest. The INLABS is searched only when the DOU is not.
+        """
+        queries = []
+        for counter, subsearch in enumerate(specs.search, 1):
+            for source in ("QD", "DOU", "INLABS"):
+                if source not in subsearch.sources or (
+                    source == "INLABS" and "DOU" in subsearch.sources
+                ):
+                    continue
+                window_until = until
+                while window_until >= since:
+                    window_since = max(
+                        window_until
+                        - timedelta(days=self.BACKFILL_WINDOW_DAYS[source] - 1),
+                        since,
+                    )
+                    queries.append(
+                        BackfillQuery(counter, source, window_since, window_until)
+                    )
+                    window_until = window_since - timedelta(days=1)
+
+        return queries
+
+    def backfill_reports(
+        self, specs: DAGConfig, since: date, until: date, per_day: bool
+    ) -> List[Tuple[str, List[dict]]]:
+        """Runs the searches of `specs` over the publications from
+        `since` to `until` and returns the (report date, search report)
+        of each day, when `per_day`, or of the whole period. Each day
+        has the results the DAG would report if triggered on that day
+        with `date: DIA`.
+
+        The queries planned by `plan_backfill` are dispatched to up to
+        `BACKFILL_MAX_WORKERS` worker threads. The requests to each
+        source are still paced by the rate controller of its searcher,
+        shared by all the workers. A failed query cancels the queries
+        not started yet, but the ones running are not interrupted and go
+        on until they end, as in `_run_searches`.
+        """
+        queries = self.plan_backfill(specs, since, until)
+        logging.info(
+            "Backfill of %s from %s to %s planned in %s queries",
+            specs.id,
+            since,
+            until,
+            len(queries),
+        )
+        term_lists = {
+            counter: (
+                subsearch.terms
+                if isinstance(subsearch.terms, list)
+                else self._select_terms(
+                    sql=subsearch.terms.from_db_select.sql,
+                    conn_id=subsearch.terms.from_db_select.conn_id,
+                )
+            )
+            for counter, subsearch in enumerate(specs.search, 1)
+        }
+
+        def search(query: BackfillQuery) -> dict:
+            subsearch = specs.search[query.counter - 1]
+            source_search = self._source_searches(
+                sources=[query.source],
+                territory_id=subsearch.territory_id,
+                term_list=term_lists[query.counter],
+                dou_sections=subsearch.dou_sections,
+                search_date=subsearch.date,
+                field=subsearch.field,
+                is_exact_search=subsearch.is_exact_search,
+                ignore_signature_match=subsearch.ignore_signature_match,
+                force_rematch=subsearch.force_rematch,
+                full_text=subsearch.full_text,
+                use_summary=subsearch.use_summary,
+                result_as_email=result_as_html(specs),
+                department=subsearch.department,
+                reference_date=datetime.combine(query.until, datetime.min.time()),
+                published_since=datetime.combine(query.since, datetime.min.time()),
+                local_index=subsearch.local_index,
+            )[query.source]
+            with instrumentation.span(f"{query.source.lower()}.search"):
+                return source_search()
+
+        for source in {query.source for query in queries}:
+            # Created before the workers, so all of them share it
+            # pylint: disable=pointless-statement
+            self.searchers[source].rate_controller
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.BACKFILL_MAX_WORKERS, len(queries)) or 1,
+            thread_name_prefix="backfill",
+        )
+        try:
+            results = list(executor.map(search, queries))
+        finally:
+            # Do not wait for queries still running after a failure
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        splits = {}
+        for counter in range(1, len(specs.search) + 1):
+            result = merge_results(
+                *(
+                    query_result
+                    for query, query_result in zip(queries, results)
+                    if query.counter == counter
+                )
+            )
+            if per_day:
+                splits[counter] = split_result(result, _report_day)
+            else:
+                splits[counter] = split_result(
+                    result,
+                    lambda item: since <= (_report_day(item) or since) <= until,
+                )
+
+        def search_report(key) -> List[dict]:
+            return [
+                {
+                    "result": splits[counter].get(key) or {"single_group": {}},
+                    "header": subsearch.header,
+                    "department": subsearch.department,
+                }
+                for counter, subsearch in enumerate(specs.search, 1)
+            ]
+
+        if per_day:
+            days = [since + timedelta(days=n) for n in range((until - since).days + 1)]
+            return [(day.strftime("%d/%m/%Y"), search_report(day)) for day in days]
+        return [
+            (
+                f"{since.strftime('%d/%m/%Y')} a {until.strftime('%d/%m/%Y')}",
+                search_report(True),
+            )
+        ]
+
+    @instrumentation.instrumented
+    def run_backfill(self, specs_by_id: Dict[str, DAGConfig], **context) -> None:
+        """Sends the reports of the backfill asked by the parameters of
+        the DAG run: the `dag_id` whose searches are run, the period
+        from `since` to `until` (YYYY-MM-DD) and whether a report is
+        sent for each day (`per_day`) or for the whole period.
+
+        The reports are sent straight to the channels of the DAG, even
+        when it publishes to a digest, and the publications already
+        reported (`only_new`) are neither removed nor registered.
+        """
+        params = context["params"]
+        specs = specs_by_id.get(params["dag_id"])
+        if specs is None:
+            raise ValueError(f"DAG não encontrada para o backfill: {params['dag_id']}")
+        since = date.fromisoformat(params["since"])
+        until = date.fromisoformat(params["until"])
+        if since > until:
+            raise ValueError(
+                f"Período inválido para o backfill: {since} é posterior a {until}"
+            )
+
+        reports = self.backfill_reports(specs, since, until, params["per_day"])
+
         notifier = Notifier(specs)
+        sent = 0
+        for report_date, search_report in reports:
+            has_matches = any(
+                group_results
+                for search in search_report
+                for group_results in search["result"].values()
+            )
+            if specs.report.skip_null and not has_matches:
+                logging.info("No results for %s, notification skipped", report_date)
+                continue
+            notifier.send_notification(
+                search_report=search_report, report_date=report_date
+            )
+            sent += 1
+        logging.info("Backfill of %s sent in %s reports", specs.id, sent)
+
+    def create_backfill_dag(self, all_specs: List[DAGConfig]) -> DAG:
+        """Creates the DAG, triggered only manually, that runs the
+        searches of any generated DAG over a period in the past and
+        sends its reports, instead of triggering the DAG once for each
+        day of the period.
+        """
+        dag = DAG(
+            self.BACKFILL_DAG_ID,
+            default_args={
+                "owner": ",".join(
+                    sorted({owner for specs in all_specs for owner in specs.owner})
+                ),
+                "start_date": datetime(2021, 10, 18),
+                "depends_on_past": False,
+                "retries": 0,
+                "on_failure_callback": self.on_failure_callback,
+            },
+            schedule=None,
+            description="Executa as pesquisas de uma DAG em um período passado",
+            catchup=False,
+            params={
+                "dag_id": all_specs[0].id,
+                "since": "2022-01-01",
+                "until": "2022-01-31",
+                "per_day": True,
+            },
+            tags=["dou", "generated_dag", "backfill"],
+        )
+
+        with dag:
+            PythonOperator(
+                task_id="run_backfill",
+                python_callable=self.run_backfill,
+                op_kwargs={
+                    "specs_by_id": {specs.id: specs for specs in all_specs}
+                },
+            )
 
-        notifier.send_notification(search_report=search_report, report_date=report_date)
+        return dag
 
     def create_dag(self, specs: DAGConfig, config_file: str) -> DAG:
         """Creates the DAG object and tasks
@@ -465,6 +1259,9 @@ class DouDigestDagGenerator:
                             op_kwargs={
                                 "sql": subsearch.terms.from_db_select.sql,
                                 "conn_id": subsearch.terms.from_db_select.conn_id,
+                                "version_sql": (
+                                    subsearch.terms.from_db_select.version_sql
+                                ),
                             },
                         )
                         term_list = (
@@ -473,30 +1270,61 @@ class DouDigestDagGenerator:
                             + "') }}"
                         )
 
-                    exec_search_task = PythonOperator(
-                        task_id=f"exec_search_{counter}",
-                        python_callable=self.perform_searches,
-                        op_kwargs={
-                            "header": subsearch.header,
-                            "sources": subsearch.sources,
-                            "territory_id": subsearch.territory_id,
-                            "term_list": term_list,
-                            "dou_sections": subsearch.dou_sections,
-                            "search_date": subsearch.date,
-                            "field": subsearch.field,
-                            "is_exact_search": subsearch.is_exact_search,
-                            "ignore_signature_match": subsearch.ignore_signature_match,
-                            "force_rematch": subsearch.force_rematch,
-                            "full_text": subsearch.full_text,
-                            "use_summary": subsearch.use_summary,
-                            "department": subsearch.department,
-                            "result_as_email": result_as_html(specs),
-                        },
-                    )
+                    search_kwargs = {
+                        "header": subsearch.header,
+                        "sources": subsearch.sources,
+                        "territory_id": subsearch.territory_id,
+                        "term_list": term_list,
+                        "dou_sections": subsearch.dou_sections,
+                        "search_date": subsearch.date,
+                        "field": subsearch.field,
+                        "is_exact_search": subsearch.is_exact_search,
+                        "ignore_signature_match": subsearch.ignore_signature_match,
+                        "force_rematch": subsearch.force_rematch,
+                        "full_text": subsearch.full_text,
+                        "use_summary": subsearch.use_summary,
+                        "department": subsearch.department,
+                        "result_as_email": result_as_html(specs),
+                        "only_new": specs.report.only_new,
+                        "incremental": subsearch.incremental,
+                        "local_index": subsearch.local_index,
+                    }
+
+                    if subsearch.terms_shard_size:
+                        # Split the term list in shards searched in
+                        # parallel by mapped tasks and merge them back
+                        # in the `exec_search_{counter}` task
+                        split_terms_task = PythonOperator(
+                            task_id=f"split_terms_{counter}",
+                            python_callable=self.split_terms,
+                            op_kwargs={
+                                "shard_size": subsearch.terms_shard_size,
+                                "search_kwargs": search_kwargs,
+                            },
+                        )
+                        exec_search_shards_task = PythonOperator.partial(
+                            task_id=f"exec_search_shards_{counter}",
+                            python_callable=self.perform_searches,
+                        ).expand(op_kwargs=split_terms_task.output)
+                        exec_search_task = PythonOperator(
+                            task_id=f"exec_search_{counter}",
+                            python_callable=self.merge_search_shards,
+                            op_kwargs={"counter": counter},
+                        )
+                        # pylint: disable=pointless-statement
+                        exec_search_shards_task >> exec_search_task
+                        first_search_task = split_terms_task
+                    else:
+                        exec_search_task = PythonOperator(
+                            task_id=f"exec_search_{counter}",
+                            python_callable=self.perform_searches,
+                            op_kwargs=search_kwargs,
+                        )
+                        first_search_task = exec_search_task
 
                     if terms_come_from_db:
                         # pylint: disable=pointless-statement
-                        select_terms_from_db_task >> exec_search_task
+                        select_terms_from_db_task >> first_search_task
 
             has_matches_task = BranchPythonOperator(
                 task_id="has_matches",
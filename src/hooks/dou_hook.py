@@ -5,8 +5,8 @@ import sys
 import os
 import logging
 from datetime import datetime
-import time
 import json
+from functools import cached_property
 from typing import List
 import requests
 
@@ -15,6 +15,8 @@ from airflow.hooks.base import BaseHook
 from bs4 import BeautifulSoup
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from utils import instrumentation
+from utils.http_session import create_session
 from utils.search_domains import SearchDate, Field, Section, calculate_from_datetime
 
 
@@ -39,8 +41,29 @@ class DOUHook(BaseHook):
         Section.TODOS.value: "Todas",
     }
 
-    def __init__(self, *args, **kwargs):
-        pass
+    REQUEST_TIMEOUT = 10
+    POOL_SIZE = 10
+    MAX_RETRIES = 3
+
+    def __init__(
+        self,
+        *args,
+        pool_size: int = POOL_SIZE,
+        max_retries: int = MAX_RETRIES,
+        **kwargs,
+    ):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+
+    @cached_property
+    def session(self) -> requests.Session:
+        """Pooled session reused by every request of this hook instance."""
+        return create_session(pool_size=self.pool_size, max_retries=self.max_retries)
+
+    @cached_property
+    def session_without_retry(self) -> requests.Session:
+        """Pooled session that tries each request only once."""
+        return create_session(pool_size=self.pool_size, max_retries=0)
 
     def _get_query_str(self, term, field, is_exact_search):
         """
@@ -56,14 +79,19 @@ class DOUHook(BaseHook):
             return f"{field.value}-{term}"
 
     def _request_page(self, with_retry: bool, payload: dict):
-        try:
-            return requests.get(self.IN_API_BASE_URL, params=payload, timeout=10)
-        except requests.exceptions.ConnectionError:
-            if with_retry:
-                logging.info("Sleep for 30 seconds before retry requests.get().")
-                time.sleep(30)
-                return requests.get(self.IN_API_BASE_URL, params=payload, timeout=10)
-
+        """Requests a page of results. Connection errors and throttled
+        responses are retried with backoff by the session adapter when
+        `with_retry` is True.
+        """
+        session = self.session if with_retry else self.session_without_retry
+        with instrumentation.span("dou.request"):
+            page = session.get(
+                self.IN_API_BASE_URL, params=payload, timeout=self.REQUEST_TIMEOUT
+            )
+        instrumentation.incr("dou.requests")
+        instrumentation.incr("dou.bytes", len(page.content))
+        page.raise_for_status()
+        return page
 
     def search_text(
         self,
@@ -74,6 +102,7 @@ class DOUHook(BaseHook):
         field=Field.TUDO,
         is_exact_search=True,
         with_retry=True,
+        publish_from: datetime = None,
     ):
         """
         Search for a term in the API and return all ocurrences.
@@ -81,12 +110,16 @@ class DOUHook(BaseHook):
         Args:
             - search_term: The term to perform the search with.
             - section: The Journal section to perform the search on.
+            - publish_from: Start date of the search, overriding the
+              one calculated by `search_date`.
 
         Return:
             - A list of dicts of structred results.
         """
 
-        publish_from = calculate_from_datetime(reference_date, search_date)
+        publish_from = publish_from or calculate_from_datetime(
+            reference_date, search_date
+        )
 
         payload = {
             "q": self._get_query_str(search_term, field, is_exact_search),
@@ -98,7 +131,8 @@ class DOUHook(BaseHook):
         }
         page = self._request_page(payload=payload, with_retry=with_retry)
 
-        soup = BeautifulSoup(page.content, "html.parser")
+        with instrumentation.span("dou.parse_html"):
+            soup = BeautifulSoup(page.content, "html.parser")
 
         # Checks if there is more than one page of results
         pagination_tag = soup.find(
@@ -140,12 +174,17 @@ class DOUHook(BaseHook):
                     "currentPage": page_num,
                 })
                 page = self._request_page(payload=payload, with_retry=with_retry)
-                soup = BeautifulSoup(page.content, "html.parser")
-
-            script_tag = soup.find(
-                "script", id="_br_com_seatecnologia_in_buscadou_BuscaDouPortlet_params"
-            )
-            search_results = json.loads(script_tag.contents[0])["jsonArray"]
+                with instrumentation.span("dou.parse_html"):
+                    soup = BeautifulSoup(page.content, "html.parser")
+
+            with instrumentation.span("dou.parse_json"):
+                script_tag = soup.find(
+                    "script",
+                    id="_br_com_seatecnologia_in_buscadou_BuscaDouPortlet_params",
+                )
+                search_results = json.loads(script_tag.contents[0])["jsonArray"]
+            instrumentation.incr("dou.pages")
+            instrumentation.incr("dou.results", len(search_results))
 
             if search_results:
                 for content in search_results:
@@ -11,6 +11,8 @@ import html2text
 from airflow.hooks.base import BaseHook
 from airflow.providers.postgres.hooks.postgres import PostgresHook
 
+from utils import instrumentation
+
 
 class INLABSHook(BaseHook):
     """A custom Apache Airflow Hook designed for executing searches via
@@ -79,12 +81,12 @@ class INLABSHook(BaseHook):
         # Fetching results for main search terms
         main_search_queries = self._generate_sql(search_terms)
         hook.run(main_search_queries["create_extension"], autocommit=True)
-        main_search_results = hook.get_pandas_df(main_search_queries["select"])
+        main_search_results = self._select(hook, main_search_queries["select"])
 
         # Fetching results for yesterday extra search terms
         extra_search_terms = self._adapt_search_terms_to_extra(search_terms)
         extra_search_queries = self._generate_sql(extra_search_terms)
-        extra_search_results = hook.get_pandas_df(extra_search_queries["select"])
+        extra_search_results = self._select(hook, extra_search_queries["select"])
 
         # Combining main and extra search results
         all_results = pd.concat(
@@ -93,13 +95,20 @@ class INLABSHook(BaseHook):
         # Remove the words that suceeds the delimitator !
         filtered_text_terms = self._filter_text_terms(search_terms["texto"])
 
-        return (
-            self.TextDictHandler().transform_search_results(
+        if all_results.empty:
+            return {}
+        with instrumentation.span("inlabs.transform"):
+            return self.TextDictHandler().transform_search_results(
                 all_results, filtered_text_terms, ignore_signature_match, full_text, use_summary
             )
-            if not all_results.empty
-            else {}
-        )
+
+    @staticmethod
+    def _select(hook: PostgresHook, sql: str) -> pd.DataFrame:
+        with instrumentation.span("inlabs.sql"):
+            results = hook.get_pandas_df(sql)
+        instrumentation.incr("inlabs.queries")
+        instrumentation.incr("inlabs.rows", len(results))
+        return results
 
     @staticmethod
     def _generate_sql(payload: dict) -> str:
@@ -0,0 +1,529 @@
+"""Apache Airflow Hook to keep the Ro-DOU state between DAG runs.
+"""
+
+import json
+import logging
+from datetime import date, datetime, timedelta, timezone
+from functools import cached_property
+from typing import Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from airflow.exceptions import AirflowNotFoundException
+from airflow.hooks.base import BaseHook
+from airflow.providers.common.sql.hooks.sql import DbApiHook
+
+# (term, publication key) pairs
+SeenPublications = Set[Tuple[str, str]]
+
+
+class SearchSnapshot(NamedTuple):
+    """Result of the last run of a search, covering the publications
+    until the `watermark` date."""
+
+    watermark: date
+    result: dict
+
+
+class CachedTermList(NamedTuple):
+    """Term list selected from a database and the version of the terms
+    table when it was selected."""
+
+    version: str
+    term_list: str
+
+
+class DigestReport(NamedTuple):
+    """Search report published by a DAG to a digest, waiting to be sent
+    by the digest DAG."""
+
+    dag_id: str
+    report_date: str
+    search_report: list
+
+
+class RoDouDBHook(BaseHook):
+    """A custom Apache Airflow Hook to the database where Ro-DOU keeps
+    the state of the generated DAGs between runs, such as the
+    publications already reported by each DAG, the last result of each
+    incremental search, the term lists selected from databases and the
+    reports waiting to be sent in a digest, the local index of the DOU
+    publications already searched and the channels already delivered by
+    a notification still being retried. The database may be Postgres or
+    SQLite and its tables are created on the first use.
+
+    Attributes:
+        CONN_ID (str): Ro-DOU state database Airflow conn id.
+    """
+
+    CONN_ID = "ro_dou_db"
+    SUPPORTED_CONN_TYPES = ("postgres", "postgresql", "sqlite")
+    SEEN_PUBLICATIONS_TABLE = "ro_dou_seen_publications"
+    SEARCH_SNAPSHOTS_TABLE = "ro_dou_search_snapshots"
+    TERM_LISTS_TABLE = "ro_dou_term_lists"
+    DIGEST_REPORTS_TABLE = "ro_dou_digest_reports"
+    DOU_PUBLICATIONS_TABLE = "ro_dou_dou_publications"
+    DOU_INDEXED_DAYS_TABLE = "ro_dou_dou_indexed_days"
+    DOU_INDEXED_RESULTS_TABLE = "ro_dou_dou_indexed_results"
+    DELIVERED_CHANNELS_TABLE = "ro_dou_delivered_channels"
+
+    def __init__(self, conn_id: str = CONN_ID, *args, **kwargs):
+        self.conn_id = conn_id
+
+    @classmethod
+    def is_configured(cls, conn_id: str = CONN_ID) -> bool:
+        """Whether the Airflow connection `conn_id` to the Ro-DOU state
+        database exists."""
+        try:
+            cls.get_connection(conn_id)
+        except AirflowNotFoundException:
+            return False
+        return True
+
+    @cached_property
+    def db_hook(self) -> DbApiHook:
+        """Hook of the database type of the connection, with the Ro-DOU
+        tables already created."""
+        conn = self.get_connection(self.conn_id)
+        if conn.conn_type not in self.SUPPORTED_CONN_TYPES:
+            raise ValueError(
+                "Tipo de banco de dados não suportado para a conexão "
+                f"{self.conn_id}: {conn.conn_type}"
+            )
+        db_hook = conn.get_hook()
+        db_hook.run(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.SEEN_PUBLICATIONS_TABLE} (
+                dag_id VARCHAR(250) NOT NULL,
+                term TEXT NOT NULL,
+                publication_key TEXT NOT NULL,
+                seen_at VARCHAR(32) NOT NULL,
+                PRIMARY KEY (dag_id, term, publication_key)
+            )
+            """
+        )
+        db_hook.run(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.SEARCH_SNAPSHOTS_TABLE} (
+                dag_id VARCHAR(250) NOT NULL,
+                search_key VARCHAR(64) NOT NULL,
+                watermark VARCHAR(10) NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (dag_id, search_key)
+            )
+            """
+        )
+        db_hook.run(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.TERM_LISTS_TABLE} (
+                dag_id VARCHAR(250) NOT NULL,
+                select_key VARCHAR(64) NOT NULL,
+                version TEXT NOT NULL,
+                term_list TEXT NOT NULL,
+                PRIMARY KEY (dag_id, select_key)
+            )
+            """
+        )
+        db_hook.run(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.DIGEST_REPORTS_TABLE} (
+                digest VARCHAR(250) NOT NULL,
+                dag_id VARCHAR(250) NOT NULL,
+                report_date VARCHAR(10) NOT NULL,
+                search_report TEXT NOT NULL,
+                created_at VARCHAR(32) NOT NULL,
+                PRIMARY KEY (digest, dag_id, report_date)
+            )
+            """
+        )
+        db_hook.run(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.DOU_PUBLICATIONS_TABLE} (
+                id VARCHAR(64) NOT NULL,
+                section TEXT NOT NULL,
+                title TEXT NOT NULL,
+                href TEXT NOT NULL,
+                pub_date VARCHAR(10) NOT NULL,
+                display_date_sortable TEXT,
+                hierarchy_list TEXT NOT NULL,
+                PRIMARY KEY (id)
+            )
+            """
+        )
+        db_hook.run(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.DOU_INDEXED_DAYS_TABLE} (
+                query_key VARCHAR(64) NOT NULL,
+                day VARCHAR(10) NOT NULL,
+                indexed_at VARCHAR(32) NOT NULL,
+                PRIMARY KEY (query_key, day)
+            )
+            """
+        )
+        db_hook.run(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.DOU_INDEXED_RESULTS_TABLE} (
+                query_key VARCHAR(64) NOT NULL,
+                day VARCHAR(10) NOT NULL,
+                position INTEGER NOT NULL,
+                publication_id VARCHAR(64) NOT NULL,
+                abstract TEXT NOT NULL,
+                PRIMARY KEY (query_key, day, position)
+            )
+            """
+        )
+        db_hook.run(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.DELIVERED_CHANNELS_TABLE} (
+                dag_id VARCHAR(250) NOT NULL,
+                run_id VARCHAR(250) NOT NULL,
+                report_date TEXT NOT NULL,
+                channel VARCHAR(32) NOT NULL,
+                delivered_at VARCHAR(32) NOT NULL,
+                PRIMARY KEY (dag_id, run_id, report_date, channel)
+            )
+            """
+        )
+        return db_hook
+
+    @staticmethod
+    def publication_key(result: dict) -> str:
+        """Identifies a search result by the publication `id`, when the
+        source provides one, or by its `href`."""
+        return str(result.get("id") or result["href"])
+
+    def get_seen_publications(self, dag_id: str) -> SeenPublications:
+        """Returns the (term, publication key) pairs already reported by
+        the DAG."""
+        records = self.db_hook.get_records(
+            f"SELECT term, publication_key FROM {self.SEEN_PUBLICATIONS_TABLE} "
+            f"WHERE dag_id = {self.db_hook.placeholder}",
+            parameters=(dag_id,),
+        )
+        seen_publications = {(term, key) for term, key in records}
+        logging.info(
+            "%s publications already reported by %s", len(seen_publications), dag_id
+        )
+        return seen_publications
+
+    def add_seen_publications(
+        self, dag_id: str, publications: Iterable[Tuple[str, str]]
+    ) -> None:
+        """Stores the (term, publication key) pairs reported by the DAG,
+        refreshing the date of the pairs already stored."""
+        seen_at = _now().isoformat()
+        rows = [(dag_id, term, key, seen_at) for term, key in set(publications)]
+        if not rows:
+            return
+        self.db_hook.insert_rows(
+            self.SEEN_PUBLICATIONS_TABLE,
+            rows,
+            target_fields=["dag_id", "term", "publication_key", "seen_at"],
+            replace=True,
+            replace_index=["dag_id", "term", "publication_key"],
+        )
+
+    def evict_seen_publications(self, dag_id: str, ttl: timedelta) -> None:
+        """Forgets the publications reported by the DAG more than `ttl`
+        ago, so they can be reported again."""
+        placeholder = self.db_hook.placeholder
+        self.db_hook.run(
+            f"DELETE FROM {self.SEEN_PUBLICATIONS_TABLE} "
+            f"WHERE dag_id = {placeholder} AND seen_at < {placeholder}",
+            parameters=(dag_id, (_now() - ttl).isoformat()),
+        )
+
+    def get_search_snapshot(
+        self, dag_id: str, search_key: str
+    ) -> Optional[SearchSnapshot]:
+        """Returns the snapshot stored by the last run of the search
+        identified by `search_key`, if any."""
+        placeholder = self.db_hook.placeholder
+        record = self.db_hook.get_first(
+            f"SELECT watermark, result FROM {self.SEARCH_SNAPSHOTS_TABLE} "
+            f"WHERE dag_id = {placeholder} AND search_key = {placeholder}",
+            parameters=(dag_id, search_key),
+        )
+        if not record:
+            return None
+        watermark, result = record
+        return SearchSnapshot(date.fromisoformat(watermark), json.loads(result))
+
+    def set_search_snapshot(
+        self, dag_id: str, search_key: str, snapshot: SearchSnapshot
+    ) -> None:
+        """Stores the `snapshot` of the search identified by
+        `search_key`, replacing the previous one."""
+        self.db_hook.insert_rows(
+            self.SEARCH_SNAPSHOTS_TABLE,
+            [
+                (
+                    dag_id,
+                    search_key,
+                    snapshot.watermark.isoformat(),
+                    json.dumps(snapshot.result),
+                )
+            ],
+            target_fields=["dag_id", "search_key", "watermark", "result"],
+            replace=True,
+            replace_index=["dag_id", "search_key"],
+        )
+
+    def get_term_list(self, dag_id: str, select_key: str) -> Optional[CachedTermList]:
+        """Returns the term list last selected by the query identified by
+        `select_key`, if any."""
+        placeholder = self.db_hook.placeholder
+        record = self.db_hook.get_first(
+            f"SELECT version, term_list FROM {self.TERM_LISTS_TABLE} "
+            f"WHERE dag_id = {placeholder} AND select_key = {placeholder}",
+            parameters=(dag_id, select_key),
+        )
+        return CachedTermList(*record) if record else None
+
+    def set_term_list(
+        self, dag_id: str, select_key: str, cached: CachedTermList
+    ) -> None:
+        """Stores the term list selected by the query identified by
+        `select_key`, replacing the previous one."""
+        self.db_hook.insert_rows(
+            self.TERM_LISTS_TABLE,
+            [(dag_id, select_key, cached.version, cached.term_list)],
+            target_fields=["dag_id", "select_key", "version", "term_list"],
+            replace=True,
+            replace_index=["dag_id", "select_key"],
+        )
+
+    def add_digest_report(self, digest: str, report: DigestReport) -> None:
+        """Publishes the search `report` of a DAG to the `digest`,
+        replacing the one previously published by the DAG for the same
+        report date."""
+        self.db_hook.insert_rows(
+            self.DIGEST_REPORTS_TABLE,
+            [
+                (
+                    digest,
+                    report.dag_id,
+                    report.report_date,
+                    json.dumps(report.search_report),
+                    _now().isoformat(),
+                )
+            ],
+            target_fields=[
+                "digest",
+                "dag_id",
+                "report_date",
+                "search_report",
+                "created_at",
+            ],
+            replace=True,
+            replace_index=["digest", "dag_id", "report_date"],
+        )
+
+    def get_digest_reports(self, digest: str) -> List[DigestReport]:
+        """Returns the reports published to the `digest` and not sent
+        yet, in the order they were published."""
+        records = self.db_hook.get_records(
+            f"SELECT dag_id, report_date, search_report "
+            f"FROM {self.DIGEST_REPORTS_TABLE} "
+            f"WHERE digest = {self.db_hook.placeholder} "
+            "ORDER BY created_at, dag_id",
+            parameters=(digest,),
+        )
+        return [
+            DigestReport(dag_id, report_date, json.loads(search_report))
+            for dag_id, report_date, search_report in records
+        ]
+
+    def delete_digest_reports(
+        self, digest: str, reports: Iterable[DigestReport]
+    ) -> None:
+        """Removes the `reports`, already sent, from the `digest`."""
+        placeholder = self.db_hook.placeholder
+        sql = (
+            f"DELETE FROM {self.DIGEST_REPORTS_TABLE} WHERE digest = {placeholder} "
+            f"AND dag_id = {placeholder} AND report_date = {placeholder}"
+        )
+        for report in reports:
+            self.db_hook.run(
+                sql, parameters=(digest, report.dag_id, report.report_date)
+            )
+
+    def get_delivered_channels(
+        self, dag_id: str, run_id: str, report_date: str
+    ) -> Set[str]:
+        """Returns the channels that already received the notification
+        of `report_date` sent by the DAG run."""
+        placeholder = self.db_hook.placeholder
+        records = self.db_hook.get_records(
+            f"SELECT channel FROM {self.DELIVERED_CHANNELS_TABLE} "
+            f"WHERE dag_id = {placeholder} AND run_id = {placeholder} "
+            f"AND report_date = {placeholder}",
+            parameters=(dag_id, run_id, report_date),
+        )
+        return {channel for (channel,) in records}
+
+    def add_delivered_channel(
+        self, dag_id: str, run_id: str, report_date: str, channel: str
+    ) -> None:
+        """Stores that the `channel` received the notification of
+        `report_date` sent by the DAG run."""
+        self.db_hook.insert_rows(
+            self.DELIVERED_CHANNELS_TABLE,
+            [(dag_id, run_id, report_date, channel, _now().isoformat())],
+            target_fields=[
+                "dag_id",
+                "run_id",
+                "report_date",
+                "channel",
+                "delivered_at",
+            ],
+            replace=True,
+            replace_index=["dag_id", "run_id", "report_date", "channel"],
+        )
+
+    def delete_delivered_channels(
+        self, dag_id: str, run_id: str, report_date: str
+    ) -> None:
+        """Forgets the channels delivered by the notification of
+        `report_date` of the DAG run, once all of them received it."""
+        placeholder = self.db_hook.placeholder
+        self.db_hook.run(
+            f"DELETE FROM {self.DELIVERED_CHANNELS_TABLE} "
+            f"WHERE dag_id = {placeholder} AND run_id = {placeholder} "
+            f"AND report_date = {placeholder}",
+            parameters=(dag_id, run_id, report_date),
+        )
+
+    def get_indexed_days(self, query_key: str, since: date, until: date) -> Set[date]:
+        """Returns the days, from `since` to `until`, whose DOU results
+        of the query identified by `query_key` are in the local index."""
+        placeholder = self.db_hook.placeholder
+        records = self.db_hook.get_records(
+            f"SELECT day FROM {self.DOU_INDEXED_DAYS_TABLE} "
+            f"WHERE query_key = {placeholder} "
+            f"AND day >= {placeholder} AND day <= {placeholder}",
+            parameters=(query_key, since.isoformat(), until.isoformat()),
+        )
+        return {date.fromisoformat(day) for (day,) in records}
+
+    def get_indexed_results(
+        self, query_key: str, since: date, until: date
+    ) -> List[dict]:
+        """Returns the DOU results of the query identified by
+        `query_key` published from `since` to `until` and kept in the
+        local index, most recent days first and in the order the portal
+        returned them within each day."""
+        placeholder = self.db_hook.placeholder
+        records = self.db_hook.get_records(
+            "SELECT p.section, p.title, p.href, r.abstract, p.pub_date, p.id, "
+            "p.display_date_sortable, p.hierarchy_list "
+            f"FROM {self.DOU_INDEXED_RESULTS_TABLE} r "
+            f"JOIN {self.DOU_PUBLICATIONS_TABLE} p ON p.id = r.publication_id "
+            f"WHERE r.query_key = {placeholder} "
+            f"AND r.day >= {placeholder} AND r.day <= {placeholder} "
+            "ORDER BY r.day DESC, r.position",
+            parameters=(query_key, since.isoformat(), until.isoformat()),
+        )
+        return [
+            {
+                "section": section,
+                "title": title,
+                "href": href,
+                "abstract": abstract,
+                "date": pub_date,
+                "id": publication_id,
+                "display_date_sortable": display_date_sortable,
+                "hierarchyList": json.loads(hierarchy_list),
+            }
+            for (
+                section,
+                title,
+                href,
+                abstract,
+                pub_date,
+                publication_id,
+                display_date_sortable,
+                hierarchy_list,
+            ) in records
+        ]
+
+    def index_results(
+        self, query_key: str, days: Iterable[date], results: List[dict]
+    ) -> None:
+        """Stores in the local index the DOU `results` of the query
+        identified by `query_key` published on the `days` searched,
+        replacing the ones previously indexed for these days. The
+        results of other days are left out."""
+        days = {day.isoformat() for day in days}
+        if not days:
+            return
+        publications = {}
+        positions = dict.fromkeys(days, 0)
+        result_rows = []
+        for result in results:
+            day = _dou_date(result["date"]).isoformat()
+            if day not in days:
+                continue
+            publications[str(result["id"])] = (
+                str(result["id"]),
+                result["section"],
+                result["title"],
+                result["href"],
+                result["date"],
+                result.get("display_date_sortable"),
+                json.dumps(result["hierarchyList"]),
+            )
+            result_rows.append(
+                (query_key, day, positions[day], str(result["id"]), result["abstract"])
+            )
+            positions[day] += 1
+
+        placeholder = self.db_hook.placeholder
+        for day in days:
+            self.db_hook.run(
+                f"DELETE FROM {self.DOU_INDEXED_RESULTS_TABLE} "
+                f"WHERE query_key = {placeholder} AND day = {placeholder}",
+                parameters=(query_key, day),
+            )
+        if publications:
+            self.db_hook.insert_rows(
+                self.DOU_PUBLICATIONS_TABLE,
+                list(publications.values()),
+                target_fields=[
+                    "id",
+                    "section",
+                    "title",
+                    "href",
+                    "pub_date",
+                    "display_date_sortable",
+                    "hierarchy_list",
+                ],
+                replace=True,
+                replace_index=["id"],
+            )
+            self.db_hook.insert_rows(
+                self.DOU_INDEXED_RESULTS_TABLE,
+                result_rows,
+                target_fields=[
+                    "query_key",
+                    "day",
+                    "position",
+                    "publication_id",
+                    "abstract",
+                ],
+            )
+        indexed_at = _now().isoformat()
+        self.db_hook.insert_rows(
+            self.DOU_INDEXED_DAYS_TABLE,
+            [(query_key, day, indexed_at) for day in sorted(days)],
+            target_fields=["query_key", "day", "indexed_at"],
+            replace=True,
+            replace_index=["query_key", "day"],
+        )
+
+
+def _dou_date(pub_date: str) -> date:
+    """Parses the publication date of a DOU result (dd/mm/YYYY)."""
+    return datetime.strptime(pub_date, "%d/%m/%Y").date()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(microsecond=0)
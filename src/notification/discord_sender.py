@@ -1,16 +1,36 @@
+import logging
 import re
 
-import requests
-
 from notification.isender import ISender
+from notification.webhook_client import WebhookClient
 from schemas import ReportConfig
 
 
 class DiscordSender(ISender):
-    highlight_tags = ("__", "__")
+    """Prepare a report and send it to Discord. Texts and embeds are
+    packed in as few messages as the Discord limits allow, keeping the
+    report order.
+    """
 
-    def __init__(self, report_config: ReportConfig) -> None:
+    highlight_tags = ("__", "__")
+    USERNAME = "Querido Prisma (rodou)"
+    # Discord message limits
+    MAX_CONTENT_CHARS = 2000
+    MAX_EMBEDS = 10
+    MAX_EMBEDS_CHARS = 6000
+    MAX_EMBED_TITLE_CHARS = 256
+    MAX_EMBED_DESCRIPTION_CHARS = 4096
+
+    def __init__(
+        self,
+        report_config: ReportConfig,
+        timeout: float = WebhookClient.REQUEST_TIMEOUT,
+    ) -> None:
         self.webhook_url = report_config.discord["webhook"]
+        self.client = WebhookClient(self.webhook_url, name="discord", timeout=timeout)
+        self._content = []
+        self._embeds = []
+        self._embeds_chars = 0
         self.hide_filters = report_config.hide_filters
         self.header_text = report_config.header_text
         self.footer_text = report_config.footer_text
@@ -50,27 +70,52 @@ class DiscordSender(ISender):
             footer_text = self._remove_html_tags(self.footer_text)
             self.send_text(footer_text)
 
+        self.flush()
+        logging.info("Discord delivery: %s", self.client.metrics())
+
     def send_text(self, content):
-        self.send_data({"content": content})
+        """Adds a text line to the message being packed. Texts after
+        embeds start a new message, as Discord shows the content above
+        the embeds."""
+        content = content[: self.MAX_CONTENT_CHARS]
+        content_chars = sum(len(text) + 1 for text in self._content)
+        if self._embeds or content_chars + len(content) > self.MAX_CONTENT_CHARS:
+            self.flush()
+        self._content.append(content)
 
     def send_embeds(self, items):
-        self.send_data(
-            {
-                "embeds": [
-                    {
-                        "title": item["title"],
-                        "description": item["abstract"],
-                        "url": item["href"],
-                    }
-                    for item in items
-                ]
+        """Adds an embed per item to the messages being packed."""
+        for item in items:
+            embed = {
+                "title": item["title"][: self.MAX_EMBED_TITLE_CHARS],
+                "description": item["abstract"][: self.MAX_EMBED_DESCRIPTION_CHARS],
+                "url": item["href"],
             }
-        )
+            embed_chars = len(embed["title"]) + len(embed["description"])
+            if (
+                len(self._embeds) >= self.MAX_EMBEDS
+                or self._embeds_chars + embed_chars > self.MAX_EMBEDS_CHARS
+            ):
+                self.flush()
+            self._embeds.append(embed)
+            self._embeds_chars += embed_chars
+
+    def flush(self):
+        """Sends the message being packed, if any."""
+        data = {}
+        if self._content:
+            data["content"] = "\n".join(self._content)
+        if self._embeds:
+            data["embeds"] = self._embeds
+        self._content = []
+        self._embeds = []
+        self._embeds_chars = 0
+        if data:
+            self.send_data(data)
 
     def send_data(self, data):
-        data["username"] = "Querido Prisma (rodou)"
-        result = requests.post(self.webhook_url, json=data)
-        result.raise_for_status()
+        data["username"] = self.USERNAME
+        self.client.post(data)
 
     def _remove_html_tags(self, text):
         # Define a regular expression pattern to match HTML tags
@@ -1,14 +1,12 @@
 """Module for sending emails.
 """
 
+import io
 import os
 import sys
+from functools import lru_cache
+from html import escape
 from tempfile import NamedTemporaryFile
-import textwrap
-
-import markdown
-import pandas as pd
-from airflow.utils.email import send_email
 
 # TODO fix this
 # Add parent folder to sys.path in order to be able to import
@@ -17,6 +15,8 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
 from notification.isender import ISender
+from notification.report_exporter import ReportExporter
+from notification.smtp_transport import send_email
 from schemas import ReportConfig
 
 
@@ -25,6 +25,18 @@ class EmailSender(ISender):
 
     highlight_tags = ("<span class='highlight' style='background:#FFA;'>", "</span>")
 
+    ITEM_TEMPLATE = (
+        '<p class="secao-marker">{section}</p>\n'
+        '<h3><a href="{href}">{title}</a></h3>\n'
+        "<p style='text-align:justify' class='abstract-marker'>{abstract}</p>\n"
+        "<p class='date-marker'>{date}</p>\n"
+    )
+    HIDDEN_FILTERS_ITEM_TEMPLATE = (
+        '<h3><a href="{href}">{title}</a></h3>\n'
+        "<p style='text-align:justify' class='abstract-marker'>{abstract}</p>\n"
+        "<p><br><br></p>\n"
+    )
+
     def __init__(self, report_config: ReportConfig) -> None:
         self.report_config = report_config
         self.search_report = ""
@@ -55,7 +67,9 @@ class EmailSender(ISender):
         content += self.watermark
 
         if self.report_config.attach_csv and skip_notification is False:
-            with self.get_csv_tempfile() as csv_file:
+            with self.get_csv_tempfile(
+                self.report_config.attach_csv_gzip
+            ) as csv_file:
                 send_email(
                     to=self.report_config.emails,
                     subject=full_subject,
@@ -73,160 +87,106 @@ class EmailSender(ISender):
 
     def generate_email_content(self) -> str:
         """Generate HTML content to be sent by email based on
-        search_report dictionary
+        search_report dictionary. The HTML is written directly to a
+        buffer, filling the item templates with each result.
         """
-
-        current_directory = os.path.dirname(__file__)
-        parent_directory = os.path.dirname(current_directory)
-        file_path = os.path.join(parent_directory, "report_style.css")
-
-        with open(file_path, "r", encoding="utf-8") as f:
-            blocks = [f"<style>\n{f.read()}</style>"]
-
+        hide_filters = self.report_config.hide_filters
+        item_template = (
+            self.HIDDEN_FILTERS_ITEM_TEMPLATE if hide_filters else self.ITEM_TEMPLATE
+        )
+        html = io.StringIO()
+        write = html.write
+
+        write(f"<style>\n{_report_style()}</style>\n")
         if self.report_config.header_text:
-            blocks.append(self.report_config.header_text)
+            write(f"{self.report_config.header_text}\n")
 
         for search in self.search_report:
 
             if search["header"]:
-                blocks.append(f"<h1>{search['header']}</h1>")
-
-            if not self.report_config.hide_filters:
-                if search["department"]:
-                    blocks.append(
-                        """<p class="secao-marker">Filtrando resultados somente para:</p>"""
-                    )
-                    blocks.append("<ul>")
-                    for dpt in search["department"]:
-                        blocks.append(f"<li>{dpt}</li>")
-                    blocks.append("</ul>")
+                write(f"<h1>{search['header']}</h1>\n")
+
+            if not hide_filters and search["department"]:
+                write(
+                    '<p class="secao-marker">Filtrando resultados somente para:</p>\n'
+                    "<ul>\n"
+                )
+                for dpt in search["department"]:
+                    write(f"<li>{escape(dpt)}</li>\n")
+                write("</ul>\n")
 
             for group, search_results in search["result"].items():
 
                 if not search_results:
-                    blocks.append(f"<p>{self.report_config.no_results_found_text}.</p>")
-                else:
-                    if not self.report_config.hide_filters:
-                        if group != "single_group":
-                            blocks.append("\n")
-                            blocks.append(f"**Grupo: {group}**")
-                            blocks.append("\n\n")
-
-                    for term, term_results in search_results.items():
-                        blocks.append("\n")
-                        if not self.report_config.hide_filters:
-                            blocks.append(f"* # Resultados para: {term}")
-
-                        for department, results in term_results.items():
-
-                            if (
-                                not self.report_config.hide_filters
-                                and department != "single_department"
-                            ):
-                                blocks.append(f"**{department}**")
-
-                            for result in results:
-                                if not self.report_config.hide_filters:
-                                    sec_desc = result["section"]
-                                    item_html = f"""
-                                        <p class="secao-marker">{sec_desc}</p>
-                                        ### [{result['title']}]({result['href']})
-                                        <p style='text-align:justify' class='abstract-marker'>{result['abstract']}</p>
-                                        <p class='date-marker'>{result['date']}</p>"""
-                                    blocks.append(
-                                        textwrap.indent(
-                                            textwrap.dedent(item_html), " " * 4
-                                        )
-                                    )
-                                else:
-                                    item_html = f"""
-                                        ### [{result['title']}]({result['href']})
-                                        <p style='text-align:justify' class='abstract-marker'>{result['abstract']}</p><br><br>"""
-                                    blocks.append(textwrap.dedent(item_html))
-
-        blocks.append("---")
-        if self.report_config.footer_text:
-            blocks.append(self.report_config.footer_text)
+                    write(f"<p>{self.report_config.no_results_found_text}.</p>\n")
+                    continue
 
-        return markdown.markdown("\n".join(blocks))
+                if not hide_filters:
+                    if group != "single_group":
+                        write(f"<p><strong>Grupo: {escape(group)}</strong></p>\n")
+                    write("<ul>\n")
 
-    def get_csv_tempfile(self) -> NamedTemporaryFile:
-        temp_file = NamedTemporaryFile(prefix="extracao_dou_", suffix=".csv")
-        self.convert_report_to_dataframe().to_csv(temp_file, index=False)
-        return temp_file
+                for term, term_results in search_results.items():
+                    if not hide_filters:
+                        write(
+                            f"<li>\n<h1>Resultados para: {escape(term)}</h1>\n"
+                        )
 
-    def convert_report_to_dataframe(self) -> pd.DataFrame:
-        df = pd.DataFrame(self.convert_report_dict_to_tuple_list())
-        df.columns = [
-            "Consulta",
-            "Grupo",
-            "Termo de pesquisa",
-            "Unidade",
-            "Seção",
-            "URL",
-            "Título",
-            "Resumo",
-            "Data",
-        ]
-        del_header = True
-        del_single_group = True
-        del_single_department = True
+                    for department, results in term_results.items():
 
-        for search in self.search_report:
-            if search["header"] is not None:
-                del_header = False
-
-            for group, search_result in search["result"].items():
-                if group != "single_group":
-                    del_single_group = False
-                for _, term_results in search_result.items():
-                    for dpt,_ in term_results.items():
-                        if dpt != "single_department":
-                            del_single_department = False
-
-        # Drop empty or default columns
-        if del_header:
-            del df["Consulta"]
-
-        if del_single_group:
-            del df["Grupo"]
-        else:
-            # Replace single_group with blank
-            df["Grupo"] = df["Grupo"].replace("single_group", "")
+                        if not hide_filters and department != "single_department":
+                            write(f"<strong>{escape(department)}</strong>\n")
+
+                        for result in results:
+                            write(_format_item(item_template, result))
+
+                    if not hide_filters:
+                        write("</li>\n")
+
+                if not hide_filters:
+                    write("</ul>\n")
+
+        write("<hr />\n")
+        if self.report_config.footer_text:
+            write(f"{self.report_config.footer_text}\n")
 
-        if del_single_department:
-            del df["Unidade"]
+        return html.getvalue()
+
+    def get_csv_tempfile(self, compress: bool = False) -> NamedTemporaryFile:
+        """Writes the report rows to a temporary CSV file, gzip
+        compressed if `compress`, streaming them from the report."""
+        exporter = ReportExporter(self.search_report)
+        if compress:
+            temp_file = NamedTemporaryFile(prefix="extracao_dou_", suffix=".csv.gz")
+            exporter.write_csv_gzip(temp_file)
         else:
-            # Replace single_group with blank
-            df["Unidade"] = df["Unidade"].replace("single_department", "")
+            temp_file = NamedTemporaryFile(
+                mode="w",
+                encoding="utf-8",
+                newline="",
+                prefix="extracao_dou_",
+                suffix=".csv",
+            )
+            exporter.write_csv(temp_file)
+        temp_file.flush()
+        return temp_file
 
-        return df
 
-    def convert_report_dict_to_tuple_list(self) -> list:
-        tuple_list = []
-        for search in self.search_report:
-            header = search["header"] if search["header"] else None
-            for group, results in search["result"].items():
-                for term, departments in results.items():
-                    for department, dpt_matches in departments.items():
-                        for match in dpt_matches:
-                            tuple_list.append(
-                                repack_match(header, group, term, department, match)
-                            )
-        return tuple_list
-
-
-def repack_match(
-    header: str, group: str, search_term: str, department: str, match: dict
-) -> tuple:
-    return (
-        header,
-        group,
-        search_term,
-        department,
-        match["section"],
-        match["href"],
-        match["title"],
-        match["abstract"],
-        match["date"],
+def _format_item(template: str, result: dict) -> str:
+    """Fills the item `template` with the `result`, escaping the plain
+    text fields. The abstract is HTML with the highlighted terms."""
+    return template.format(
+        section=escape(result["section"], quote=False),
+        href=escape(result["href"], quote=True),
+        title=escape(result["title"], quote=False),
+        abstract=result["abstract"],
+        date=escape(result["date"], quote=False),
     )
+
+
+@lru_cache(maxsize=None)
+def _report_style() -> str:
+    """Contents of the report CSS, read once per process."""
+    file_path = os.path.join(parent_dir, "report_style.css")
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
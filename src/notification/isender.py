@@ -1,9 +1,15 @@
-import copy
 import re
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Tuple
 
 START_PLACEHOLDER_REGEX = re.compile(r"(?<!\s)<%%>")
 END_PLACEHOLDER_REGEX = re.compile(r"</%%>(?!\s)")
+PLACEHOLDER_REGEX = re.compile(r"(</?%%>)")
+
+# (text, is_highlight) pairs
+Segments = Tuple[Tuple[str, bool], ...]
 
 class ISender(ABC):
     """Interface that defines a notifier sender.
@@ -38,25 +44,78 @@ class ISender(ABC):
         """Replace placeholders with specific formatting depending on
         the sender type.
 
+        The original report is not changed: the nesting is rebuilt with
+        views of the items, whose abstracts are formatted with the tags
+        of the sender only when read.
+
         Args:
             search_report (dict): A dictionary containing the search results.
 
         Returns:
             dict: A dictionary with the placeholders replaced with formatting tags.
         """
-        reports = copy.deepcopy(search_report)
-        for _, results in reports["result"].items():
-            for _,dpt in results.items():
-                for _, items in dpt.items():
-                    for item in items:
-                        open_tag, close_tag = self.highlight_tags
-                        item['abstract'] = _fix_missing_spaces(item['abstract']) \
-                            .replace('<%%>', open_tag) \
-                            .replace('</%%>', close_tag)
-
-        print (reports)
-
-        return reports
+        tags = self.highlight_tags
+        return {
+            **search_report,
+            "result": {
+                group: {
+                    term: {
+                        dpt: [HighlightedResult(item, tags) for item in items]
+                        for dpt, items in departments.items()
+                    }
+                    for term, departments in results.items()
+                }
+                for group, results in search_report["result"].items()
+            },
+        }
+
+
+class HighlightedResult(Mapping):
+    """Read-only view of a search result whose `abstract` is rendered
+    with the `tags` (open, close) of a sender when it is read.
+    """
+
+    def __init__(self, item: dict, tags: Tuple[str, str]):
+        self.item = item
+        self.tags = tags
+
+    def __getitem__(self, key: str):
+        if key == "abstract":
+            return render_highlights(tokenize_highlights(self.item[key]), *self.tags)
+        return self.item[key]
+
+    def __iter__(self):
+        return iter(self.item)
+
+    def __len__(self) -> int:
+        return len(self.item)
+
+
+@lru_cache(maxsize=65536)
+def tokenize_highlights(abstract: str) -> Segments:
+    """Splits an abstract marked with the `<%%>` and `</%%>`
+    placeholders into (text, is_highlight) segments, after adding the
+    missing spaces around the placeholders. The segments are cached, so
+    each abstract is tokenized once for all the senders.
+    """
+    segments = []
+    highlight = False
+    for part in PLACEHOLDER_REGEX.split(_fix_missing_spaces(abstract)):
+        if part == "<%%>":
+            highlight = True
+        elif part == "</%%>":
+            highlight = False
+        elif part:
+            segments.append((part, highlight))
+    return tuple(segments)
+
+
+def render_highlights(segments: Segments, open_tag: str, close_tag: str) -> str:
+    """Joins the segments, wrapping the highlighted ones with the tags."""
+    return "".join(
+        f"{open_tag}{text}{close_tag}" if highlight else text
+        for text, highlight in segments
+    )
 
 
 def _fix_missing_spaces(string: str) -> str:
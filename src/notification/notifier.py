@@ -1,6 +1,9 @@
 import ast
+import logging
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # TODO fix this
 # Add parent folder to sys.path in order to be able to import
@@ -8,13 +11,14 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
-from typing import List
+from typing import Callable, Dict, Iterable, Optional
 
 from notification.discord_sender import DiscordSender
 from notification.email_sender import EmailSender
 from notification.isender import ISender
 from notification.slack_sender import SlackSender
 from parsers import DAGConfig
+from utils import instrumentation
 
 
 class Notifier:
@@ -22,25 +26,111 @@ class Notifier:
     defined in the YAML file. Currently it sends notification to email,
     Discord and Slack.
     """
-    senders = List[ISender]
+    senders = Dict[str, ISender]
+
+    # Timeout, in seconds, of each request to the Discord and Slack
+    # webhooks. The e-mails use the `smtp_timeout` of the Airflow
+    # configuration
+    WEBHOOK_TIMEOUT = 30
 
     def __init__(self, specs: DAGConfig) -> None:
-        self.senders = []
+        self.senders = {}
         if specs.report.emails:
-            self.senders.append(EmailSender(specs.report))
+            self.senders["email"] = EmailSender(specs.report)
         if specs.report.discord:
-            self.senders.append(DiscordSender(specs.report))
+            self.senders["discord"] = DiscordSender(
+                specs.report, timeout=self.WEBHOOK_TIMEOUT
+            )
         if specs.report.slack:
-            self.senders.append(SlackSender(specs.report))
+            self.senders["slack"] = SlackSender(
+                specs.report, timeout=self.WEBHOOK_TIMEOUT
+            )
 
 
-    def send_notification(self, search_report: str, report_date: str):
+    def send_notification(
+        self,
+        search_report: str,
+        report_date: str,
+        delivered: Iterable[str] = (),
+        on_delivered: Optional[Callable[[str], None]] = None,
+    ):
         """Sends the notification to the specified email, Discord or Slack
 
+        Each channel is sent by a worker thread at the same time, so a
+        slow or failing channel does not hold back the others and the
+        notification lasts as long as the slowest channel. Each request
+        of a channel is limited by its own timeout: `WEBHOOK_TIMEOUT`
+        for Discord and Slack and the `smtp_timeout` of Airflow for the
+        e-mails. The time spent by each channel is logged and, after all
+        of them finish, an error is raised if any of them failed.
+
+        The channels in `delivered`, sent by a previous try, are skipped
+        and `on_delivered` is called with each channel sent, so a retry
+        sends the notification only to the channels that failed.
+
         Args:
             search_report (str): The report to be sent
             report_date (str): The date of the report
+            delivered (Iterable[str]): The channels already sent
+            on_delivered (Callable[[str], None]): Called with each
+                channel sent
         """
+        delivered = set(delivered)
+        senders = {
+            channel: sender
+            for channel, sender in self.senders.items()
+            if channel not in delivered
+        }
+        for channel in self.senders.keys() & delivered:
+            logging.info("Channel %s already sent, skipped", channel)
+        if not senders:
+            return
+
+        latencies = {}
+
+        def timed(channel: str, sender: ISender):
+            start = time.perf_counter()
+            try:
+                with instrumentation.span(f"notification.{channel}"):
+                    sender.send_report(search_report, report_date)
+            finally:
+                latencies[channel] = time.perf_counter() - start
+
+        dispatched_at = time.monotonic()
+        errors = {}
+        with ThreadPoolExecutor(
+            max_workers=len(senders), thread_name_prefix="notify"
+        ) as executor:
+            futures = {
+                channel: executor.submit(timed, channel, sender)
+                for channel, sender in senders.items()
+            }
+            for channel, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:  # pylint: disable=broad-except
+                    errors[channel] = e
+                    continue
+                if on_delivered:
+                    on_delivered(channel)
+
+        for channel in futures:
+            logging.info(
+                "Channel %s %s in %.2f seconds",
+                channel,
+                "failed" if channel in errors else "sent",
+                latencies[channel],
+            )
+        logging.info(
+            "All channels finished in %.2f seconds",
+            time.monotonic() - dispatched_at,
+        )
 
-        for sender in self.senders:
-            sender.send_report(search_report, report_date)
+        if errors:
+            for channel, error in errors.items():
+                logging.error(
+                    "Falha no envio para o canal %s", channel, exc_info=error
+                )
+            raise RuntimeError(
+                f"Falha no envio da notificação para: {', '.join(errors)}."
+            ) from next(iter(errors.values()))
@@ -0,0 +1,109 @@
+"""Export of the search reports to CSV files.
+"""
+
+import csv
+import gzip
+import io
+from operator import itemgetter
+from typing import IO, Iterator, NamedTuple, Tuple
+
+
+class ReportSummary(NamedTuple):
+    """Which optional columns a search report fills. Computed from the
+    report keys only, without reading the results."""
+
+    has_header: bool
+    has_groups: bool
+    has_departments: bool
+
+    @classmethod
+    def from_report(cls, search_report: list) -> "ReportSummary":
+        has_header = has_groups = has_departments = False
+        for search in search_report:
+            has_header = has_header or search["header"] is not None
+            for group, search_result in search["result"].items():
+                has_groups = has_groups or group != "single_group"
+                if has_departments:
+                    continue
+                has_departments = any(
+                    dpt != "single_department"
+                    for term_results in search_result.values()
+                    for dpt in term_results
+                )
+        return cls(has_header, has_groups, has_departments)
+
+
+class ReportExporter:
+    """Writes the rows of a search report, one result at a time, straight
+    from the nested report: search -> group -> term -> department ->
+    results.
+
+    The `Consulta`, `Grupo` and `Unidade` columns are left out when no
+    search of the report fills them, as told by the `ReportSummary`. The
+    default `single_group` and `single_department` are written blank.
+    """
+
+    COLUMNS = (
+        "Consulta",
+        "Grupo",
+        "Termo de pesquisa",
+        "Unidade",
+        "Seção",
+        "URL",
+        "Título",
+        "Resumo",
+        "Data",
+    )
+
+    def __init__(self, search_report: list):
+        self.search_report = search_report
+        summary = ReportSummary.from_report(search_report)
+        dropped = {
+            "Consulta": not summary.has_header,
+            "Grupo": not summary.has_groups,
+            "Unidade": not summary.has_departments,
+        }
+        self.columns: Tuple[str, ...] = tuple(
+            column for column in self.COLUMNS if not dropped.get(column)
+        )
+        self._select = itemgetter(
+            *(self.COLUMNS.index(column) for column in self.columns)
+        )
+
+    def rows(self) -> Iterator[tuple]:
+        """Yields a row with the `columns` for each result."""
+        select = self._select
+        for search in self.search_report:
+            header = search["header"] if search["header"] else None
+            for group, results in search["result"].items():
+                group = "" if group == "single_group" else group
+                for term, departments in results.items():
+                    for department, dpt_matches in departments.items():
+                        if department == "single_department":
+                            department = ""
+                        for match in dpt_matches:
+                            yield select(
+                                (
+                                    header,
+                                    group,
+                                    term,
+                                    department,
+                                    match["section"],
+                                    match["href"],
+                                    match["title"],
+                                    match["abstract"],
+                                    match["date"],
+                                )
+                            )
+
+    def write_csv(self, file: IO[str]) -> None:
+        """Writes the report as CSV to the text `file`."""
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(self.columns)
+        writer.writerows(self.rows())
+
+    def write_csv_gzip(self, file: IO[bytes]) -> None:
+        """Writes the report as gzip compressed CSV to the binary `file`."""
+        with gzip.GzipFile(fileobj=file, mode="wb") as gzip_file:
+            with io.TextIOWrapper(gzip_file, encoding="utf-8", newline="") as text:
+                self.write_csv(text)
@@ -2,22 +2,35 @@
 """
 
 from datetime import datetime
+import logging
 import re
 
-import requests
 from notification.isender import ISender
+from notification.webhook_client import WebhookClient
 
 from schemas import ReportConfig
 
 
 class SlackSender(ISender):
-    """Prepare a report and send it to Slack.
+    """Prepare a report and send it to Slack. The blocks are sent in
+    messages of up to `MAX_BLOCKS` blocks, without splitting the blocks
+    of a result between messages.
     """
     highlight_tags = ("*", "*")
-
-    def __init__(self, report_config: ReportConfig) -> None:
+    # Slack message limits
+    MAX_BLOCKS = 50
+    MAX_HEADER_CHARS = 150
+    MAX_SECTION_CHARS = 3000
+
+    def __init__(
+        self,
+        report_config: ReportConfig,
+        timeout: float = WebhookClient.REQUEST_TIMEOUT,
+    ) -> None:
         self.webhook_url = report_config.slack["webhook"]
-        self.blocks = []
+        self.client = WebhookClient(self.webhook_url, name="slack", timeout=timeout)
+        # Each unit is a list of blocks sent in the same message
+        self.units = []
         self.hide_filters = report_config.hide_filters
         self.header_text = report_config.header_text
         self.footer_text = report_config.footer_text
@@ -58,54 +71,87 @@ class SlackSender(ISender):
             footer_text = _remove_html_tags(self.footer_text)
             self._add_header(footer_text)
         self._flush()
+        logging.info("Slack delivery: %s", self.client.metrics())
 
     def _add_header(self, text):
-        self.blocks.append(
-            {
-                "type": "header",
-                "text": {"type": "plain_text", "text": text, "emoji": True},
-            }
+        self.units.append(
+            [
+                {
+                    "type": "header",
+                    "text": {
+                        "type": "plain_text",
+                        "text": text[: self.MAX_HEADER_CHARS],
+                        "emoji": True,
+                    },
+                }
+            ]
         )
 
     def _add_text(self, text):
-        self.blocks += [
-            {
-                "type": "section",
-                "text": {"type": "plain_text", "text": text, "emoji": True},
-            },
-            {"type": "divider"},
-        ]
+        self.units.append(
+            [
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "plain_text",
+                        "text": text[: self.MAX_SECTION_CHARS],
+                        "emoji": True,
+                    },
+                },
+                {"type": "divider"},
+            ]
+        )
 
     def _add_block(self, item):
-        self.blocks += [
-            {"type": "section", "text": {"type": "mrkdwn", "text": item["title"]}},
-            {"type": "section", "text": {"type": "mrkdwn", "text": item["abstract"]}},
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"Publicado em: *{_format_date(item['date'])}*",
+        self.units.append(
+            [
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": item["title"][: self.MAX_SECTION_CHARS],
+                    },
                 },
-                "accessory": {
-                    "type": "button",
+                {
+                    "type": "section",
                     "text": {
-                        "type": "plain_text",
-                        "text": "Acessar publicação",
-                        "emoji": True,
+                        "type": "mrkdwn",
+                        "text": item["abstract"][: self.MAX_SECTION_CHARS],
                     },
-                    "value": "click_me_123",
-                    "url": item["href"],
-                    "action_id": "button-action",
                 },
-            },
-            {"type": "divider"},
-        ]
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": f"Publicado em: *{_format_date(item['date'])}*",
+                    },
+                    "accessory": {
+                        "type": "button",
+                        "text": {
+                            "type": "plain_text",
+                            "text": "Acessar publicação",
+                            "emoji": True,
+                        },
+                        "value": "click_me_123",
+                        "url": item["href"],
+                        "action_id": "button-action",
+                    },
+                },
+                {"type": "divider"},
+            ]
+        )
 
     def _flush(self):
-        for i in range(0, len(self.blocks), 50):
-            data = {"blocks": self.blocks[i : i + 50]}
-            result = requests.post(self.webhook_url, json=data)
-            result.raise_for_status()
+        """Sends the blocks packed in messages of up to `MAX_BLOCKS`."""
+        message = []
+        for unit in self.units:
+            if message and len(message) + len(unit) > self.MAX_BLOCKS:
+                self.client.post({"blocks": message})
+                message = []
+            message.extend(unit)
+        if message:
+            self.client.post({"blocks": message})
+        self.units = []
 
 
 WEEKDAYS_EN_TO_PT = [
@@ -0,0 +1,202 @@
+"""Delivery of e-mails through a reused SMTP connection.
+"""
+
+import atexit
+import logging
+import os
+import smtplib
+import ssl
+import threading
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+from airflow.configuration import conf
+from airflow.exceptions import AirflowConfigException, AirflowException
+from airflow.hooks.base import BaseHook
+from airflow.utils import email
+
+from utils import instrumentation
+
+SMTP_BACKEND = "airflow.utils.email.send_email_smtp"
+MAX_HEADER_LENGTH = 78
+
+
+class SMTPTransport:
+    """Sends e-mails through a single SMTP connection per process and
+    connection id, opened and authenticated on the first message and
+    reused by the next ones, instead of a new connection (and TLS
+    handshake) per e-mail as `airflow.utils.email.send_mime_email`
+    does. The SMTP settings are the same used by Airflow: the `[smtp]`
+    configuration section and the credentials of the connection.
+
+    The recipients of a message are sent in chunks of up to
+    `MAX_RECIPIENTS` per SMTP transaction, the limit of many relays. A
+    connection closed by the server while idle is opened again, up to
+    `SMTP_RETRY_LIMIT` attempts.
+
+    Attributes:
+        MAX_RECIPIENTS (int): Max recipients per SMTP transaction.
+    """
+
+    MAX_RECIPIENTS = 50
+
+    _transports: Dict[Tuple[int, str], "SMTPTransport"] = {}
+    _transports_lock = threading.Lock()
+
+    def __init__(self, conn_id: str):
+        self.conn_id = conn_id
+        self.host = conf.get_mandatory_value("smtp", "SMTP_HOST")
+        self.port = conf.getint("smtp", "SMTP_PORT")
+        self.starttls = conf.getboolean("smtp", "SMTP_STARTTLS")
+        self.with_ssl = conf.getboolean("smtp", "SMTP_SSL")
+        self.retry_limit = conf.getint("smtp", "SMTP_RETRY_LIMIT")
+        self.timeout = conf.getint("smtp", "SMTP_TIMEOUT")
+        self.messages = 0
+        self.connections = 0
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, conn_id: str) -> "SMTPTransport":
+        """Returns the transport of the current process for `conn_id`.
+        A forked process does not reuse the connection of its parent."""
+        key = (os.getpid(), conn_id)
+        with cls._transports_lock:
+            if key not in cls._transports:
+                cls._transports[key] = cls(conn_id)
+            return cls._transports[key]
+
+    @classmethod
+    def close_all(cls) -> None:
+        """Closes the connections opened by the current process."""
+        with cls._transports_lock:
+            for (pid, _), transport in cls._transports.items():
+                if pid == os.getpid():
+                    transport.close()
+
+    @cached_property
+    def credentials(self) -> Tuple[Optional[str], Optional[str]]:
+        """SMTP login and password, from the Airflow connection or, as
+        Airflow does, from the `[smtp]` configuration."""
+        try:
+            airflow_conn = BaseHook.get_connection(self.conn_id)
+            if airflow_conn.login is not None and airflow_conn.password is not None:
+                return airflow_conn.login, airflow_conn.password
+        except AirflowException:
+            pass
+        try:
+            return conf.get("smtp", "SMTP_USER"), conf.get("smtp", "SMTP_PASSWORD")
+        except AirflowConfigException:
+            return None, None
+
+    def sendmail(self, mail_from: str, recipients: List[str], message: str) -> None:
+        """Sends the `message` to the `recipients`, in chunks of up to
+        `MAX_RECIPIENTS` per transaction."""
+        for start in range(0, len(recipients), self.MAX_RECIPIENTS):
+            self._sendmail(
+                mail_from, recipients[start : start + self.MAX_RECIPIENTS], message
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._smtp = None
+
+    def metrics(self) -> dict:
+        """Returns the counters of transactions sent and connections
+        opened."""
+        return {"messages": self.messages, "connections": self.connections}
+
+    def _sendmail(self, mail_from: str, recipients: List[str], message: str) -> None:
+        with self._lock:
+            for attempt in range(1, self.retry_limit + 1):
+                try:
+                    if self._smtp is None:
+                        with instrumentation.span("smtp.connect"):
+                            self._smtp = self._connect()
+                    with instrumentation.span("smtp.send"):
+                        self._smtp.sendmail(mail_from, recipients, message)
+                    break
+                except smtplib.SMTPServerDisconnected:
+                    # The server may close a connection kept idle
+                    self._smtp = None
+                    if attempt == self.retry_limit:
+                        raise
+                    instrumentation.incr("smtp.retries")
+                    logging.info("SMTP connection closed, reconnecting")
+            self.messages += 1
+            instrumentation.incr("smtp.messages")
+            instrumentation.incr("smtp.bytes", len(message))
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.with_ssl:
+            ssl_context = (
+                None
+                if conf.get("email", "SSL_CONTEXT") == "none"
+                else ssl.create_default_context()
+            )
+            smtp = smtplib.SMTP_SSL(
+                host=self.host, port=self.port, timeout=self.timeout, context=ssl_context
+            )
+        else:
+            smtp = smtplib.SMTP(host=self.host, port=self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        user, password = self.credentials
+        if user and password:
+            smtp.login(user, password)
+        self.connections += 1
+        instrumentation.incr("smtp.connections")
+        logging.info("SMTP connection opened to %s:%s", self.host, self.port)
+        return smtp
+
+
+atexit.register(SMTPTransport.close_all)
+
+
+def send_email(
+    to: List[str],
+    subject: str,
+    html_content: str,
+    files: Optional[List[str]] = None,
+    mime_charset: str = "utf-8",
+) -> None:
+    """Sends an e-mail as `airflow.utils.email.send_email` does, but
+    through the `SMTPTransport` of the process when the Airflow e-mail
+    backend is the default SMTP one. Other backends are used as usual.
+    """
+    if conf.get("email", "EMAIL_BACKEND") != SMTP_BACKEND:
+        email.send_email(
+            to=to,
+            subject=subject,
+            html_content=html_content,
+            files=files,
+            mime_charset=mime_charset,
+        )
+        return
+
+    mail_from = conf.get("smtp", "SMTP_MAIL_FROM", fallback=None) or conf.get(
+        "email", "FROM_EMAIL", fallback=None
+    )
+    if mail_from is None:
+        raise ValueError(
+            "Remetente do e-mail não configurado: informe `smtp_mail_from` "
+            "na seção [smtp] ou `from_email` na seção [email] do Airflow."
+        )
+    msg, recipients = email.build_mime_message(
+        mail_from=mail_from,
+        to=to,
+        subject=subject,
+        html_content=html_content,
+        files=files,
+        mime_charset=mime_charset,
+    )
+    # Headers folded as RFC 5322 requires: without folding, the `To` of
+    # a large recipient list exceeds the 998 characters line limit
+    SMTPTransport.get(conf.get("email", "EMAIL_CONN_ID")).sendmail(
+        mail_from, recipients, msg.as_string(maxheaderlen=MAX_HEADER_LENGTH)
+    )
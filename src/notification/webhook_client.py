@@ -0,0 +1,119 @@
+"""Delivery of messages to chat webhooks (Discord and Slack).
+"""
+
+import logging
+import time
+from functools import cached_property
+from typing import Optional
+
+import requests
+
+from utils import instrumentation
+from utils.http_session import create_session, get_retry_after
+
+
+class WebhookClient:
+    """Posts messages to a webhook, one at a time and in order, through
+    a pooled session that reuses the connection between messages.
+
+    A message answered with 429 (Too Many Requests) is posted again
+    after the time asked by the server (`Retry-After` header or
+    `retry_after` of the JSON body) before the next messages, so the
+    order is kept. When the response tells that no requests are left in
+    the current rate limit window (`X-RateLimit-Remaining: 0`), the next
+    message waits for the window reset (`X-RateLimit-Reset-After`).
+
+    Each request is limited to `timeout` seconds.
+
+    The messages sent, the retries and the time spent are available at
+    `metrics` and recorded by the instrumentation, prefixed by `name`.
+    """
+
+    REQUEST_TIMEOUT = 30
+    MAX_RETRIES = 5
+    DEFAULT_RETRY_AFTER = 1.0
+
+    def __init__(
+        self,
+        url: str,
+        max_retries: int = MAX_RETRIES,
+        name: str = "webhook",
+        timeout: float = REQUEST_TIMEOUT,
+    ):
+        self.url = url
+        self.name = name
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.messages = 0
+        self.retries = 0
+        self.waiting_time = 0.0
+        self.elapsed_time = 0.0
+        self._next_allowed = 0.0
+
+    @cached_property
+    def session(self) -> requests.Session:
+        """Pooled session reused by every message of this webhook. 429
+        responses are handled by `post`, keeping the message order."""
+        return create_session(pool_size=1, max_retries=0)
+
+    def post(self, data: dict) -> requests.Response:
+        """Posts the message `data` as JSON, retrying it while
+        throttled up to `max_retries` times."""
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            self._sleep(self._next_allowed - time.monotonic())
+            with instrumentation.span(f"{self.name}.request"):
+                response = self.session.post(
+                    self.url, json=data, timeout=self.timeout
+                )
+            self._schedule_next(response)
+            if response.status_code != 429 or attempt >= self.max_retries:
+                break
+            attempt += 1
+            self.retries += 1
+            instrumentation.incr(f"{self.name}.retries")
+            retry_after = _get_retry_after(response) or self.DEFAULT_RETRY_AFTER
+            logging.info("Webhook throttled, retrying in %.2f seconds", retry_after)
+            self._sleep(retry_after)
+
+        self.elapsed_time += time.monotonic() - start
+        response.raise_for_status()
+        self.messages += 1
+        instrumentation.incr(f"{self.name}.messages")
+        return response
+
+    def metrics(self) -> dict:
+        """Returns the counters of messages sent and time spent."""
+        return {
+            "messages": self.messages,
+            "retries": self.retries,
+            "waiting_seconds": round(self.waiting_time, 3),
+            "elapsed_seconds": round(self.elapsed_time, 3),
+        }
+
+    def _schedule_next(self, response: requests.Response) -> None:
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset_after = float(response.headers["X-RateLimit-Reset-After"])
+            except (KeyError, ValueError):
+                return
+            self._next_allowed = time.monotonic() + reset_after
+
+    def _sleep(self, delay: float) -> None:
+        if delay > 0:
+            time.sleep(delay)
+            self.waiting_time += delay
+            instrumentation.add_span(f"{self.name}.sleep", delay)
+
+
+def _get_retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds to wait asked by a 429 response, in the `Retry-After`
+    header (Slack) or in the `retry_after` of the JSON body (Discord)."""
+    retry_after = get_retry_after(response)
+    if retry_after is not None:
+        return retry_after
+    try:
+        return max(float(response.json()["retry_after"]), 0.0)
+    except (ValueError, KeyError, TypeError):
+        return None
@@ -25,6 +25,12 @@ class DBSelect(BaseModel):
 
     sql: str = Field(description="SQL query to fetch the search terms")
     conn_id: str = Field(description="Airflow connection ID to use for the SQL query")
+    version_sql: Optional[str] = Field(
+        default=None,
+        description="Consulta SQL leve que retorna a versão da tabela de termos "
+        "(por exemplo a data da última atualização). Os termos só são "
+        "consultados novamente quando a versão muda.",
+    )
 
 
 class FetchTermsConfig(BaseModel):
@@ -60,10 +66,10 @@ class SearchConfig(BaseModel):
         description="Lista de fontes de dados para pesquisar (Querido Diário [QD], "
         "Diário Oficial da União [DOU], INLABS). Default: DOU.",
     )
-    territory_id: Optional[int] = Field(
+    territory_id: Optional[Union[int, List[int]]] = Field(
         default=None,
-        description="ID do território no Querido Diário para filtragem "
-        "baseada em localização",
+        description="ID ou lista de IDs de territórios no Querido Diário "
+        "para filtragem baseada em localização",
     )
     date: Optional[str] = Field(
         default="DIA",
@@ -135,6 +141,26 @@ class SearchConfig(BaseModel):
         "Valores: True ou False. Default: False. "
         "(Funcionalidade disponível apenas no INLABS)",
     )
+    terms_shard_size: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Quantidade máxima de termos pesquisados por tarefa. "
+        "Quando informado, a lista de termos é dividida em partes "
+        "pesquisadas em paralelo. Default: None (todos os termos em uma "
+        "única tarefa).",
+    )
+    incremental: Optional[bool] = Field(
+        default=False,
+        description="Se a pesquisa deve buscar apenas a partir da última data "
+        "coberta pela execução anterior, reaproveitando os resultados "
+        "anteriores ainda dentro do intervalo de `date`. Default: False.",
+    )
+    local_index: Optional[bool] = Field(
+        default=False,
+        description="Se a pesquisa no DOU deve reaproveitar os dias já "
+        "pesquisados guardados no índice local de publicações, buscando "
+        "no portal apenas os dias que faltam. Default: False.",
+    )
 
 
 class ReportConfig(BaseModel):
@@ -154,6 +180,11 @@ class ReportConfig(BaseModel):
         description="Se deve anexar um arquivo CSV com os resultados da pesquisa."
         "Default: False.",
     )
+    attach_csv_gzip: Optional[bool] = Field(
+        default=False,
+        description="Se deve compactar com gzip o arquivo CSV anexado. "
+        "Default: False.",
+    )
     subject: Optional[str] = Field(
         default=None, description="Assunto do relatório por e-mail"
     )
@@ -167,6 +198,29 @@ class ReportConfig(BaseModel):
         description="Se deve ocultar os filtros aplicados no relatório."
         "Default: False.",
     )
+    only_new: Optional[bool] = Field(
+        default=False,
+        description="Se deve notificar apenas as publicações ainda não "
+        "notificadas pela DAG. Default: False.",
+    )
+    only_new_ttl_days: Optional[int] = Field(
+        default=400,
+        gt=0,
+        description="Quantidade de dias em que uma publicação notificada "
+        "não é notificada novamente quando `only_new` é utilizado. "
+        "Default: 400.",
+    )
+    digest: Optional[str] = Field(
+        default=None,
+        pattern=r"^[\w.-]+$",
+        description="Nome do resumo (digest) no qual o relatório é agrupado "
+        "com os das demais DAGs de mesmo resumo e enviado em uma única "
+        "notificação pela DAG do resumo",
+    )
+    digest_schedule: Optional[str] = Field(
+        default=None,
+        description="Expressão cron da DAG do resumo. Default: 0 9 * * *",
+    )
     header_text: Optional[str] = Field(
         default=None, description="Texto a ser incluído no cabeçalho do relatório"
     )
@@ -1,19 +1,19 @@
 """Abstract and concrete classes to perform terms searchs.
 """
 
-import ast
+import hashlib
 import json
 import logging
 import re
-import time
 import sys
 import os
 from abc import ABC
-from datetime import datetime, timedelta
-from random import random
-from typing import Dict, List, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import cached_property
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 import string
-import pandas as pd
+import ijson
 import requests
 from unidecode import unidecode
 
@@ -21,6 +21,13 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from hooks.dou_hook import DOUHook
 from hooks.inlabs_hook import INLABSHook
+from hooks.rodou_db_hook import RoDouDBHook, SeenPublications
+from utils import instrumentation
+from utils.department_matcher import DepartmentMatcher
+from utils.http_session import create_session
+from utils.pipeline import ResultPipeline, Stage
+from utils.rate_controller import RateController
+from utils.term_list import TermList
 from utils.search_domains import (
     Field,
     SearchDate,
@@ -33,22 +40,49 @@ from utils.search_domains import (
 class BaseSearcher(ABC):
     SCRAPPING_INTERVAL = 1
     CLEAN_HTML_RE = re.compile("<.*?>")
+    # Prefix of the instrumentation spans and counters of the source
+    SOURCE = "search"
+
+    @cached_property
+    def rate_controller(self) -> RateController:
+        """Adaptive rate of requests to the source, shared by all terms."""
+        return RateController(
+            initial_rate=1 / self.SCRAPPING_INTERVAL, name=self.SOURCE
+        )
 
-    def _cast_term_list(self, pre_term_list: Dict[list, str]) -> list:
+    def _cast_term_list(self, pre_term_list: Union[list, str]) -> list:
         """If `pre_term_list` is a str (in the case it came from xcom)
-        then its necessary to convert it back to dataframe and return
-        the first column. Otherwise the `pre_term_list` is returned.
+        then its necessary to decode the `TermList` and return its
+        terms. Otherwise the `pre_term_list` is returned.
         """
         return (
             pre_term_list
             if isinstance(pre_term_list, list)
-            else pd.read_json(pre_term_list).iloc[:, 0].tolist()
+            else list(TermList.load(pre_term_list).terms)
         )
 
+    @staticmethod
+    def _drop_seen(
+        search_term: str,
+        results: list,
+        seen_publications: Optional[SeenPublications],
+    ) -> list:
+        """Removes from `results` the publications already reported
+        for the `search_term`, listed in `seen_publications`.
+        """
+        if not seen_publications:
+            return results
+        return [
+            result
+            for result in results
+            if (search_term, RoDouDBHook.publication_key(result))
+            not in seen_publications
+        ]
+
     def _group_results(
         self,
         search_results: dict,
-        term_list: Dict[list, str],
+        term_list: Union[list, str],
         department: list[str] = None,
     ) -> dict:
         """Produces a grouped result based on departments and group name.
@@ -56,12 +90,18 @@ class BaseSearcher(ABC):
         from `select_terms_from_db` task and the sql_query returned a
         second column (used as the group name)
         """
-        dpt_grouped_result = self._group_by_department(search_results, department)
-
-        if isinstance(term_list, str) and len(ast.literal_eval(term_list).values()) > 1:
-            grouped_result = self._group_by_term_group(dpt_grouped_result, term_list)
-        else:
-            grouped_result = {"single_group": dpt_grouped_result}
+        with instrumentation.span(f"{self.SOURCE}.group"):
+            dpt_grouped_result = self._group_by_department(search_results, department)
+
+            if (
+                isinstance(term_list, str)
+                and TermList.load(term_list).groups is not None
+            ):
+                grouped_result = self._group_by_term_group(
+                    dpt_grouped_result, term_list
+                )
+            else:
+                grouped_result = {"single_group": dpt_grouped_result}
 
         return grouped_result
 
@@ -70,9 +110,7 @@ class BaseSearcher(ABC):
         """Rebuild the dict grouping the results based on term_n_group
         mapping
         """
-        dict_struct = ast.literal_eval(term_n_group)
-        terms, groups = dict_struct.values()
-        term_group_map = dict(zip(terms.values(), groups.values()))
+        term_group_map = TermList.load(term_n_group).group_map()
 
         grouped_result = {}
         for k, v in search_results.items():
@@ -91,28 +129,23 @@ class BaseSearcher(ABC):
     @staticmethod
     def _group_by_department(search_results: dict, department: list) -> dict:
         dpt_grouped_result = {}
+        matcher = DepartmentMatcher(department) if department else None
         # Iterate over all terms under the group
         for term, results in search_results.items():
-            # Initialize the department group for this term
-            dpt_grouped_result[term] = {}
+            if matcher is None:
+                dpt_grouped_result[term] = (
+                    {"single_department": list(results)} if results else {}
+                )
+                continue
 
+            # Initialize the department group for this term
+            term_result = dpt_grouped_result[term] = {}
             for result in results:
-                # change all units in hierarchyList to lower case
-                # for unit in result['hierarchyList']:
-                if department:
-                    for dept in department:
-                        if dept.casefold() in str(result["hierarchyList"]).casefold():
-                            # Initialize the group if not present
-                            if dept not in dpt_grouped_result[term]:
-                                dpt_grouped_result[term][dept] = []
-                            dpt_grouped_result[term][dept].append(result)
-                else:
-                    dpt_grouped_result[term].setdefault("single_department", [])
-                    dpt_grouped_result[term]["single_department"].append(result)
-
-        search_results = dpt_grouped_result
+                # Case insensitive match over the whole hierarchyList
+                for dept in matcher.matching(result["hierarchyList"]):
+                    term_result.setdefault(dept, []).append(result)
 
-        return search_results
+        return dpt_grouped_result
 
     def _really_matched(self, search_term: str, abstract: str) -> bool:
         """Verifica se o termo encontrado pela API realmente é igual ao
@@ -142,8 +175,21 @@ class BaseSearcher(ABC):
 
 
 class DOUSearcher(BaseSearcher):
+    SOURCE = "dou"
     SPLIT_MATCH_RE = re.compile(r"(.*?)<.*?>(.*?)<.*?>")
-    dou_hook = DOUHook()
+    # Post-processing stages applied to each result, in this order.
+    # Stages not enabled by the search parameters are left out.
+    POSTPROCESSING_STAGES = (
+        "seen",
+        "signature",
+        "rematch",
+        "department",
+        "section",
+        "highlight",
+    )
+    # The rate controller retries the failed requests, honoring the
+    # `Retry-After` header, so the session of the hook does not retry
+    dou_hook = DOUHook(max_retries=0)
 
     def exec_search(
         self,
@@ -156,6 +202,9 @@ class DOUSearcher(BaseSearcher):
         force_rematch: bool,
         department: List[str],
         reference_date: datetime,
+        seen_publications: Optional[SeenPublications] = None,
+        published_since: Optional[datetime] = None,
+        local_index: bool = False,
     ):
         search_results = self._search_all_terms(
             self._cast_term_list(term_list),
@@ -167,6 +216,9 @@ class DOUSearcher(BaseSearcher):
             ignore_signature_match,
             force_rematch,
             department,
+            seen_publications,
+            published_since,
+            local_index,
         )
         group_results = self._group_results(search_results, term_list, department)
 
@@ -183,53 +235,105 @@ class DOUSearcher(BaseSearcher):
         ignore_signature_match,
         force_rematch,
         department,
+        seen_publications=None,
+        published_since=None,
+        local_index=False,
     ) -> dict:
         search_results = {}
+        pipeline = self._build_pipeline(
+            ignore_signature_match, force_rematch, department, seen_publications
+        )
+        index = RoDouDBHook() if local_index else None
         for search_term in term_list:
             logging.info("Starting search for term: %s", search_term)
-            results = self._search_text_with_retry(
+            search_kwargs = dict(
                 search_term=search_term,
                 sections=[Section[s] for s in dou_sections],
                 reference_date=trigger_date,
                 search_date=SearchDate[search_date],
                 field=Field[field],
                 is_exact_search=is_exact_search,
+                publish_from=published_since,
             )
-            if ignore_signature_match:
-                results = [
-                    r
-                    for r in results
-                    if not self._is_signature(search_term, r.get("abstract"))
-                ]
-            if force_rematch:
-                results = [
-                    r
-                    for r in results
-                    if self._really_matched(search_term, r.get("abstract"))
-                ]
-
-            if department:
-                self._match_department(results, department)
-                # results = [r for r in results if any(item in r.get('hierarchyList') for item in department)]
-
-            self._render_section_descriptions(results)
-
-            self._add_standard_highlight_formatting(results)
-
+            if index:
+                results = self._search_indexed(index, **search_kwargs)
+            else:
+                results = self._search_text_with_retry(**search_kwargs)
+            results = list(pipeline(search_term, results))
+            instrumentation.incr("dou.matches", len(results))
             if results:
                 search_results[search_term] = results
 
-            time.sleep(self.SCRAPPING_INTERVAL * random() * 2)
+        logging.info("DOU requests: %s", self.rate_controller.metrics())
+        logging.info("DOU post-processing: %s", pipeline.metrics())
+        for name, stats in pipeline.stats.items():
+            if stats.processed:
+                instrumentation.add_span(
+                    f"dou.stage.{name}", stats.seconds, stats.processed
+                )
+                instrumentation.incr(f"dou.stage.{name}.dropped", stats.dropped)
 
         return search_results
 
-    def _add_standard_highlight_formatting(self, results: list) -> None:
-        for result in results:
-            result["abstract"] = (
-                result["abstract"]
-                .replace("<span class='highlight' style='background:#FFA;'>", "<%%>")
-                .replace("</span>", "</%%>")
-            )
+    def _build_pipeline(
+        self,
+        ignore_signature_match: bool,
+        force_rematch: bool,
+        department: List[str],
+        seen_publications: Optional[SeenPublications] = None,
+    ) -> ResultPipeline:
+        """Builds the pipeline of the `POSTPROCESSING_STAGES` enabled by
+        the search parameters. The publications already reported are
+        dropped first, skipping the other stages.
+        """
+        stages = {
+            "section": lambda term, r: self._render_section_description(r),
+            "highlight": lambda term, r: self._format_highlight(r),
+        }
+        if seen_publications:
+
+            def drop_seen(term: str, result: dict) -> Optional[dict]:
+                key = (term, RoDouDBHook.publication_key(result))
+                return None if key in seen_publications else result
+
+            stages["seen"] = drop_seen
+        if ignore_signature_match:
+
+            def drop_signature(term: str, result: dict) -> Optional[dict]:
+                is_signature = self._is_signature(term, result.get("abstract"))
+                return None if is_signature else result
+
+            stages["signature"] = drop_signature
+        if force_rematch:
+
+            def rematch(term: str, result: dict) -> Optional[dict]:
+                matched = self._really_matched(term, result.get("abstract"))
+                return result if matched else None
+
+            stages["rematch"] = rematch
+        if department:
+            department_matcher = DepartmentMatcher(department)
+
+            def match_department(term: str, result: dict) -> Optional[dict]:
+                matched = department_matcher.contains(result["hierarchyList"])
+                return result if matched else None
+
+            stages["department"] = match_department
+
+        return ResultPipeline(
+            Stage(name, stages[name])
+            for name in self.POSTPROCESSING_STAGES
+            if name in stages
+        )
+
+    @staticmethod
+    def _format_highlight(result: dict) -> dict:
+        result["abstract"] = (
+            result["abstract"]
+            .replace("<span class='highlight' style='background:#FFA;'>", "<%%>")
+            .replace("</span>", "</%%>")
+        )
+        return result
 
     def _search_text_with_retry(
         self,
@@ -240,30 +344,103 @@ class DOUSearcher(BaseSearcher):
         field,
         is_exact_search,
         max_retries=5,
+        publish_from=None,
     ) -> list:
+        return self.rate_controller.call(
+            self.dou_hook.search_text,
+            search_term=search_term,
+            sections=sections,
+            reference_date=reference_date,
+            search_date=search_date,
+            field=field,
+            is_exact_search=is_exact_search,
+            max_retries=max_retries,
+            publish_from=publish_from,
+        )
 
-        retry = 1
+    def _search_indexed(
+        self,
+        index: RoDouDBHook,
+        search_term,
+        sections,
+        reference_date,
+        search_date,
+        field,
+        is_exact_search,
+        publish_from=None,
+    ) -> list:
+        """Searches the term on the portal only for the days of the
+        window missing from the local `index` of the DOU publications
+        and adds back the indexed results of the other days. Each run of
+        consecutive missing days is fetched by a single request, newest
+        first. The days before today are indexed once searched, as no
+        more publications are expected for them.
+        """
+        publish_from = publish_from or calculate_from_datetime(
+            reference_date, search_date
+        )
+        since, until = publish_from.date(), reference_date.date()
+        query_key = self._query_key(search_term, sections, field, is_exact_search)
+        indexed_days = index.get_indexed_days(query_key, since, until)
+        missing_days = [day for day in _days(since, until) if day not in indexed_days]
+        instrumentation.incr("dou.indexed_days", len(indexed_days))
+
+        today = datetime.now(reference_date.tzinfo).date()
+        fetched = []
+        for fetched_from, fetched_to in reversed(_day_ranges(missing_days)):
+            results = self._search_text_with_retry(
+                search_term=search_term,
+                sections=sections,
+                reference_date=datetime.combine(fetched_to, reference_date.timetz()),
+                search_date=search_date,
+                field=field,
+                is_exact_search=is_exact_search,
+                publish_from=datetime.combine(fetched_from, reference_date.timetz()),
+            )
+            index.index_results(
+                query_key,
+                [day for day in _days(fetched_from, fetched_to) if day < today],
+                results,
+            )
+            fetched.append((fetched_to, results))
+
+        # The indexed results come most recent days first, as the
+        # portal returns them, and are placed around the fetched ones
+        missing = set(missing_days)
+        indexed = [
+            result
+            for result in index.get_indexed_results(query_key, since, until)
+            if _result_day(result) not in missing
+        ]
+        instrumentation.incr("dou.indexed_results", len(indexed))
+        merged, position = [], 0
+        for fetched_to, results in fetched:
+            while (
+                position < len(indexed)
+                and _result_day(indexed[position]) > fetched_to
+            ):
+                merged.append(indexed[position])
+                position += 1
+            merged.extend(results)
+        merged.extend(indexed[position:])
+        return merged
 
-        while True:
-            try:
-                return self.dou_hook.search_text(
-                    search_term=search_term,
-                    sections=sections,
-                    reference_date=reference_date,
-                    search_date=search_date,
-                    field=field,
-                    is_exact_search=is_exact_search,
-                )
-            except:
-                if retry > max_retries:
-                    logging.error("Error - Max retries reached")
-                    raise Exception
-                logging.info("Attemp %s of %s: ", retry, max_retries)
-                logging.info(
-                    "Sleeping for 30 seconds before retry " "dou_hook.search_text()."
-                )
-                time.sleep(30)
-                retry += 1
+    @staticmethod
+    def _query_key(
+        search_term: str, sections: List[Section], field: Field, is_exact_search
+    ) -> str:
+        """Identifies, in the local index, the DOU results of a term
+        searched with the same parameters."""
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "term": search_term,
+                    "sections": sorted(section.name for section in sections),
+                    "field": field.name,
+                    "is_exact_search": bool(is_exact_search),
+                }
+            ).encode()
+        ).hexdigest()
 
     def _is_signature(self, search_term: str, abstract: str) -> bool:
         """Verifica se o `search_term` (geralmente usado para busca por
@@ -299,29 +476,32 @@ class DOUSearcher(BaseSearcher):
             )
         )
 
-    def _match_department(self, results: list, department: list) -> list:
-        """Aplica o filtro nos resultados pela lista de unidades informada
-        no parâmetro 'department' do YAML
-        """
-        logging.info("Applying filter for department list")
-        logging.info(department)
-        logging.info(results)
-        for result in results[:]:
-            if not any(dpt in result["hierarchyList"] for dpt in department):
-                results.remove(result)
-
     def _get_prior_and_matched_name(self, raw_html: str) -> Tuple[str, str]:
         groups = self.SPLIT_MATCH_RE.match(raw_html).groups()
         return groups[0], groups[1]
 
-    def _render_section_descriptions(self, results: list) -> list:
-        for result in results:
-            result["section"] = f"DOU - {DOUHook.SEC_DESCRIPTION[result['section']]}"
+    @staticmethod
+    def _render_section_description(result: dict) -> dict:
+        result["section"] = f"DOU - {DOUHook.SEC_DESCRIPTION[result['section']]}"
+        return result
 
 
 class QDSearcher(BaseSearcher):
 
+    SOURCE = "qd"
     API_BASE_URL = "https://queridodiario.ok.org.br/api/gazettes"
+    REQUEST_TIMEOUT = 30
+    POOL_SIZE = 10
+    TERRITORIES_PER_REQUEST = 50
+    DATE_CHUNK_DAYS = 7
+    MAX_WORKERS = 4
+
+    @cached_property
+    def session(self) -> requests.Session:
+        """Pooled session reused by every request of this searcher. The
+        failed requests are retried by the rate controller, not by the
+        session."""
+        return create_session(pool_size=self.POOL_SIZE, max_retries=0)
 
     def exec_search(
         self,
@@ -335,10 +515,19 @@ class QDSearcher(BaseSearcher):
         force_rematch: bool,
         reference_date: datetime,
         result_as_email: bool = True,
+        seen_publications: Optional[SeenPublications] = None,
+        published_since: Optional[datetime] = None,
     ):
         force_rematch = True if force_rematch is None else force_rematch
         term_list = self._cast_term_list(term_list)
+        # QD gazettes are searched one day behind the reference date
         tailored_date = reference_date - timedelta(days=1)
+        if published_since:
+            published_since = min(published_since - timedelta(days=1), tailored_date)
+        else:
+            published_since = calculate_from_datetime(
+                tailored_date, SearchDate[search_date]
+            )
         search_results = {}
         for search_term in term_list:
             results = self._search_term(
@@ -347,10 +536,14 @@ class QDSearcher(BaseSearcher):
                 reference_date=tailored_date,
                 force_rematch=force_rematch,
                 result_as_email=result_as_email,
+                published_since=published_since,
             )
+            results = self._drop_seen(search_term, results, seen_publications)
+            instrumentation.incr("qd.matches", len(results))
             if results:
                 search_results[search_term] = results
-            time.sleep(self.SCRAPPING_INTERVAL * random() * 2)
+
+        logging.info("QD requests: %s", self.rate_controller.metrics())
 
         return self._group_results(search_results, term_list)
 
@@ -361,31 +554,143 @@ class QDSearcher(BaseSearcher):
         reference_date,
         force_rematch: bool,
         result_as_email: bool = True,
+        published_since: datetime = None,
     ) -> list:
-        payload = _build_query_payload(search_term, reference_date)
+        """Searches the term in the gazettes published from
+        `published_since` (defaults to `reference_date`) until
+        `reference_date`. Long date windows and territory lists are
+        split in chunks searched concurrently and the gazettes found in
+        more than one chunk are reported only once.
+
+        The requests of all chunks share the pace of the rate controller,
+        which retries only the page of the chunk that failed. When a
+        chunk fails even so, the chunks not started yet are cancelled.
+        """
+        date_chunks = self._split_date_range(
+            published_since or reference_date, reference_date
+        )
+        chunks = [
+            (date_chunk, territory_ids)
+            for date_chunk in date_chunks
+            for territory_ids in self._batch_territories(territory_id)
+        ]
+
+        def search_chunk(chunk: tuple) -> list:
+            (since, until), territory_ids = chunk
+            payload = _build_query_payload(
+                search_term, until, published_since=since
+            )
+            return [
+                self.parse_result(result, result_as_email)
+                for result in self._iter_gazettes(payload, territory_ids)
+            ]
+
+        if len(chunks) == 1:
+            chunks_results = [search_chunk(chunks[0])]
+        else:
+            executor = ThreadPoolExecutor(
+                max_workers=min(self.MAX_WORKERS, len(chunks))
+            )
+            try:
+                chunks_results = list(executor.map(search_chunk, chunks))
+            finally:
+                executor.shutdown(cancel_futures=True)
+
+        parsed_results = []
+        seen_urls = set()
+        for chunk_results in chunks_results:
+            for result in chunk_results:
+                if result["href"] not in seen_urls:
+                    seen_urls.add(result["href"])
+                    parsed_results.append(result)
+
+        return parsed_results
 
-        if territory_id:
-            payload.append(("territory_ids", territory_id))
+    def _split_date_range(
+        self, published_since: datetime, published_until: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """Splits the date range in chunks of up to `DATE_CHUNK_DAYS`
+        days, from the most recent to the oldest, to keep the results
+        sorted by descending date.
+        """
+        chunks = []
+        chunk_until = published_until
+        while chunk_until.date() >= published_since.date():
+            chunk_since = max(
+                chunk_until - timedelta(days=self.DATE_CHUNK_DAYS - 1),
+                published_since,
+            )
+            chunks.append((chunk_since, chunk_until))
+            chunk_until = chunk_since - timedelta(days=1)
 
-        req_result = requests.get(self.API_BASE_URL, params=payload)
+        return chunks
 
-        parsed_results = [
-            self.parse_result(result, result_as_email)
-            for result in json.loads(req_result.content)["gazettes"]
+    def _batch_territories(
+        self, territory_id: Union[int, List[int], None]
+    ) -> List[List[int]]:
+        """Splits the territories in batches of up to
+        `TERRITORIES_PER_REQUEST` ids, each batch searched in one request.
+        A search without territory is a single batch with no ids.
+        """
+        if not territory_id:
+            return [[]]
+        if not isinstance(territory_id, list):
+            return [[territory_id]]
+        return [
+            territory_id[i : i + self.TERRITORIES_PER_REQUEST]
+            for i in range(0, len(territory_id), self.TERRITORIES_PER_REQUEST)
         ]
 
-        return parsed_results
+    def _iter_gazettes(
+        self, payload: List[tuple], territory_ids: List[int]
+    ) -> Iterator[dict]:
+        """Yields the gazettes found in every page of results, requesting
+        the next page (by `offset`) only after the current one is
+        consumed, until a page comes with less than `size` gazettes.
+        Each page is requested at the pace of the rate controller, which
+        retries only the page that failed.
+        """
+        page_size = dict(payload)["size"]
+        payload = payload + [("territory_ids", t) for t in territory_ids]
+        offset = 0
+        while True:
+            gazettes = self.rate_controller.call(
+                self._request_page, payload + [("offset", offset)]
+            )
+            yield from gazettes
+            offset += len(gazettes)
+            if len(gazettes) < page_size:
+                break
+
+    def _request_page(self, params: List[tuple]) -> List[dict]:
+        """Requests a page of gazettes, decoding them one at a time
+        while the response body is received."""
+        with instrumentation.span("qd.request"):
+            req_result = self.session.get(
+                self.API_BASE_URL,
+                params=params,
+                timeout=self.REQUEST_TIMEOUT,
+                stream=True,
+            )
+            with req_result:
+                req_result.raise_for_status()
+                req_result.raw.decode_content = True
+                gazettes = list(ijson.items(req_result.raw, "gazettes.item"))
+                instrumentation.incr("qd.bytes", req_result.raw.tell())
+        instrumentation.incr("qd.requests")
+        instrumentation.incr("qd.gazettes", len(gazettes))
+        return gazettes
 
     def parse_result(self, result: dict, result_as_email: bool = True) -> dict:
         section = (
             "extraordinária" if result.get("is_extra_edition", False) else "ordinária"
         )
+        separator = "</p><p>" if result_as_email else ""
+        abstract = separator.join(result["excerpts"]).replace("\n", "")
         if result_as_email:
-            abstract = (
-                "<p>" + "</p><p>".join(result["excerpts"]).replace("\n", "") + "</p>"
-            )
-        else:
-            abstract = "\n".join(result["excerpts"]).replace("\n", "")
+            abstract = f"<p>{abstract}</p>"
+        # `date` comes in ISO format (YYYY-MM-DD)
+        date = result["date"]
         return {
             "section": f"QD - Edição {section} ",
             "title": (
@@ -393,11 +698,14 @@ class QDSearcher(BaseSearcher):
             ),
             "href": result["url"],
             "abstract": abstract,
-            "date": datetime.strptime(result["date"], "%Y-%m-%d").strftime("%d/%m/%Y"),
+            "date": f"{date[8:10]}/{date[5:7]}/{date[0:4]}",
         }
 
 
-def _build_query_payload(search_term: str, reference_date: datetime) -> List[tuple]:
+def _build_query_payload(
+    search_term: str, reference_date: datetime, published_since: datetime = None
+) -> List[tuple]:
+    published_since = published_since or reference_date
     return [
         ("size", 100),
         ("excerpt_size", 250),
@@ -405,7 +713,7 @@ def _build_query_payload(search_term: str, reference_date: datetime) -> List[tup
         ("pre_tags", "<%%>"),
         ("post_tags", "</%%>"),
         ("number_of_excerpts", 3),
-        ("published_since", reference_date.strftime("%Y-%m-%d")),
+        ("published_since", published_since.strftime("%Y-%m-%d")),
         ("published_until", reference_date.strftime("%Y-%m-%d")),
         ("querystring", f'"{search_term}"'),
     ]
@@ -418,6 +726,8 @@ class INLABSSearcher(BaseSearcher):
     and `departments`.
     """
 
+    SOURCE = "inlabs"
+
     def exec_search(
         self,
         terms: Union[List[str], str],
@@ -428,6 +738,8 @@ class INLABSSearcher(BaseSearcher):
         full_text: bool,
         use_summary: bool,
         reference_date: datetime = datetime.now(),
+        seen_publications: Optional[SeenPublications] = None,
+        published_since: Optional[datetime] = None,
     ) -> Dict:
         """
         Execute a search with given parameters, applying filters and
@@ -447,6 +759,10 @@ class INLABSSearcher(BaseSearcher):
             use_summary (bool): If exists, use summary as excerpt or full text
             reference_date (datetime, optional): Reference date for the
                 search. Defaults to now.
+            seen_publications (SeenPublications, optional): Publications
+                already reported, removed from the results.
+            published_since (datetime, optional): Start date of the
+                search, overriding the one calculated by `search_date`.
 
         Returns:
             Dict: Grouped search results.
@@ -455,12 +771,26 @@ class INLABSSearcher(BaseSearcher):
         inlabs_hook = INLABSHook()
         search_terms = self._prepare_search_terms(terms)
         search_terms = self._apply_filters(
-            search_terms, dou_sections, department, reference_date, search_date
+            search_terms,
+            dou_sections,
+            department,
+            reference_date,
+            search_date,
+            published_since,
         )
 
         search_results = inlabs_hook.search_text(
             search_terms, ignore_signature_match, full_text, use_summary
         )
+        if seen_publications:
+            search_results = {
+                term: self._drop_seen(term, results, seen_publications)
+                for term, results in search_results.items()
+            }
+            search_results = {k: v for k, v in search_results.items() if v}
+        instrumentation.incr(
+            "inlabs.matches", sum(len(results) for results in search_results.values())
+        )
 
         group_results = self._group_results(search_results, terms, department)
 
@@ -480,7 +810,7 @@ class INLABSSearcher(BaseSearcher):
 
         if isinstance(terms, List):
             return {"texto": terms}
-        return {"texto": self._split_sql_terms(json.loads(terms))}
+        return {"texto": list(TermList.load(terms).terms)}
 
     def _apply_filters(
         self,
@@ -489,6 +819,7 @@ class INLABSSearcher(BaseSearcher):
         department: List[str],
         reference_date: datetime,
         search_date: str,
+        published_since: Optional[datetime] = None,
     ):
         """Apply `sections`, `departments` and `date` filters to the
         search_terms dictionary."""
@@ -499,22 +830,15 @@ class INLABSSearcher(BaseSearcher):
             search_terms["pubname"] = self._parse_sections(sections)
         if department:
             search_terms["artcategory"] = department
-        publish_from = calculate_from_datetime(
-            reference_date, SearchDate[search_date]
+        publish_from = (
+            published_since
+            or calculate_from_datetime(reference_date, SearchDate[search_date])
         ).strftime("%Y-%m-%d")
         publish_to = reference_date.strftime("%Y-%m-%d")
         search_terms["pubdate"] = [publish_from, publish_to]
 
         return search_terms
 
-    @staticmethod
-    def _split_sql_terms(terms: Dict) -> List:
-        """Split SQL terms into a list, removing duplicates.
-        Get only the values from the first key of the Dict."""
-
-        first_key = next(iter(terms))
-        return list(set(terms[first_key].values()))
-
     @staticmethod
     def _parse_sections(sections: List) -> List:
         """Parse DOU section codes into a list of section names based on
@@ -526,3 +850,26 @@ class INLABSSearcher(BaseSearcher):
         """
 
         return list({SectionINLABS[section].value for section in sections})
+
+
+def _days(since: date, until: date) -> Iterator[date]:
+    """Days from `since` to `until`, inclusive."""
+    for n in range((until - since).days + 1):
+        yield since + timedelta(days=n)
+
+
+def _day_ranges(days: List[date]) -> List[Tuple[date, date]]:
+    """Groups the sorted `days` into (first, last) ranges of
+    consecutive days."""
+    ranges = []
+    for day in days:
+        if ranges and day - ranges[-1][1] == timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def _result_day(result: dict) -> date:
+    """Publication day of a DOU result."""
+    return datetime.strptime(result["date"], "%d/%m/%Y").date()
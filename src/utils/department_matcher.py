@@ -0,0 +1,60 @@
+"""Matching of search results against the configured departments.
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple, Union
+
+Hierarchy = Union[List[str], str]
+
+
+class DepartmentMatcher:
+    """Matches the `hierarchyList` of the search results against a list
+    of departments, built once per search.
+
+    `matching` returns the departments contained, case insensitive, in
+    the hierarchy text, as done to group the results by department. A
+    single regex with all the casefolded departments rejects, in one
+    pass, the hierarchies without any of them, and the departments
+    found for each hierarchy are cached, as many results share the same
+    hierarchy.
+
+    `contains` checks if any department is one of the hierarchy units,
+    case sensitive, as done to filter the DOU results, using a set of
+    the departments.
+    """
+
+    def __init__(self, departments: Iterable[str]):
+        self.departments = list(departments or [])
+        self._folded = [(dept, dept.casefold()) for dept in self.departments]
+        self._units = set(self.departments)
+        self._pattern = re.compile(
+            "|".join(
+                re.escape(folded)
+                for folded in sorted(
+                    {folded for _, folded in self._folded}, key=len, reverse=True
+                )
+            )
+        )
+        self._cache: Dict[str, Tuple[str, ...]] = {}
+
+    def matching(self, hierarchy: Hierarchy) -> Tuple[str, ...]:
+        """Returns the departments contained in the `hierarchy`, in the
+        configured order."""
+        text = str(hierarchy).casefold()
+        try:
+            return self._cache[text]
+        except KeyError:
+            pass
+        if not self.departments or self._pattern.search(text) is None:
+            matched = ()
+        else:
+            matched = tuple(dept for dept, folded in self._folded if folded in text)
+        self._cache[text] = matched
+        return matched
+
+    def contains(self, hierarchy: Hierarchy) -> bool:
+        """Checks if any department is a unit of the `hierarchy` list,
+        or a substring of it when the hierarchy is a text."""
+        if isinstance(hierarchy, str):
+            return any(dept in hierarchy for dept in self.departments)
+        return not self._units.isdisjoint(hierarchy)
@@ -0,0 +1,67 @@
+"""Common use functions for making HTTP requests.
+"""
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+RETRY_STATUS_FORCELIST = (429, 500, 502, 503, 504)
+
+
+def create_session(
+    pool_size: int = 10,
+    max_retries: int = 3,
+    backoff_factor: float = 2,
+) -> requests.Session:
+    """Creates a `requests.Session` that keeps up to `pool_size`
+    connections alive per host, so consecutive requests reuse the
+    TCP+TLS connection instead of paying a new handshake each time.
+
+    Connection errors and `RETRY_STATUS_FORCELIST` responses are
+    retried by the transport adapter up to `max_retries` times with
+    exponential backoff (`backoff_factor` * 2 ** (retry - 1) seconds),
+    honoring the `Retry-After` header. With `max_retries=0` each
+    request is tried only once.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_FORCELIST,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+    )
+
+    return session
+
+
+def get_retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    """Parses the `Retry-After` header of the `response`, in seconds or
+    HTTP date, into the seconds to wait, if any."""
+    if response is None or not response.headers.get("Retry-After"):
+        return None
+    value = response.headers["Retry-After"]
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
@@ -0,0 +1,164 @@
+"""Instrumentation of the searches and notifications with spans (time
+spent in each step) and counters (requests, pages, bytes, rows...).
+
+Turned on by the `RO_DOU__INSTRUMENTATION` environment variable. When it
+is off, `span` and `incr` only check that no collector is installed.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional
+
+ENV_VAR = "RO_DOU__INSTRUMENTATION"
+METRIC_PREFIX = "ro_dou"
+XCOM_KEY = "instrumentation"
+
+_NULL_SPAN = nullcontext()
+_collector: Optional["Collector"] = None
+
+
+def enabled() -> bool:
+    return os.getenv(ENV_VAR, "false").lower() in ("true", "1", "yes")
+
+
+class SpanStats:
+    """Times accumulated by the spans of a name."""
+
+    __slots__ = ("count", "seconds", "max_seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+
+class Collector:
+    """Accumulates the spans and counters of a task. Thread safe, as the
+    sources and channels are searched and sent by worker threads."""
+
+    def __init__(self):
+        self.spans: Dict[str, SpanStats] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, time.perf_counter() - start)
+
+    def add_span(self, name: str, seconds: float, count: int = 1) -> None:
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.count += count
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds / max(count, 1))
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> dict:
+        """Returns the spans and counters, sorted by name."""
+        with self._lock:
+            return {
+                "spans": {
+                    name: {
+                        "count": stats.count,
+                        "seconds": round(stats.seconds, 3),
+                        "max_seconds": round(stats.max_seconds, 3),
+                    }
+                    for name, stats in sorted(self.spans.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def emit(self, tags: Optional[dict] = None) -> None:
+        """Sends the spans as timers and the counters as counters through
+        the Airflow metrics (StatsD or OpenTelemetry, as configured at
+        the `[metrics]` section). Nothing is sent when they are off."""
+        # pylint: disable=import-outside-toplevel
+        from airflow.stats import Stats
+
+        summary = self.summary()
+        for name, stats in summary["spans"].items():
+            Stats.timing(f"{METRIC_PREFIX}.{name}", stats["seconds"] * 1000, tags=tags)
+            Stats.incr(f"{METRIC_PREFIX}.{name}.count", stats["count"], tags=tags)
+        for name, value in summary["counters"].items():
+            Stats.incr(f"{METRIC_PREFIX}.{name}", value, tags=tags)
+
+
+def span(name: str):
+    """Context manager that times a step as the span `name`."""
+    collector = _collector
+    return _NULL_SPAN if collector is None else collector.span(name)
+
+
+def add_span(name: str, seconds: float, count: int = 1) -> None:
+    """Adds `count` spans `name` that took `seconds` in total, timed
+    elsewhere (e.g. sleeps and pipeline stages)."""
+    collector = _collector
+    if collector is not None:
+        collector.add_span(name, seconds, count)
+
+
+def incr(name: str, value: int = 1) -> None:
+    """Adds `value` to the counter `name`."""
+    collector = _collector
+    if collector is not None:
+        collector.incr(name, value)
+
+
+@contextmanager
+def collect() -> Iterator[Optional[Collector]]:
+    """Installs a new collector, when the instrumentation is on, for
+    the spans and counters recorded until the exit."""
+    global _collector  # pylint: disable=global-statement
+    if not enabled():
+        yield None
+        return
+    previous, _collector = _collector, Collector()
+    try:
+        yield _collector
+    finally:
+        _collector = previous
+
+
+def instrumented(func: Callable) -> Callable:
+    """Decorates a task callable to collect its spans and counters. At
+    the end of the task the summary is logged, pushed as the XCom
+    `XCOM_KEY` and sent to the Airflow metrics, tagged with the DAG and
+    task ids."""
+
+    @wraps(func)
+    def wrapper(*args, **context):
+        if not enabled():
+            return func(*args, **context)
+        with collect() as collector:
+            try:
+                return func(*args, **context)
+            finally:
+                publish(collector, context.get("ti"))
+
+    return wrapper
+
+
+def publish(collector: Collector, ti=None) -> None:
+    summary = collector.summary()
+    logging.info("Instrumentation: %s", summary)
+    tags = None
+    if ti is not None:
+        ti.xcom_push(key=XCOM_KEY, value=summary)
+        tags = {"dag_id": ti.dag_id, "task_id": ti.task_id}
+    try:
+        collector.emit(tags)
+    except Exception as e:  # pylint: disable=broad-except
+        logging.warning("Instrumentation metrics not sent: %s", e)
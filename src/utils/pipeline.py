@@ -0,0 +1,63 @@
+"""Lazy pipeline of filter and transform stages applied to search results.
+"""
+
+import time
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+
+class Stage(NamedTuple):
+    """A step of the pipeline. `func` is called with the search term and
+    a result and returns the result, possibly transformed, or None to
+    drop it."""
+
+    name: str
+    func: Callable[[str, dict], Optional[dict]]
+
+
+class StageStats:
+    """Counters of a stage accumulated by the pipeline."""
+
+    def __init__(self):
+        self.processed = 0
+        self.dropped = 0
+        self.seconds = 0.0
+
+
+class ResultPipeline:
+    """Applies the `stages`, in order, to one result at a time: a result
+    dropped by a stage is not seen by the next ones. The results are
+    processed lazily, as the output of the pipeline is consumed.
+
+    The number of results processed and dropped and the time spent by
+    each stage are accumulated over all calls and available at
+    `metrics`.
+    """
+
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages: List[Stage] = list(stages)
+        self.stats = {stage.name: StageStats() for stage in self.stages}
+
+    def __call__(self, search_term: str, results: Iterable[dict]) -> Iterator[dict]:
+        steps = [(stage.func, self.stats[stage.name]) for stage in self.stages]
+        for result in results:
+            for func, stats in steps:
+                start = time.perf_counter()
+                result = func(search_term, result)
+                stats.seconds += time.perf_counter() - start
+                stats.processed += 1
+                if result is None:
+                    stats.dropped += 1
+                    break
+            else:
+                yield result
+
+    def metrics(self) -> dict:
+        """Returns the counters of each stage, in the pipeline order."""
+        return {
+            name: {
+                "processed": stats.processed,
+                "dropped": stats.dropped,
+                "seconds": round(stats.seconds, 3),
+            }
+            for name, stats in self.stats.items()
+        }
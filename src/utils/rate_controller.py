@@ -0,0 +1,152 @@
+"""Adaptive control of the request rate sent to the search sources.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+
+from utils import instrumentation
+from utils.http_session import get_retry_after
+
+
+class RateController:
+    """Controls the rate of requests sent to a source using AIMD
+    (additive increase, multiplicative decrease): each successful
+    request adds `increase_step` requests per second to the rate, up
+    to `max_rate`, and each failure multiplies it by `decrease_factor`,
+    down to `min_rate`.
+
+    Before each request `wait` sleeps only what is left of the current
+    interval (1 / rate, with jitter) since the previous request started,
+    so slow requests are not followed by extra sleeps. Failed calls are
+    retried after a jittered exponential backoff, or after the time
+    asked by the `Retry-After` header of the response.
+
+    The time spent waiting and working is accumulated and available at
+    `metrics`. The retries and sleeps are also recorded by the
+    instrumentation, prefixed by `name`.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = 1,
+        min_rate: float = 1 / 60,
+        max_rate: float = 5,
+        increase_step: float = 0.1,
+        decrease_factor: float = 0.5,
+        backoff_base: float = 2,
+        max_backoff: float = 300,
+        jitter: float = 0.5,
+        name: str = "rate_controller",
+    ):
+        self.name = name
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+
+        self.requests = 0
+        self.retries = 0
+        self.waiting_time = 0.0
+        self.working_time = 0.0
+        self._last_request = None
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Sleeps until the next request is allowed by the current rate."""
+        with self._lock:
+            now = time.monotonic()
+            interval = random.uniform(1 - self.jitter, 1 + self.jitter) / self.rate
+            if self._last_request is None:
+                delay = 0.0
+            else:
+                delay = max(self._last_request + interval - now, 0.0)
+            self._last_request = now + delay
+        self._sleep(delay)
+
+    def success(self) -> None:
+        """Additive increase of the rate after a successful request."""
+        with self._lock:
+            self.rate = min(self.rate + self.increase_step, self.max_rate)
+
+    def throttled(self) -> None:
+        """Multiplicative decrease of the rate after a failed request."""
+        with self._lock:
+            self.rate = max(self.rate * self.decrease_factor, self.min_rate)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> None:
+        """Sleeps before the retry number `attempt`. Honors the
+        `retry_after` seconds asked by the server, when available,
+        otherwise uses exponential backoff with jitter.
+        """
+        if retry_after is None:
+            delay = min(self.backoff_base * 2 ** (attempt - 1), self.max_backoff)
+            delay = random.uniform(delay * (1 - self.jitter), delay)
+        else:
+            delay = min(retry_after, self.max_backoff)
+        logging.info("Sleeping for %.2f seconds before retry.", delay)
+        self._sleep(delay)
+
+    def call(self, func: Callable, *args, max_retries: int = 5, **kwargs):
+        """Calls `func` respecting the current rate, adapting it to the
+        result and retrying on exceptions up to `max_retries` times.
+        """
+        attempt = 0
+        while True:
+            self.wait()
+            start = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self._add_work(start)
+                self.throttled()
+                attempt += 1
+                if attempt > max_retries:
+                    logging.error("Error - Max retries reached")
+                    raise
+                logging.info("Attempt %s of %s failed: %s", attempt, max_retries, e)
+                self.retries += 1
+                instrumentation.incr(f"{self.name}.retries")
+                self.backoff(attempt, retry_after=_get_retry_after(e))
+            else:
+                self._add_work(start)
+                self.success()
+                return result
+
+    def metrics(self) -> dict:
+        """Returns the counters of requests and time spent."""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "waiting_seconds": round(self.waiting_time, 3),
+            "working_seconds": round(self.working_time, 3),
+            "rate": round(self.rate, 3),
+        }
+
+    def _add_work(self, start: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.working_time += time.monotonic() - start
+
+    def _sleep(self, delay: float) -> None:
+        if delay > 0:
+            time.sleep(delay)
+            with self._lock:
+                self.waiting_time += delay
+            instrumentation.add_span(f"{self.name}.sleep", delay)
+
+
+def _get_retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait asked by the `Retry-After` header of the
+    response that caused `error`, if any."""
+    if not isinstance(error, requests.exceptions.RequestException):
+        return None
+    return get_retry_after(error.response)
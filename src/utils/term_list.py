@@ -0,0 +1,77 @@
+"""Compact representation of the terms fetched from a database.
+"""
+
+import json
+from functools import lru_cache
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+
+class TermList(NamedTuple):
+    """Deduplicated and stripped search terms and, when the query
+    returned a second column, the group of each term.
+
+    The list is shared between tasks (through XCom) as a compact JSON
+    object `{"terms": [...], "groups": [...]}`, decoded once per task by
+    `load`.
+    """
+
+    terms: Tuple[str, ...]
+    groups: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[tuple]) -> "TermList":
+        """Builds the list from the rows of a query whose first column is
+        the term and the second, optional, is its group. Values are
+        stripped and nulls become empty strings. Repeated terms are kept
+        once, with the group of the first occurrence.
+        """
+        terms = {}
+        has_groups = False
+        for record in records:
+            values = [
+                "" if value is None else str(value).strip() for value in record[:2]
+            ]
+            has_groups = has_groups or len(values) > 1
+            terms.setdefault(values[0], values[1] if len(values) > 1 else "")
+
+        return cls(tuple(terms), tuple(terms.values()) if has_groups else None)
+
+    @staticmethod
+    def load(term_list: Union[list, str]) -> "TermList":
+        """Returns the `TermList` of a list of terms or of a JSON string
+        produced by `to_json`. The JSON of the pandas `to_json` "columns"
+        orient, used by previous versions, is also accepted."""
+        if isinstance(term_list, (list, tuple)):
+            return TermList(tuple(term_list))
+        return _load_json(term_list)
+
+    def to_json(self) -> str:
+        data = {"terms": self.terms}
+        if self.groups is not None:
+            data["groups"] = self.groups
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    def group_map(self) -> Dict[str, str]:
+        """Maps each term to its group."""
+        return dict(zip(self.terms, self.groups or ()))
+
+    def slice(self, start: int, stop: int) -> "TermList":
+        return TermList(
+            self.terms[start:stop],
+            None if self.groups is None else self.groups[start:stop],
+        )
+
+
+@lru_cache(maxsize=8)
+def _load_json(term_list: str) -> TermList:
+    data = json.loads(term_list)
+    if isinstance(data.get("terms"), list):
+        groups = data.get("groups")
+        return TermList(tuple(data["terms"]), None if groups is None else tuple(groups))
+
+    # {"column": {"row index": value}} of the pandas "columns" orient
+    columns = [list(values.values()) for values in data.values()]
+    return TermList(
+        tuple(columns[0]) if columns else (),
+        tuple(columns[1]) if len(columns) > 1 else None,
+    )
@@ -0,0 +1,84 @@
+"""Benchmark of the e-mail HTML rendering of large search reports.
+
+Run inside the Airflow container:
+
+    cd /opt/airflow && python -m tests.benchmarks.bench_email_render
+"""
+
+import argparse
+import time
+from collections import namedtuple
+
+from dags.ro_dou_src.notification.email_sender import EmailSender
+
+ReportConfig = namedtuple(
+    "ReportConfig",
+    ["header_text", "footer_text", "hide_filters", "no_results_found_text"],
+)
+
+
+def synthetic_report(groups: int, terms: int, departments: int, items: int) -> list:
+    """Builds a search report with the same nesting produced by the
+    DAG: group -> term -> department -> list of results.
+    """
+    return [
+        {
+            "header": "Pesquisa sintética",
+            "department": [f"department_{d}" for d in range(departments)],
+            "result": {
+                f"grupo_{g}": {
+                    f"term_{t}": {
+                        f"department_{d}": [
+                            {
+                                "section": "Seção 1",
+                                "title": f"PORTARIA Nº {i}, DE 2 DE SETEMBRO DE 2021",
+                                "href": f"https://www.in.gov.br/{g}/{t}/{d}/{i}",
+                                "abstract": "resumo "
+                                * 20
+                                + "<span class='highlight' style='background:#FFA;'>"
+                                f"term_{t}</span> ...",
+                                "date": "02/09/2021",
+                            }
+                            for i in range(items)
+                        ]
+                        for d in range(departments)
+                    }
+                    for t in range(terms)
+                }
+                for g in range(groups)
+            },
+        }
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=5)
+    parser.add_argument("--terms", type=int, default=100)
+    parser.add_argument("--departments", type=int, default=2)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    report = synthetic_report(args.groups, args.terms, args.departments, args.items)
+    total_items = args.groups * args.terms * args.departments * args.items
+    for hide_filters in (False, True):
+        sender = EmailSender(
+            ReportConfig("<p>Cabeçalho</p>", "<p>Rodapé</p>", hide_filters, "Nada")
+        )
+        sender.search_report = report
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            content = sender.generate_email_content()
+            timings.append(time.perf_counter() - start)
+        print(
+            f"generate_email_content (hide_filters={hide_filters}): "
+            f"{total_items} items, {len(content) / 1e6:.1f} MB, "
+            f"best {min(timings) * 1000:.2f} ms, "
+            f"mean {sum(timings) / len(timings) * 1000:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
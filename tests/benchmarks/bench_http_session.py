@@ -0,0 +1,138 @@
+"""Benchmark of connection reuse by the pooled HTTP session.
+
+Serves a fake Querido Diário response from a local HTTP(S) stub and
+compares the number of handshakes (accepted connections) and the
+latency per term of module-level `requests.get` calls against the
+pooled session used by `DOUHook` and `QDSearcher`.
+
+Run inside the Airflow container:
+
+    cd /opt/airflow && python -m tests.benchmarks.bench_http_session
+
+Use `--tls` to serve over HTTPS with a self-signed certificate
+generated by the `openssl` command line tool.
+"""
+
+import argparse
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from dags.ro_dou_src.utils.http_session import create_session
+
+GAZETTE = {
+    "date": "2023-02-08",
+    "excerpts": ["Proteção de Dados / <%%>LGPD</%%>, Lei Federal nº 13709" * 4] * 3,
+    "is_extra_edition": False,
+    "state_code": "PR",
+    "territory_id": "4106902",
+    "territory_name": "Curitiba",
+    "url": "https://querido-diario.example/4106902/2023-02-08/abc",
+}
+
+
+class StubServer(ThreadingHTTPServer):
+    """HTTP server that counts the accepted connections."""
+
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = 0
+
+    def get_request(self):
+        request = super().get_request()
+        self.connections += 1
+        return request
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = json.dumps({"total_gazettes": 100, "gazettes": [GAZETTE] * 100}).encode()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+def _self_signed_context(directory: str) -> ssl.SSLContext:
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", keyfile, "-out", certfile, "-days", "1",
+            "-subj", "/CN=localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certfile, keyfile)
+    return context
+
+
+def _run(server: StubServer, url: str, get, terms: int) -> dict:
+    server.connections = 0
+    latencies = []
+    for term in range(terms):
+        start = time.perf_counter()
+        response = get(url, params={"querystring": f'"term {term}"'}, verify=False)
+        response.raise_for_status()
+        response.json()
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "handshakes": server.connections,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p95_ms": sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terms", type=int, default=200)
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    scheme = "http"
+    with tempfile.TemporaryDirectory() as directory:
+        if args.tls:
+            server.socket = _self_signed_context(directory).wrap_socket(
+                server.socket, server_side=True
+            )
+            scheme = "https"
+            requests.packages.urllib3.disable_warnings()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"{scheme}://127.0.0.1:{server.server_address[1]}/api/gazettes"
+
+        results = {
+            "requests.get": _run(server, url, requests.get, args.terms),
+            "pooled session": _run(server, url, create_session().get, args.terms),
+        }
+        server.shutdown()
+
+    for name, result in results.items():
+        print(
+            f"{name:>15}: {args.terms} terms, {result['handshakes']} handshakes, "
+            f"mean {result['mean_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
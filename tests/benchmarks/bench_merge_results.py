@@ -0,0 +1,77 @@
+"""Benchmark of `merge_results` over large synthetic search results.
+
+Run inside the Airflow container:
+
+    cd /opt/airflow && python -m tests.benchmarks.bench_merge_results
+"""
+
+import argparse
+import time
+
+from dags.ro_dou_src.dou_dag_generator import merge_results
+
+
+def synthetic_result(
+    source: str, groups: int, terms: int, departments: int, items: int
+) -> dict:
+    """Builds a search result with the same nesting produced by the
+    searchers: group -> term -> department -> list of results.
+    """
+    return {
+        f"grupo_{g}": {
+            f"term_{t}": {
+                f"department_{d}": [
+                    {
+                        "section": source,
+                        "title": f"title {i}",
+                        "href": f"https://{source}/{g}/{t}/{d}/{i}",
+                        "abstract": "abstract " * 20,
+                        "date": "02/09/2021",
+                    }
+                    for i in range(items)
+                ]
+                for d in range(departments)
+            }
+            for t in range(terms)
+        }
+        for g in range(groups)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", type=int, default=3)
+    parser.add_argument("--groups", type=int, default=10)
+    parser.add_argument("--terms", type=int, default=200)
+    parser.add_argument("--departments", type=int, default=3)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.repeat):
+        results = [
+            synthetic_result(
+                f"source_{s}", args.groups, args.terms, args.departments, args.items
+            )
+            for s in range(args.sources)
+        ]
+        start = time.perf_counter()
+        merged = merge_results(*results)
+        timings.append(time.perf_counter() - start)
+
+    total_items = sum(
+        len(items)
+        for terms in merged.values()
+        for departments in terms.values()
+        for items in departments.values()
+    )
+    print(
+        f"merge_results: {args.sources} sources, {total_items} items, "
+        f"best {min(timings) * 1000:.2f} ms, "
+        f"mean {sum(timings) / len(timings) * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
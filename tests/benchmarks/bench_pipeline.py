@@ -0,0 +1,558 @@
+"""Benchmark of the search-to-notification pipeline over recorded sources.
+
+Times `exec_search` of the DOU, INLABS and QD searchers, `merge_results`
+of their results, `send_report` of every sender and `YAMLParser.parse`
+of the example configurations, across term counts and result sizes per
+term. Sources and destinations are local stand-ins built from the
+fixtures recorded at `data/`:
+
+- an HTTP server with the DOU search pages (`dou_search_page.html`),
+  the Querido Diário API (`qd_gazettes.json`) and the Slack and Discord
+  webhooks;
+- an SQLite database with the INLABS articles (`inlabs_articles.xml`),
+  queried with the SQL generated by `INLABSHook` in place of Postgres;
+- an `aiosmtpd` server receiving the e-mails.
+
+The timings can be saved as JSON and compared with the ones of another
+commit, reporting the cases slower than `--threshold`:
+
+    python -m tests.benchmarks.bench_pipeline --output before.json
+    python -m tests.benchmarks.bench_pipeline --compare before.json
+
+Run inside the Airflow container:
+
+    cd /opt/airflow && python -m tests.benchmarks.bench_pipeline
+"""
+
+import argparse
+import copy
+import glob
+import json
+import logging
+import os
+import platform
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import unicodedata
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+from aiosmtpd.controller import Controller
+from bs4 import BeautifulSoup
+
+from dags.ro_dou_src.dou_dag_generator import DouDigestDagGenerator, merge_results
+from dags.ro_dou_src.notification import smtp_transport
+from dags.ro_dou_src.notification.discord_sender import DiscordSender
+from dags.ro_dou_src.notification.email_sender import EmailSender
+from dags.ro_dou_src.notification.slack_sender import SlackSender
+from dags.ro_dou_src.parsers import YAMLParser
+from dags.ro_dou_src.schemas import ReportConfig
+from dags.ro_dou_src.searchers import (
+    DOUSearcher,
+    INLABSHook,
+    INLABSSearcher,
+    QDSearcher,
+)
+from dags.ro_dou_src.utils.rate_controller import RateController
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+# Date of the recorded publications
+REFERENCE_DATE = datetime(2023, 3, 29, 10)
+RECORDED_TERM = "LGPD"
+DOU_PAGE_SIZE = 20
+QD_PAGE_SIZE = 100
+QD_TERRITORY_ID = 4106902
+# Every n-th INLABS article is published in the extra edition of the
+# day before, found by the second query of `INLABSHook.search_text`
+INLABS_EXTRA_EVERY = 10
+
+
+def search_terms(terms: int) -> List[str]:
+    return [f"licitação {t}" for t in range(terms)]
+
+
+def unaccent(text: str) -> str:
+    if text is None:
+        return None
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)
+    )
+
+
+@lru_cache(maxsize=None)
+def _compile(pattern: str) -> re.Pattern:
+    # `\y` is the word boundary of the Postgres regular expressions
+    return re.compile(pattern.replace(r"\y", r"\b"), re.IGNORECASE)
+
+
+def regexp(pattern: str, text: str) -> bool:
+    if text is None:
+        return None
+    return _compile(pattern).search(text) is not None
+
+
+class DOUPages:
+    """DOU search result pages with `results` publications per term,
+    made from the publications of the recorded page."""
+
+    SCRIPT_ID = "_br_com_seatecnologia_in_buscadou_BuscaDouPortlet_params"
+
+    def __init__(self, terms: List[str], results: int):
+        with open(os.path.join(DATA_DIR, "dou_search_page.html"), encoding="utf-8") as f:
+            soup = BeautifulSoup(f.read(), "html.parser")
+        script = soup.find("script", id=self.SCRIPT_ID)
+        recorded = json.loads(script.string)["jsonArray"]
+        script.string = "{json_array}"
+        soup.find("button", id="lastPage").string = "{pages}"
+        template = str(soup).replace("{", "{{").replace("}", "}}")
+        template = template.replace("{{json_array}}", "{json_array}")
+        template = template.replace("{{pages}}", "{pages}")
+
+        self.pages: Dict[Tuple[str, int], bytes] = {}
+        for t, term in enumerate(terms):
+            items = []
+            for i in range(results):
+                item = recorded[i % len(recorded)]
+                items.append(
+                    dict(
+                        item,
+                        title=f"{item['title']} ({t}.{i})",
+                        urlTitle=f"{item['urlTitle']}-{t}-{i}",
+                        content=item["content"].replace(RECORDED_TERM, term),
+                        classPK=f"{t}{i:06d}",
+                    )
+                )
+            pages = max((len(items) - 1) // DOU_PAGE_SIZE + 1, 1)
+            for page in range(pages):
+                chunk = items[page * DOU_PAGE_SIZE : (page + 1) * DOU_PAGE_SIZE]
+                self.pages[(term, page + 1)] = template.format(
+                    json_array=json.dumps({"jsonArray": chunk}, ensure_ascii=False),
+                    pages=pages,
+                ).encode()
+
+    def get(self, params: dict) -> bytes:
+        term = params["q"][0].strip('"')
+        return self.pages[(term, int(params.get("newPage", ["1"])[0]))]
+
+
+class QDPages:
+    """Querido Diário API pages with `results` gazettes per term, made
+    from the recorded gazettes."""
+
+    def __init__(self, terms: List[str], results: int):
+        with open(os.path.join(DATA_DIR, "qd_gazettes.json"), encoding="utf-8") as f:
+            recorded = json.load(f)["gazettes"]
+        self.pages: Dict[Tuple[str, int], bytes] = {}
+        for t, term in enumerate(terms):
+            gazettes = []
+            for i in range(results):
+                gazette = recorded[i % len(recorded)]
+                gazettes.append(
+                    dict(
+                        gazette,
+                        url=f"{gazette['url']}/{t}/{i}",
+                        excerpts=[
+                            excerpt.replace(RECORDED_TERM, term)
+                            for excerpt in gazette["excerpts"]
+                        ],
+                    )
+                )
+            for offset in range(0, max(results, 1), QD_PAGE_SIZE):
+                self.pages[(term, offset)] = json.dumps(
+                    {
+                        "total_gazettes": results,
+                        "gazettes": gazettes[offset : offset + QD_PAGE_SIZE],
+                    },
+                    ensure_ascii=False,
+                ).encode()
+
+    def get(self, params: dict) -> bytes:
+        term = params["querystring"][0].strip('"')
+        return self.pages[(term, int(params["offset"][0]))]
+
+
+class INLABSDatabase:
+    """Stand-in of the INLABS Postgres database: an in-memory SQLite
+    database with `results` articles per term, made from the recorded
+    articles and queried with the SQL generated by `INLABSHook`.
+    Instances are used in place of the `PostgresHook`.
+    """
+
+    SQL_TRANSLATION = (
+        ("dou_inlabs.", ""),
+        (" !~* ", " NOT REGEXP "),
+        (" ~* ", " REGEXP "),
+    )
+
+    def __init__(self, terms: List[str], results: int):
+        recorded = load_inlabs_articles()
+        articles = []
+        for t, term in enumerate(terms):
+            for i in range(results):
+                article = recorded[i % len(recorded)]
+                extra = (i + 1) % INLABS_EXTRA_EVERY == 0
+                pubdate = REFERENCE_DATE - timedelta(days=1) if extra else REFERENCE_DATE
+                articles.append(
+                    dict(
+                        article,
+                        id=f"{t}{i:06d}",
+                        pubname=article["pubname"] + ("E" if extra else ""),
+                        pubdate=pubdate.strftime("%Y-%m-%d"),
+                        identifica=f"{article['identifica']} ({t}.{i})",
+                        texto=article["texto"].replace(RECORDED_TERM, term),
+                    )
+                )
+        self.connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self.connection.create_function("unaccent", 1, unaccent, deterministic=True)
+        self.connection.create_function("regexp", 2, regexp, deterministic=True)
+        pd.DataFrame(articles).to_sql("article_raw", self.connection, index=False)
+
+    def __call__(self, conn_id: str) -> "INLABSDatabase":
+        return self
+
+    def run(self, sql: str, autocommit: bool = False) -> None:
+        # Only used to create the `unaccent` extension
+        pass
+
+    def get_pandas_df(self, sql: str) -> pd.DataFrame:
+        for postgres, sqlite in self.SQL_TRANSLATION:
+            sql = sql.replace(postgres, sqlite)
+        return pd.read_sql_query(sql, self.connection, parse_dates=["pubdate"])
+
+
+def load_inlabs_articles() -> List[dict]:
+    """Reads the recorded INLABS XML into rows with the columns of the
+    `dou_inlabs.article_raw` table, as loaded by the INLABS load DAG."""
+    tree = ET.parse(os.path.join(DATA_DIR, "inlabs_articles.xml"))
+    articles = []
+    for article in tree.getroot().iter("article"):
+        row = {key.lower(): value for key, value in article.attrib.items()}
+        for field in article.find("body"):
+            row[field.tag.lower()] = field.text or None
+        signatures = BeautifulSoup(row["texto"], "html.parser").find_all(
+            "p", class_="assina"
+        )
+        row["assina"] = ", ".join(p.text for p in signatures) if signatures else None
+        articles.append(row)
+    return articles
+
+
+class StandInServer(ThreadingHTTPServer):
+    """HTTP server answering as the DOU and QD searches and as the
+    Slack and Discord webhooks."""
+
+    daemon_threads = True
+    routes: Dict[str, Callable[[dict], bytes]] = {}
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written apart: with Nagle's algorithm, small
+    # responses would wait for the delayed ACK of the client
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        body = self.server.routes[url.path](parse_qs(url.query))
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DiscardingHandler:
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+
+def start_smtp_server() -> Controller:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = Controller(DiscardingHandler(), hostname="127.0.0.1", port=port)
+    server.start()
+    os.environ.update(
+        {
+            "AIRFLOW__SMTP__SMTP_HOST": "127.0.0.1",
+            "AIRFLOW__SMTP__SMTP_PORT": str(port),
+            "AIRFLOW__SMTP__SMTP_STARTTLS": "False",
+            "AIRFLOW__SMTP__SMTP_SSL": "False",
+            "AIRFLOW__SMTP__SMTP_MAIL_FROM": "ro-dou@gestao.gov.br",
+            "AIRFLOW__EMAIL__EMAIL_BACKEND": smtp_transport.SMTP_BACKEND,
+        }
+    )
+    return server
+
+
+def unthrottled(searcher):
+    """The stand-ins need no rate limit between requests."""
+    searcher.rate_controller = RateController(initial_rate=1e6, max_rate=1e6)
+    return searcher
+
+
+def measure(func: Callable, repeat: int, setup: Callable = None) -> dict:
+    """Best and mean time of `repeat` calls of `func` with the arguments
+    returned by `setup`, which is not timed."""
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return {
+        "best_ms": round(min(timings) * 1000, 3),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 3),
+    }
+
+
+def run_searches(terms: List[str], repeat: int) -> Tuple[dict, dict]:
+    """Times the searches and returns, with the timings, the results of
+    the last ones."""
+    results = {}
+    timings = {}
+
+    def dou_search():
+        results["DOU"] = unthrottled(DOUSearcher()).exec_search(
+            term_list=terms,
+            dou_sections=["TODOS"],
+            search_date="DIA",
+            field="TUDO",
+            is_exact_search=True,
+            ignore_signature_match=True,
+            force_rematch=False,
+            department=None,
+            reference_date=REFERENCE_DATE,
+        )
+
+    def inlabs_search():
+        results["INLABS"] = INLABSSearcher().exec_search(
+            terms=terms,
+            dou_sections=["TODOS"],
+            search_date="DIA",
+            department=None,
+            ignore_signature_match=True,
+            full_text=False,
+            use_summary=False,
+            reference_date=REFERENCE_DATE,
+        )
+
+    def qd_search():
+        results["QD"] = unthrottled(QDSearcher()).exec_search(
+            territory_id=[QD_TERRITORY_ID],
+            term_list=terms,
+            dou_sections=["TODOS"],
+            search_date="DIA",
+            field="TUDO",
+            is_exact_search=True,
+            ignore_signature_match=False,
+            force_rematch=False,
+            reference_date=REFERENCE_DATE,
+        )
+
+    timings["dou.exec_search"] = measure(dou_search, repeat)
+    timings["inlabs.exec_search"] = measure(inlabs_search, repeat)
+    timings["qd.exec_search"] = measure(qd_search, repeat)
+    return timings, results
+
+
+def run_case(
+    terms: int, results: int, repeat: int, server: StandInServer
+) -> List[dict]:
+    term_list = search_terms(terms)
+    server.routes["/consulta/-/buscar/dou"] = DOUPages(term_list, results).get
+    server.routes["/api/gazettes"] = QDPages(term_list, results).get
+    inlabs_db = INLABSDatabase(term_list, results)
+
+    with mock.patch.object(
+        DOUSearcher.dou_hook, "IN_API_BASE_URL", f"{server.url}/consulta/-/buscar/dou"
+    ), mock.patch.object(
+        QDSearcher, "API_BASE_URL", f"{server.url}/api/gazettes"
+    ), mock.patch.object(
+        sys.modules[INLABSHook.__module__], "PostgresHook", inlabs_db
+    ):
+        timings, search_results = run_searches(term_list, repeat)
+
+    sources = [search_results[source] for source in ("QD", "DOU", "INLABS")]
+    # `merge_results` extends the lists of its arguments
+    timings["merge_results"] = measure(
+        merge_results, repeat, setup=lambda: copy.deepcopy(sources)
+    )
+    search_report = [
+        {
+            "header": "Pesquisa de benchmark",
+            "department": None,
+            "result": merge_results(*sources),
+        }
+    ]
+
+    report_config = ReportConfig(
+        emails=["destinatario@gestao.gov.br"],
+        subject="Benchmark Ro-DOU",
+        attach_csv=True,
+        skip_null=False,
+        slack={"webhook": f"{server.url}/slack"},
+        discord={"webhook": f"{server.url}/discord"},
+    )
+    for name, sender_class in (
+        ("email", EmailSender),
+        ("slack", SlackSender),
+        ("discord", DiscordSender),
+    ):
+        timings[f"{name}.send_report"] = measure(
+            lambda sender: sender.send_report(search_report, "29/03/2023"),
+            repeat,
+            setup=lambda: (sender_class(report_config),),
+        )
+
+    params = {"terms": terms, "results": results}
+    return [
+        {"name": name, "params": params, **timing} for name, timing in timings.items()
+    ]
+
+
+def run_yaml_parser(repeat: int) -> dict:
+    files = sorted(
+        glob.glob(
+            os.path.join(
+                DouDigestDagGenerator.YAMLS_DIR_LIST[0], "examples_and_tests", "*.yaml"
+            )
+        )
+    )
+
+    def parse_all():
+        for filepath in files:
+            YAMLParser(filepath).parse()
+
+    return {
+        "name": "yaml_parser.parse",
+        "params": {"files": len(files)},
+        **measure(parse_all, repeat),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_key(case: dict) -> tuple:
+    return case["name"], json.dumps(case["params"], sort_keys=True)
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Prints the change of the best time of each case against the
+    `baseline` and returns the number of cases slower than `threshold`."""
+    previous = {case_key(case): case for case in baseline["cases"]}
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'}:")
+    regressions = 0
+    for case in current["cases"]:
+        before = previous.get(case_key(case))
+        if before is None:
+            continue
+        change = case["best_ms"] / before["best_ms"] - 1 if before["best_ms"] else 0
+        regression = change > threshold
+        regressions += regression
+        print(
+            f"{case['name']:>20} {case_key(case)[1]}: "
+            f"{before['best_ms']:.2f} ms -> {case['best_ms']:.2f} ms "
+            f"({change:+.1%}){' REGRESSION' if regression else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terms", default="10,50", help="comma separated counts")
+    parser.add_argument("--results", default="20,100", help="results per term")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON file to save the timings")
+    parser.add_argument("--compare", help="JSON file of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--verbose", action="store_true", help="keep INFO logs")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "repeat": args.repeat,
+        "cases": [],
+    }
+    server = StandInServer()
+    smtp_server = start_smtp_server()
+    try:
+        for terms in (int(t) for t in args.terms.split(",")):
+            for results in (int(r) for r in args.results.split(",")):
+                for case in run_case(terms, results, args.repeat, server):
+                    report["cases"].append(case)
+                    print(
+                        f"{case['name']:>20} terms={terms} results={results}: "
+                        f"best {case['best_ms']:.2f} ms, mean {case['mean_ms']:.2f} ms"
+                    )
+        case = run_yaml_parser(args.repeat)
+        report["cases"].append(case)
+        print(
+            f"{case['name']:>20} files={case['params']['files']}: "
+            f"best {case['best_ms']:.2f} ms, mean {case['mean_ms']:.2f} ms"
+        )
+    finally:
+        smtp_transport.SMTPTransport.close_all()
+        smtp_server.stop()
+        server.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark of the decoding and parsing of Querido Diário responses.
+
+Compares decoding the whole response body with `json.loads` and the
+previous `parse_result` (string concatenation and `strptime`) against
+the incremental decoding with `ijson` and the current
+`QDSearcher.parse_result`. Pages are built from the gazettes recorded
+at `data/qd_gazettes.json`.
+
+Run inside the Airflow container:
+
+    cd /opt/airflow && python -m tests.benchmarks.bench_qd_parsing
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+import ijson
+
+from dags.ro_dou_src.searchers import QDSearcher
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+def load_page(page_size: int) -> bytes:
+    """Builds a response body with `page_size` recorded gazettes."""
+    with open(os.path.join(DATA_DIR, "qd_gazettes.json"), encoding="utf-8") as f:
+        recorded = json.load(f)["gazettes"]
+    gazettes = []
+    for i in range(page_size):
+        gazette = recorded[i % len(recorded)]
+        gazettes.append(dict(gazette, url=f"{gazette['url']}/{i}"))
+    return json.dumps(
+        {"total_gazettes": page_size, "gazettes": gazettes}, ensure_ascii=False
+    ).encode()
+
+
+def previous_parse_result(result: dict, result_as_email: bool = True) -> dict:
+    section = (
+        "extraordinária" if result.get("is_extra_edition", False) else "ordinária"
+    )
+    if result_as_email:
+        abstract = (
+            "<p>" + "</p><p>".join(result["excerpts"]).replace("\n", "") + "</p>"
+        )
+    else:
+        abstract = "\n".join(result["excerpts"]).replace("\n", "")
+    return {
+        "section": f"QD - Edição {section} ",
+        "title": (
+            "Município de " f"{result['territory_name']} - {result['state_code']}"
+        ),
+        "href": result["url"],
+        "abstract": abstract,
+        "date": datetime.strptime(result["date"], "%Y-%m-%d").strftime("%d/%m/%Y"),
+    }
+
+
+def previous(body: bytes) -> list:
+    content = io.BytesIO(body).read()
+    return [previous_parse_result(r) for r in json.loads(content)["gazettes"]]
+
+
+def current(body: bytes) -> list:
+    searcher = QDSearcher()
+    gazettes = ijson.items(io.BytesIO(body), "gazettes.item")
+    return [searcher.parse_result(r) for r in gazettes]
+
+
+def measure(func, body: bytes, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = func(body)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"results": results, "best_ms": min(timings) * 1000, "peak_kb": peak / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    body = load_page(args.page_size)
+    measures = {
+        "json.loads": measure(previous, body, args.repeat),
+        "ijson": measure(current, body, args.repeat),
+    }
+    assert measures["json.loads"]["results"] == measures["ijson"]["results"]
+
+    for name, result in measures.items():
+        print(
+            f"{name:>15}: {args.page_size} gazettes ({len(body) / 1024:.0f} KB), "
+            f"best {result['best_ms']:.2f} ms, peak memory {result['peak_kb']:.0f} KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
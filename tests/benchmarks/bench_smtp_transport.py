@@ -0,0 +1,80 @@
+"""Benchmark of e-mail sending through a reused SMTP connection.
+
+Sends the same e-mails to a local `aiosmtpd` server with Airflow's
+`send_email`, which opens a connection per e-mail, and with the
+`SMTPTransport`. Run inside the Airflow container:
+
+    cd /opt/airflow && python -m tests.benchmarks.bench_smtp_transport
+"""
+
+import argparse
+import os
+import smtplib
+import socket
+import time
+
+from aiosmtpd.controller import Controller
+
+from dags.ro_dou_src.notification import smtp_transport
+
+
+class CountingHandler:
+    def __init__(self):
+        self.messages = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 OK"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--recipients", type=int, default=120)
+    args = parser.parse_args()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = CountingHandler()
+    server = Controller(handler, hostname="127.0.0.1", port=port)
+    server.start()
+    os.environ.update(
+        {
+            "AIRFLOW__SMTP__SMTP_HOST": "127.0.0.1",
+            "AIRFLOW__SMTP__SMTP_PORT": str(port),
+            "AIRFLOW__SMTP__SMTP_STARTTLS": "False",
+            "AIRFLOW__SMTP__SMTP_SSL": "False",
+            "AIRFLOW__SMTP__SMTP_MAIL_FROM": "ro-dou@gestao.gov.br",
+            "AIRFLOW__EMAIL__EMAIL_BACKEND": smtp_transport.SMTP_BACKEND,
+        }
+    )
+    to = [f"dest{i}@gestao.gov.br" for i in range(args.recipients)]
+    html_content = "<p>Relatório</p>" * 500
+
+    try:
+        for name, send_email in (
+            ("airflow send_email", smtp_transport.email.send_email),
+            ("SMTPTransport", smtp_transport.send_email),
+        ):
+            start = time.perf_counter()
+            try:
+                for i in range(args.emails):
+                    send_email(
+                        to=to, subject=f"Relatório {i}", html_content=html_content
+                    )
+            except smtplib.SMTPException as e:
+                print(f"{name}: failed, {e!r}")
+                continue
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name}: {args.emails} e-mails to {args.recipients} recipients, "
+                f"{elapsed * 1000:.0f} ms, {args.emails / elapsed:.1f} e-mails/s"
+            )
+    finally:
+        smtp_transport.SMTPTransport.close_all()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,10 @@ import os
 import pytest
 from typing import Tuple
 
+from dags.ro_dou_src import dou_dag_generator
 from dags.ro_dou_src.dou_dag_generator import (DouDigestDagGenerator,
                                            SearchResult)
+from dags.ro_dou_src.hooks.rodou_db_hook import RoDouDBHook
 from dags.ro_dou_src.parsers import YAMLParser
 from dags.ro_dou_src.searchers import DOUSearcher, INLABSSearcher
 from dags.ro_dou_src.hooks.inlabs_hook import INLABSHook
@@ -428,3 +430,88 @@ def merge_results_samples() -> Tuple[SearchResult, SearchResult, SearchResult]:
     }
 
     return (results_dou, results_qd, merged_results)
+
+
+class FakeRoDouDBHook(RoDouDBHook):
+    """In-memory Ro-DOU state database. Installed in place of the
+    `RoDouDBHook` class of the DAG generator, calling it returns this
+    same instance, so the tests can inspect what was stored."""
+
+    def __init__(self, configured: bool = True):
+        self.configured = configured
+        self.seen_added = []
+        self.evicted = []
+        self.snapshots = {}
+        self.term_lists = {}
+        self.digest_reports = {}
+        self.deleted_reports = []
+        self.delivered = {}
+
+    def __call__(self):
+        return self
+
+    def is_configured(self, conn_id: str = RoDouDBHook.CONN_ID) -> bool:
+        return self.configured
+
+    def get_seen_publications(self, dag_id):
+        return {
+            publication
+            for seen_dag_id, publications in self.seen_added
+            if seen_dag_id == dag_id
+            for publication in publications
+        }
+
+    def add_seen_publications(self, dag_id, publications):
+        self.seen_added.append((dag_id, publications))
+
+    def evict_seen_publications(self, dag_id, ttl):
+        self.evicted.append((dag_id, ttl))
+
+    def get_search_snapshot(self, dag_id, search_key):
+        return self.snapshots.get((dag_id, search_key))
+
+    def set_search_snapshot(self, dag_id, search_key, snapshot):
+        self.snapshots[(dag_id, search_key)] = snapshot
+
+    def get_term_list(self, dag_id, select_key):
+        return self.term_lists.get((dag_id, select_key))
+
+    def set_term_list(self, dag_id, select_key, cached):
+        self.term_lists[(dag_id, select_key)] = cached
+
+    def add_digest_report(self, digest, report):
+        reports = self.digest_reports.setdefault(digest, [])
+        reports[:] = [
+            published
+            for published in reports
+            if (published.dag_id, published.report_date)
+            != (report.dag_id, report.report_date)
+        ] + [report]
+
+    def get_digest_reports(self, digest):
+        return list(self.digest_reports.get(digest, []))
+
+    def delete_digest_reports(self, digest, reports):
+        self.deleted_reports.append((digest, reports))
+        self.digest_reports[digest] = [
+            report for report in self.digest_reports[digest] if report not in reports
+        ]
+
+    def get_delivered_channels(self, dag_id, run_id, report_date):
+        return set(self.delivered.get((dag_id, run_id, report_date), ()))
+
+    def add_delivered_channel(self, dag_id, run_id, report_date, channel):
+        self.delivered.setdefault((dag_id, run_id, report_date), set()).add(channel)
+
+    def delete_delivered_channels(self, dag_id, run_id, report_date):
+        self.delivered.pop((dag_id, run_id, report_date), None)
+
+
+@pytest.fixture()
+def fake_rodou_db(request, monkeypatch) -> FakeRoDouDBHook:
+    """Replaces the Ro-DOU state database of the DAG generator by an
+    in-memory one. Parametrize it indirectly with False to simulate a
+    missing `ro_dou_db` connection."""
+    db_hook = FakeRoDouDBHook(configured=getattr(request, "param", True))
+    monkeypatch.setattr(dou_dag_generator, "RoDouDBHook", db_hook)
+    return db_hook
@@ -1,32 +1,29 @@
 """DouDagGenerator unit tests
 """
 
+import time
+from datetime import date, timedelta
+from functools import partial
+from types import SimpleNamespace
+from typing import List
+
 import pandas as pd
 import pytest
-from dags.ro_dou_src.dou_dag_generator import merge_results
-from dags.ro_dou_src.notification.email_sender import EmailSender, repack_match
+from dags.ro_dou_src import dou_dag_generator
+from dags.ro_dou_src.dou_dag_generator import (
+    BackfillQuery,
+    merge_results,
+    merge_snapshot,
+)
+from dags.ro_dou_src.hooks.rodou_db_hook import DigestReport
+from dags.ro_dou_src.schemas import DAGConfig
+from dags.ro_dou_src.utils.term_list import TermList
+from dags.ro_dou_src.notification.email_sender import EmailSender
+from dags.ro_dou_src.notification.report_exporter import ReportExporter
 from airflow import Dataset
 from airflow.timetables.datasets import DatasetOrTimeSchedule
 
 
-def test_repack_match(report_example):
-    match_dict = report_example[0]["result"]["single_group"]["antonio de oliveira"]["single_department"][0]
-    repacked_match = repack_match(
-        "Teste Report", "single_group", "antonio de oliveira", "single_department", match_dict
-    )
-    assert repacked_match == (
-        "Teste Report",
-        "single_group",
-        "antonio de oliveira",
-        "single_department",
-        "Seção 3",
-        match_dict["href"],
-        match_dict["title"],
-        match_dict["abstract"],
-        match_dict["date"],
-    )
-
-
 @pytest.fixture
 def email_sender(report_example):
     email_sender = EmailSender(None)
@@ -34,32 +31,14 @@ def email_sender(report_example):
     return email_sender
 
 
-def test_convert_report_dict__returns_list(email_sender):
-    tuple_list = email_sender.convert_report_dict_to_tuple_list()
-    assert isinstance(tuple_list, list)
-
-
-def test_convert_report_dict__returns_tuples(email_sender):
-    tuple_list = email_sender.convert_report_dict_to_tuple_list()
-    for tpl in tuple_list:
-        assert isinstance(tpl, tuple)
-
-
-def test_convert_report_dict__returns_tuples_of_nine(email_sender):
-    tuple_list = email_sender.convert_report_dict_to_tuple_list()
-    for tpl in tuple_list:
-        assert len(tpl) == 9
-
-
-def test_convert_report_to_dataframe__rows_count(email_sender):
-    df = email_sender.convert_report_to_dataframe()
-    # num_rows
-    assert df.shape[0] == 15
+def test_report_rows__rows_count(report_example):
+    rows = list(ReportExporter(report_example).rows())
+    assert len(rows) == 15
+    assert all(len(row) == 7 for row in rows)
 
 
-def test_convert_report_to_dataframe__cols_single_group(email_sender):
-    df = email_sender.convert_report_to_dataframe()
-    assert tuple(df.columns) == (
+def test_report_rows__cols_single_group(report_example):
+    assert ReportExporter(report_example).columns == (
         "Consulta",
         "Termo de pesquisa",
         "Seção",
@@ -70,13 +49,11 @@ def test_convert_report_to_dataframe__cols_single_group(email_sender):
     )
 
 
-def test_convert_report_to_dataframe__cols_grouped_report(email_sender, report_example):
+def test_report_rows__cols_grouped_report(report_example):
     report_example[0]["result"]["group_name_different_of_single_group"] = (
         report_example[0]["result"].pop("single_group")
     )
-    email_sender.search_report = report_example
-    df = email_sender.convert_report_to_dataframe()
-    assert tuple(df.columns) == (
+    assert ReportExporter(report_example).columns == (
         "Consulta",
         "Grupo",
         "Termo de pesquisa",
@@ -111,6 +88,45 @@ def test_merge_results(merge_results_samples):
     assert merged_result == merge_results_samples[2]
 
 
+def test_merge_results__many_sources(merge_results_samples):
+    results_dou, results_qd, _ = merge_results_samples
+    results_inlabs = {
+        "grupo_1": {
+            "term_1": {"single_department": [{"key4": "result4"}]},
+        },
+    }
+    merged_result = merge_results(results_dou, results_qd, results_inlabs)
+
+    assert merged_result["grupo_1"]["term_1"]["single_department"] == [
+        {"key1": "result1"},
+        {"key2": "result2"},
+        {"key3": "resultn"},
+        {"key4": "result4"},
+    ]
+    assert len(merged_result["grupo_1"]["term_2"]["single_department"]) == 6
+    assert set(merged_result) == {"grupo_1", "grupo_2", "grupo_3"}
+
+
+@pytest.mark.parametrize(
+    "dicts",
+    [
+        (),
+        ({},),
+        ({"single_group": {}},),
+        ({}, {"single_group": {}}),
+    ],
+)
+def test_merge_results__filter_empty(dicts):
+    assert merge_results(*dicts) == {}
+
+
+def test_merge_results__ignores_empty_source(merge_results_samples):
+    results_dou = merge_results_samples[0]
+    merged_result = merge_results({"single_group": {}}, results_dou)
+
+    assert merged_result == merge_results_samples[0]
+
+
 @pytest.mark.parametrize(
     "dag_id, size, hashed",
     [
@@ -142,3 +158,714 @@ def test_update_schedule_with_dataset(dag_gen, dataset, schedule, is_default_sch
         assert isinstance(schedule[0], Dataset)
     else:
         assert isinstance(schedule, DatasetOrTimeSchedule)
+
+
+def test_run_searches__concurrently(dag_gen):
+    def search(result):
+        time.sleep(0.5)
+        return result
+
+    start = time.perf_counter()
+    results = dag_gen._run_searches(
+        {
+            "DOU": partial(search, {"single_group": {"dou": {}}}),
+            "QD": partial(search, {"single_group": {"qd": {}}}),
+        }
+    )
+
+    assert time.perf_counter() - start < 1
+    assert results == {
+        "DOU": {"single_group": {"dou": {}}},
+        "QD": {"single_group": {"qd": {}}},
+    }
+
+
+def test_run_searches__timeout(dag_gen, monkeypatch):
+    monkeypatch.setattr(dag_gen, "SEARCH_TIMEOUT", {"DOU": 60, "QD": 0.1})
+
+    with pytest.raises(TimeoutError):
+        dag_gen._run_searches(
+            {
+                "DOU": lambda: {},
+                "QD": partial(time.sleep, 0.5),
+            }
+        )
+
+
+def test_search_timeout__env(dag_gen, monkeypatch):
+    monkeypatch.setenv("RO_DOU__SEARCH_TIMEOUT_QD", "90")
+
+    assert dag_gen.search_timeout("QD") == 90
+    assert dag_gen.search_timeout("DOU") == dag_gen.SEARCH_TIMEOUT["DOU"]
+
+
+def test_split_terms__list(dag_gen):
+    search_kwargs = {"header": "Teste", "term_list": ["a", "b", "c", "d", "e"]}
+    shards = dag_gen.split_terms(shard_size=2, search_kwargs=search_kwargs)
+
+    assert [shard["term_list"] for shard in shards] == [["a", "b"], ["c", "d"], ["e"]]
+    assert all(shard["header"] == "Teste" for shard in shards)
+
+
+def test_split_terms__from_db(dag_gen, dou_searcher, term_n_group):
+    shards = dag_gen.split_terms(
+        shard_size=1, search_kwargs={"term_list": term_n_group}
+    )
+    terms = [
+        term
+        for shard in shards
+        for term in dou_searcher._cast_term_list(shard["term_list"])
+    ]
+
+    assert len(shards) == 2
+    assert terms == dou_searcher._cast_term_list(term_n_group)
+    assert [TermList.load(shard["term_list"]).groups for shard in shards] == [
+        ("EPPGG",),
+        ("ATI",),
+    ]
+
+
+def test_merge_search_shards__keeps_group_order(dag_gen):
+    shards = [
+        {
+            "result": {"ZETA": {"zeta": [1]}, "ALFA": {"alfa": [2]}},
+            "header": "Teste",
+            "department": None,
+        },
+        {"result": {"ALFA": {"beta": [3]}}, "header": "Teste", "department": None},
+    ]
+    ti = SimpleNamespace(xcom_pull=lambda task_ids: shards)
+
+    merged = dag_gen.merge_search_shards(counter=1, ti=ti)
+
+    assert list(merged["result"]) == ["ZETA", "ALFA"]
+    assert merged["result"]["ALFA"] == {"alfa": [2], "beta": [3]}
+
+
+def test_register_seen_publications(dag_gen, fake_rodou_db):
+    search_report = [
+        {
+            "result": {
+                "single_group": {
+                    "lgpd": {"single_department": [{"id": 1}, {"id": 2}]},
+                    "cultura": {"single_department": [{"href": "https://qd/3"}]},
+                }
+            }
+        },
+        {"result": {"single_group": {}}},
+    ]
+
+    dag_gen.register_seen_publications(search_report, ttl_days=30, dag_id="dag_a")
+
+    assert fake_rodou_db.seen_added == [
+        ("dag_a", [("lgpd", "1"), ("lgpd", "2"), ("cultura", "https://qd/3")])
+    ]
+    assert fake_rodou_db.evicted == [("dag_a", timedelta(days=30))]
+
+
+def test_merge_snapshot():
+    result = {
+        "single_group": {
+            "lgpd": {"single_department": [{"id": 3, "date": "10/05/2024"}]}
+        }
+    }
+    snapshot = {
+        "single_group": {
+            "lgpd": {
+                "single_department": [
+                    {"id": 3, "date": "10/05/2024"},
+                    {"id": 2, "date": "08/05/2024"},
+                    {"id": 1, "date": "01/05/2024"},
+                ]
+            },
+            "cultura": {
+                "single_department": [
+                    {"id": 4, "date": "09/05/2024"},
+                    {"id": 5, "date": "09/05/2024"},
+                ]
+            },
+        }
+    }
+
+    merged = merge_snapshot(
+        result, snapshot, date(2024, 5, 4), seen_publications={("cultura", "5")}
+    )
+
+    assert merged == {
+        "single_group": {
+            "lgpd": {
+                "single_department": [
+                    {"id": 3, "date": "10/05/2024"},
+                    {"id": 2, "date": "08/05/2024"},
+                ]
+            },
+            "cultura": {"single_department": [{"id": 4, "date": "09/05/2024"}]},
+        }
+    }
+
+
+def _search_kwargs(**overrides) -> dict:
+    return {
+        "header": None,
+        "sources": ["DOU"],
+        "territory_id": None,
+        "term_list": ["lgpd"],
+        "dou_sections": ["TODOS"],
+        "search_date": "SEMANA",
+        "field": "TUDO",
+        "is_exact_search": True,
+        "ignore_signature_match": False,
+        "force_rematch": False,
+        "full_text": False,
+        "use_summary": False,
+        "result_as_email": True,
+        "department": None,
+        **overrides,
+    }
+
+
+def test_perform_searches__incremental(dag_gen, fake_rodou_db, monkeypatch):
+    found = {
+        "2024-05-08": [{"id": 1, "date": "08/05/2024"}],
+        "2024-05-10": [{"id": 2, "date": "10/05/2024"}],
+    }
+    searched_since = []
+
+    def exec_search(reference_date, published_since, **kwargs):
+        searched_since.append(published_since and published_since.date())
+        items = [
+            item
+            for day, items in found.items()
+            if day <= reference_date.date().isoformat()
+            for item in items
+        ]
+        return {"single_group": {"lgpd": {"single_department": items[-1:]}}}
+
+    monkeypatch.setitem(
+        dag_gen.searchers, "DOU", SimpleNamespace(exec_search=exec_search)
+    )
+
+    def run(trigger_date):
+        return dag_gen.perform_searches(
+            **_search_kwargs(incremental=True),
+            dag=SimpleNamespace(dag_id="dag_a"),
+            dag_run=SimpleNamespace(
+                conf={"trigger_date": trigger_date}, external_trigger=True
+            ),
+        )["result"]
+
+    run("2024-05-08T12:00")
+    result = run("2024-05-10T12:00")
+
+    assert searched_since == [None, date(2024, 5, 8)]
+    assert result["single_group"]["lgpd"]["single_department"] == [
+        {"id": 2, "date": "10/05/2024"},
+        {"id": 1, "date": "08/05/2024"},
+    ]
+
+
+def test_select_terms_from_db(dag_gen, monkeypatch):
+    class FakePostgresHook:
+        def __init__(self, conn_id):
+            pass
+
+        def get_records(self, sql):
+            return [(" SILVA ", "ATI"), ("ANTONIO", None), ("SILVA", "ATI")]
+
+    monkeypatch.setattr(
+        dou_dag_generator.BaseHook,
+        "get_connection",
+        lambda conn_id: SimpleNamespace(conn_type="postgres"),
+    )
+    monkeypatch.setattr(dou_dag_generator, "PostgresHook", FakePostgresHook)
+
+    term_list = dag_gen.select_terms_from_db("SELECT termo, grupo", "conn")
+
+    assert TermList.load(term_list) == TermList(("SILVA", "ANTONIO"), ("ATI", ""))
+
+
+def test_select_terms_from_db__version_probe(dag_gen, fake_rodou_db, monkeypatch):
+    queries = []
+
+    class FakePostgresHook:
+        version = ("2024-05-01", 2)
+
+        def __init__(self, conn_id):
+            pass
+
+        def get_first(self, sql):
+            queries.append(sql)
+            return self.version
+
+        def get_records(self, sql):
+            queries.append(sql)
+            return [("SILVA", "ATI"), ("ANTONIO", "EPPGG")]
+
+    monkeypatch.setattr(
+        dou_dag_generator.BaseHook,
+        "get_connection",
+        lambda conn_id: SimpleNamespace(conn_type="postgres"),
+    )
+    monkeypatch.setattr(dou_dag_generator, "PostgresHook", FakePostgresHook)
+
+    def select():
+        return dag_gen.select_terms_from_db(
+            "SELECT termo, grupo",
+            "conn",
+            version_sql="SELECT versao",
+            dag=SimpleNamespace(dag_id="dag_a"),
+        )
+
+    first = select()
+    second = select()
+    FakePostgresHook.version = ("2024-05-02", 2)
+    third = select()
+
+    assert queries == [
+        "SELECT versao",
+        "SELECT termo, grupo",
+        "SELECT versao",
+        "SELECT versao",
+        "SELECT termo, grupo",
+    ]
+    assert first == second == third
+    assert TermList.load(first).terms == ("SILVA", "ANTONIO")
+
+
+def _digest_specs(dag_id: str, **report) -> DAGConfig:
+    return DAGConfig(
+        id=dag_id,
+        description="DAG de teste",
+        owner=[dag_id],
+        search={"terms": ["lgpd"]},
+        report={"emails": ["dest@economia.gov.br"], "digest": "diario", **report},
+    )
+
+
+def test_send_notification__digest(dag_gen, fake_rodou_db, monkeypatch):
+    monkeypatch.setattr(
+        dou_dag_generator,
+        "Notifier",
+        lambda specs: pytest.fail("notification sent outside the digest"),
+    )
+    search_report = [{"header": None, "department": None, "result": {}}]
+    monkeypatch.setattr(
+        dag_gen, "get_xcom_pull_tasks", lambda num_searches, **context: search_report
+    )
+
+    dag_gen.send_notification(
+        num_searches=1,
+        specs=_digest_specs("dag_a"),
+        report_date="02/09/2021",
+        dag=SimpleNamespace(dag_id="dag_a"),
+    )
+
+    assert fake_rodou_db.digest_reports == {
+        "diario": [DigestReport("dag_a", "02/09/2021", search_report)]
+    }
+    assert fake_rodou_db.seen_added == []
+
+
+def _digest_context(run_id: str = "run_1") -> dict:
+    return {"dag": SimpleNamespace(dag_id="ro-dou_digest_diario"), "run_id": run_id}
+
+
+def _fake_notifier(sent: list, failing: set = frozenset()):
+    class FakeNotifier:
+        def __init__(self, specs):
+            self.specs = specs
+
+        def send_notification(
+            self, search_report, report_date, delivered=(), on_delivered=None
+        ):
+            for channel in ("email", "slack"):
+                if channel in delivered:
+                    continue
+                if channel in failing:
+                    raise RuntimeError(f"Falha no envio para: {channel}")
+                sent.append((channel, self.specs.id, search_report, report_date))
+                on_delivered(channel)
+
+    return FakeNotifier
+
+
+def test_notify__skips_channels_sent_by_previous_try(
+    dag_gen, fake_rodou_db, monkeypatch
+):
+    fake_rodou_db.delivered = {("dag_a", "run_1", "02/09/2021"): {"email"}}
+    sent = []
+    monkeypatch.setattr(dou_dag_generator, "Notifier", _fake_notifier(sent))
+
+    dag_gen.notify(
+        _digest_specs("dag_a"),
+        [],
+        "02/09/2021",
+        dag=SimpleNamespace(dag_id="dag_a"),
+        run_id="run_1",
+    )
+
+    assert [channel for channel, *_ in sent] == ["slack"]
+    assert fake_rodou_db.delivered == {}
+
+
+@pytest.mark.parametrize("fake_rodou_db", [False], indirect=True)
+def test_notify__without_rodou_db_connection(dag_gen, fake_rodou_db, monkeypatch):
+    calls = []
+
+    class FakeNotifier:
+        def __init__(self, specs):
+            pass
+
+        def send_notification(self, **kwargs):
+            calls.append(kwargs)
+
+    monkeypatch.setattr(dou_dag_generator, "Notifier", FakeNotifier)
+
+    dag_gen.notify(
+        _digest_specs("dag_a"),
+        [],
+        "02/09/2021",
+        dag=SimpleNamespace(dag_id="dag_a"),
+        run_id="run_1",
+    )
+
+    assert calls == [{"search_report": [], "report_date": "02/09/2021"}]
+    assert fake_rodou_db.delivered == {}
+
+
+def test_send_digest(dag_gen, fake_rodou_db, monkeypatch):
+    reports = [
+        DigestReport(
+            "dag_b",
+            "03/09/2021",
+            [{"header": "Consulta", "department": None, "result": {"g": {}}}],
+        ),
+        DigestReport(
+            "dag_a",
+            "02/09/2021",
+            [{"header": None, "department": None, "result": {"g": {}}}],
+        ),
+    ]
+    fake_rodou_db.digest_reports = {"diario": list(reports)}
+    sent = []
+    monkeypatch.setattr(dou_dag_generator, "Notifier", _fake_notifier(sent))
+
+    dag_gen.send_digest("diario", _digest_specs("dag_a"), **_digest_context())
+    dag_gen.send_digest("vazio", _digest_specs("dag_a"), **_digest_context())
+
+    search_report = [
+        {"header": "dag_b - Consulta", "department": None, "result": {"g": {}}},
+        {"header": "dag_a", "department": None, "result": {"g": {}}},
+    ]
+    assert sent == [
+        (channel, "dag_a", search_report, "02/09/2021, 03/09/2021")
+        for channel in ("email", "slack")
+    ]
+    assert fake_rodou_db.deleted_reports == [("diario", reports)]
+    assert fake_rodou_db.delivered == {}
+
+
+def test_send_digest__retry_sends_only_failed_channels(
+    dag_gen, fake_rodou_db, monkeypatch
+):
+    reports = [DigestReport("dag_a", "02/09/2021", [])]
+    fake_rodou_db.digest_reports = {"diario": list(reports)}
+    sent = []
+
+    monkeypatch.setattr(
+        dou_dag_generator, "Notifier", _fake_notifier(sent, failing={"slack"})
+    )
+    with pytest.raises(RuntimeError, match="slack"):
+        dag_gen.send_digest("diario", _digest_specs("dag_a"), **_digest_context())
+
+    assert fake_rodou_db.deleted_reports == []
+
+    monkeypatch.setattr(dou_dag_generator, "Notifier", _fake_notifier(sent))
+    dag_gen.send_digest("diario", _digest_specs("dag_a"), **_digest_context())
+
+    assert [channel for channel, *_ in sent] == ["email", "slack"]
+    assert fake_rodou_db.deleted_reports == [("diario", reports)]
+    assert fake_rodou_db.delivered == {}
+
+
+def test_send_digest__only_new_registered_after_delivery(
+    dag_gen, fake_rodou_db, monkeypatch
+):
+    item = {"id": 1, "date": "02/09/2021"}
+
+    def exec_search(seen_publications, **kwargs):
+        if ("lgpd", "1") in seen_publications:
+            return {}
+        return {"single_group": {"lgpd": {"single_department": [item]}}}
+
+    monkeypatch.setitem(
+        dag_gen.searchers, "DOU", SimpleNamespace(exec_search=exec_search)
+    )
+    specs = _digest_specs("dag_a", only_new=True, only_new_ttl_days=30)
+    digest_kwargs = dag_gen.create_digest_dag("diario", [specs]).tasks[0].op_kwargs
+
+    def run_dag():
+        search = dag_gen.perform_searches(
+            **_search_kwargs(only_new=True),
+            dag=SimpleNamespace(dag_id="dag_a"),
+            dag_run=SimpleNamespace(
+                conf={"trigger_date": "2021-09-02T12:00"}, external_trigger=True
+            ),
+        )
+        monkeypatch.setattr(
+            dag_gen, "get_xcom_pull_tasks", lambda num_searches, **context: [search]
+        )
+        dag_gen.send_notification(
+            num_searches=1,
+            specs=specs,
+            report_date="02/09/2021",
+            dag=SimpleNamespace(dag_id="dag_a"),
+        )
+        return search["result"]
+
+    assert run_dag() == {"single_group": {"lgpd": {"single_department": [item]}}}
+
+    sent = []
+    monkeypatch.setattr(
+        dou_dag_generator, "Notifier", _fake_notifier(sent, failing={"email"})
+    )
+    with pytest.raises(RuntimeError, match="email"):
+        dag_gen.send_digest(**digest_kwargs, **_digest_context())
+
+    # The publications not delivered by the digest are reported again
+    assert run_dag() == {"single_group": {"lgpd": {"single_department": [item]}}}
+
+    monkeypatch.setattr(dou_dag_generator, "Notifier", _fake_notifier(sent))
+    dag_gen.send_digest(**digest_kwargs, **_digest_context())
+
+    assert fake_rodou_db.seen_added == [("dag_a", [("lgpd", "1")])]
+    assert fake_rodou_db.evicted == [("dag_a", timedelta(days=30))]
+    assert run_dag() == {}
+
+
+def test_create_digest_dag(dag_gen):
+    members = [
+        _digest_specs("dag_a", digest_schedule="0 8 * * MON-FRI"),
+        _digest_specs("dag_b"),
+    ]
+
+    dag = dag_gen.create_digest_dag("diario", members)
+
+    assert dag.dag_id == "ro-dou_digest_diario"
+    assert dag.task_ids == ["send_digest"]
+    assert dag.default_args["owner"] == "dag_a,dag_b"
+    assert dag.tasks[0].op_kwargs == {
+        "digest": "diario",
+        "specs": members[0],
+        "only_new_ttl_days": {},
+    }
+    assert dag.timetable.summary == "0 8 * * MON-FRI"
+
+
+def test_create_digest_dag__default_schedule(dag_gen):
+    dag = dag_gen.create_digest_dag("diario", [_digest_specs("dag_a")])
+
+    assert dag.timetable.summary == dag_gen.DIGEST_SCHEDULE
+
+
+def _backfill_specs(dag_id: str, search, **report) -> DAGConfig:
+    return DAGConfig(
+        id=dag_id,
+        description="DAG de teste",
+        owner=[dag_id],
+        search=search,
+        report={"emails": ["dest@economia.gov.br"], **report},
+    )
+
+
+def test_plan_backfill(dag_gen):
+    specs = _backfill_specs(
+        "dag_a",
+        [
+            {"terms": ["lgpd"], "sources": ["DOU", "QD", "INLABS"]},
+            {"terms": ["cultura"], "sources": ["INLABS"]},
+        ],
+    )
+
+    queries = dag_gen.plan_backfill(specs, date(2024, 1, 30), date(2024, 3, 1))
+
+    assert [q for q in queries if q.counter == 1 and q.source == "DOU"][:2] == [
+        BackfillQuery(1, "DOU", date(2024, 3, 1), date(2024, 3, 1)),
+        BackfillQuery(1, "DOU", date(2024, 2, 29), date(2024, 2, 29)),
+    ]
+    assert len([q for q in queries if q.source == "QD"]) == 32
+    assert [q for q in queries if q.counter == 1 and q.source == "INLABS"] == []
+    assert [q for q in queries if q.counter == 2] == [
+        BackfillQuery(2, "INLABS", date(2024, 1, 31), date(2024, 3, 1)),
+        BackfillQuery(2, "INLABS", date(2024, 1, 30), date(2024, 1, 30)),
+    ]
+
+
+@pytest.fixture
+def backfill_searchers(dag_gen, monkeypatch):
+    """DOU and QD searchers that find one publication per day."""
+    searched = []
+
+    def searcher(source, section, days_behind):
+        def exec_search(reference_date, published_since, **kwargs):
+            searched.append((source, published_since.date(), reference_date.date()))
+            day = published_since - timedelta(days=days_behind)
+            items = []
+            while day <= reference_date - timedelta(days=days_behind):
+                items.append({"section": section, "date": day.strftime("%d/%m/%Y")})
+                day += timedelta(days=1)
+            return {"single_group": {"lgpd": {"single_department": items[::-1]}}}
+
+        return SimpleNamespace(exec_search=exec_search, rate_controller=None)
+
+    monkeypatch.setitem(dag_gen.searchers, "DOU", searcher("DOU", "Seção 1", 0))
+    monkeypatch.setitem(dag_gen.searchers, "QD", searcher("QD", "QD - Edição", 1))
+    return searched
+
+
+def _dates(search_report: List[dict]) -> List[str]:
+    return [
+        item["date"]
+        for search in search_report
+        for term_results in search["result"].values()
+        for dpt_results in term_results.values()
+        for items in dpt_results.values()
+        for item in items
+    ]
+
+
+def test_backfill_reports__per_day(dag_gen, backfill_searchers):
+    specs = _backfill_specs(
+        "dag_a", {"terms": ["lgpd"], "sources": ["DOU", "QD"], "date": "SEMANA"}
+    )
+
+    reports = dag_gen.backfill_reports(
+        specs, date(2024, 5, 8), date(2024, 5, 10), per_day=True
+    )
+
+    assert len(backfill_searchers) == 6
+    assert [report_date for report_date, _ in reports] == [
+        "08/05/2024",
+        "09/05/2024",
+        "10/05/2024",
+    ]
+    # The QD gazettes of the day before are reported with the DOU
+    assert _dates(reports[0][1]) == ["07/05/2024", "08/05/2024"]
+    assert _dates(reports[2][1]) == ["09/05/2024", "10/05/2024"]
+
+
+def test_backfill_reports__period(dag_gen, backfill_searchers, monkeypatch):
+    specs = _backfill_specs(
+        "dag_a",
+        [
+            {"terms": ["lgpd"], "sources": ["DOU"], "header": "DOU"},
+            {"terms": ["lgpd"], "sources": ["INLABS"], "header": "INLABS"},
+        ],
+    )
+    monkeypatch.setitem(
+        dag_gen.searchers,
+        "INLABS",
+        SimpleNamespace(
+            exec_search=lambda **kwargs: {"single_group": {}}, rate_controller=None
+        ),
+    )
+
+    reports = dag_gen.backfill_reports(
+        specs, date(2024, 5, 8), date(2024, 5, 9), per_day=False
+    )
+
+    assert len(reports) == 1
+    report_date, search_report = reports[0]
+    assert report_date == "08/05/2024 a 09/05/2024"
+    assert [search["header"] for search in search_report] == ["DOU", "INLABS"]
+    assert _dates(search_report[:1]) == ["09/05/2024", "08/05/2024"]
+    assert search_report[1]["result"] == {"single_group": {}}
+
+
+def test_backfill_reports__terms_from_db_instrumentation(
+    dag_gen, backfill_searchers, monkeypatch
+):
+    instrumentation = dou_dag_generator.instrumentation
+    published = []
+    monkeypatch.setenv(instrumentation.ENV_VAR, "true")
+    monkeypatch.setattr(
+        instrumentation, "publish", lambda collector, ti=None: published.append(ti)
+    )
+    monkeypatch.setattr(
+        dou_dag_generator.BaseHook,
+        "get_connection",
+        lambda conn_id: SimpleNamespace(conn_type="postgres"),
+    )
+    monkeypatch.setattr(
+        dou_dag_generator,
+        "PostgresHook",
+        lambda conn_id: SimpleNamespace(get_records=lambda sql: [("lgpd", None)]),
+    )
+    specs = _backfill_specs(
+        "dag_a",
+        {
+            "terms": {"from_db_select": {"sql": "SELECT termo", "conn_id": "conn"}},
+            "sources": ["DOU"],
+        },
+    )
+
+    with instrumentation.collect() as collector:
+        dag_gen.backfill_reports(
+            specs, date(2024, 5, 8), date(2024, 5, 8), per_day=True
+        )
+
+    # The terms selection is recorded in the collector of the backfill
+    assert published == []
+    assert collector.counters["terms.rows"] == 1
+    assert collector.spans["terms.sql"].count == 1
+
+
+def test_run_backfill(dag_gen, backfill_searchers, monkeypatch):
+    sent = []
+
+    class FakeNotifier:
+        def __init__(self, specs):
+            pass
+
+        def send_notification(self, search_report, report_date):
+            sent.append(report_date)
+
+    monkeypatch.setattr(dou_dag_generator, "Notifier", FakeNotifier)
+    specs = _backfill_specs("dag_a", {"terms": ["lgpd"], "sources": ["DOU"]})
+    monkeypatch.setattr(
+        dag_gen,
+        "backfill_reports",
+        lambda specs, since, until, per_day: [
+            ("08/05/2024", [{"result": {"single_group": {}}}]),
+            ("09/05/2024", [{"result": {"single_group": {"lgpd": {}}}}]),
+        ],
+    )
+    params = {"dag_id": "dag_a", "since": "2024-05-08", "until": "2024-05-09"}
+
+    dag_gen.run_backfill({"dag_a": specs}, params={**params, "per_day": True})
+
+    assert sent == ["09/05/2024"]
+    with pytest.raises(ValueError):
+        dag_gen.run_backfill(
+            {"dag_a": specs}, params={**params, "dag_id": "dag_b", "per_day": True}
+        )
+    with pytest.raises(ValueError):
+        dag_gen.run_backfill(
+            {"dag_a": specs}, params={**params, "since": "2024-05-10", "per_day": True}
+        )
+
+
+def test_create_backfill_dag(dag_gen):
+    all_specs = [
+        _backfill_specs("dag_a", {"terms": ["lgpd"]}),
+        _backfill_specs("dag_b", {"terms": ["lgpd"]}),
+    ]
+
+    dag = dag_gen.create_backfill_dag(all_specs)
+
+    assert dag.dag_id == "ro-dou_backfill"
+    assert dag.task_ids == ["run_backfill"]
+    assert dag.timetable.summary == "None"
+    assert dag.tasks[0].op_kwargs == {
+        "specs_by_id": {"dag_a": all_specs[0], "dag_b": all_specs[1]}
+    }
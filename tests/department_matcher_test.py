@@ -0,0 +1,51 @@
+"""DepartmentMatcher unit tests
+"""
+
+import pytest
+
+from dags.ro_dou_src.utils.department_matcher import DepartmentMatcher
+
+HIERARCHY = [
+    "Ministério da Defesa",
+    "Comando do Exército",
+    "Comando Militar do Nordeste",
+]
+
+
+@pytest.mark.parametrize(
+    "departments, hierarchy, matching",
+    [
+        (["Ministério da Defesa"], HIERARCHY, ("Ministério da Defesa",)),
+        (["ministério da defesa"], HIERARCHY, ("ministério da defesa",)),
+        (["Comando", "Comando Militar"], HIERARCHY, ("Comando", "Comando Militar")),
+        (["Comando Militar", "Comando"], HIERARCHY, ("Comando Militar", "Comando")),
+        (["Ministério da Saúde"], HIERARCHY, ()),
+        (["Defesa"], "Ministério da Defesa/Comando do Exército", ("Defesa",)),
+        ([], HIERARCHY, ()),
+    ],
+)
+def test_matching(departments, hierarchy, matching):
+    matcher = DepartmentMatcher(departments)
+
+    assert matcher.matching(hierarchy) == matching
+    # Cached hierarchies give the same answer
+    assert matcher.matching(hierarchy) == matching
+    # Same result as the casefolded text scan
+    assert matching == tuple(
+        dept for dept in departments if dept.casefold() in str(hierarchy).casefold()
+    )
+
+
+@pytest.mark.parametrize(
+    "departments, hierarchy, contains",
+    [
+        (["Ministério da Defesa"], HIERARCHY, True),
+        (["Ministério da Saúde", "Comando do Exército"], HIERARCHY, True),
+        (["ministério da defesa"], HIERARCHY, False),
+        (["Defesa"], HIERARCHY, False),
+        (["Defesa"], "Ministério da Defesa/Comando do Exército", True),
+        ([], HIERARCHY, False),
+    ],
+)
+def test_contains(departments, hierarchy, contains):
+    assert DepartmentMatcher(departments).contains(hierarchy) is contains
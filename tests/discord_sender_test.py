@@ -1,7 +1,7 @@
 from collections import namedtuple
 
 import pytest
-from dags.ro_dou_src.notification.discord_sender import DiscordSender, requests
+from dags.ro_dou_src.notification.discord_sender import DiscordSender, WebhookClient
 from pytest_mock import MockerFixture
 
 WEBHOOK = "https://some-url.com/xxx"
@@ -28,38 +28,37 @@ def mocked_specs():
     )
 
 
-def test_send_discord_data(session_mocker: MockerFixture, mocked_specs):
-    session_mocker.patch("dags.ro_dou_src.notification.discord_sender.requests.post")
+def test_send_discord_data(mocker: MockerFixture, mocked_specs):
+    mocker.patch.object(WebhookClient, "post")
 
     sender = DiscordSender(mocked_specs)
     sender.send_data({"content": "string"})
 
-    requests.post.assert_called_with(
-        WEBHOOK,
-        json={
+    WebhookClient.post.assert_called_with(
+        {
             "content": "string",
             "username": "Querido Prisma (rodou)",
         },
     )
 
 
-def test_send_text_to_discord(session_mocker: MockerFixture, mocked_specs):
-    session_mocker.patch("dags.ro_dou_src.notification.discord_sender.requests.post")
+def test_send_text_to_discord(mocker: MockerFixture, mocked_specs):
+    mocker.patch.object(WebhookClient, "post")
 
     sender = DiscordSender(mocked_specs)
     sender.send_text("string")
+    sender.flush()
 
-    requests.post.assert_called_with(
-        WEBHOOK,
-        json={
+    WebhookClient.post.assert_called_with(
+        {
             "content": "string",
             "username": "Querido Prisma (rodou)",
         },
     )
 
 
-def test_send_embeds_to_discord(session_mocker: MockerFixture, mocked_specs):
-    session_mocker.patch("dags.ro_dou_src.notification.discord_sender.requests.post")
+def test_send_embeds_to_discord(mocker: MockerFixture, mocked_specs):
+    mocker.patch.object(WebhookClient, "post")
     sender = DiscordSender(mocked_specs)
     items = [
         {
@@ -74,21 +73,66 @@ def test_send_embeds_to_discord(session_mocker: MockerFixture, mocked_specs):
         },
     ]
     sender.send_embeds(items)
+    sender.flush()
 
     embeds = items
     for item in embeds:
         item["url"] = item.pop("href")
         item["description"] = item.pop("abstract")
 
-    requests.post.assert_called_with(
-        WEBHOOK,
-        json={
+    WebhookClient.post.assert_called_with(
+        {
             "embeds": embeds,
             "username": "Querido Prisma (rodou)",
         },
     )
 
 
+def _items(count: int, abstract_size: int = 10) -> list:
+    return [
+        {"title": f"title {i}", "abstract": "a" * abstract_size, "href": f"http://{i}"}
+        for i in range(count)
+    ]
+
+
+def test_discord_packs_texts_and_embeds(mocker: MockerFixture, mocked_specs):
+    mocker.patch.object(WebhookClient, "post")
+    sender = DiscordSender(mocked_specs)
+
+    sender.send_text("**Header**")
+    sender.send_text("**Resultados para: lgpd**")
+    sender.send_embeds(_items(12))
+    sender.send_text("**Resultados para: cultura**")
+    sender.send_embeds(_items(1))
+    sender.flush()
+
+    messages = [call.args[0] for call in WebhookClient.post.call_args_list]
+    assert [
+        (message.get("content"), len(message.get("embeds", [])))
+        for message in messages
+    ] == [
+        ("**Header**\n**Resultados para: lgpd**", 10),
+        (None, 2),
+        ("**Resultados para: cultura**", 1),
+    ]
+
+
+def test_discord_embeds_chars_limit(mocker: MockerFixture, mocked_specs):
+    mocker.patch.object(WebhookClient, "post")
+    sender = DiscordSender(mocked_specs)
+
+    sender.send_embeds(_items(4, abstract_size=2500))
+    sender.flush()
+
+    messages = [call.args[0] for call in WebhookClient.post.call_args_list]
+    assert [len(message["embeds"]) for message in messages] == [2, 2]
+    for message in messages:
+        assert (
+            sum(len(e["title"]) + len(e["description"]) for e in message["embeds"])
+            <= DiscordSender.MAX_EMBEDS_CHARS
+        )
+
+
 def _send_report(specs):
     search_report = [
         {
@@ -0,0 +1,236 @@
+"""EmailSender unit tests
+"""
+
+import os
+from collections import namedtuple
+
+import pytest
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+from dags.ro_dou_src.notification.email_sender import EmailSender, _report_style
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "data", "email_golden")
+
+ReportConfig = namedtuple(
+    "ReportConfig",
+    ["header_text", "footer_text", "hide_filters", "no_results_found_text"],
+)
+
+SEARCH_REPORT = [
+    {
+        "header": "Pesquisa por unidades",
+        "department": ["Ministério da Economia", "Ministério da Saúde"],
+        "result": {
+            "Grupo 1": {
+                "lgpd": {
+                    "Ministério da Economia": [
+                        {
+                            "section": "Seção 1",
+                            "title": "PORTARIA Nº 1, DE 2 DE SETEMBRO DE 2021",
+                            "href": "https://www.in.gov.br/web/dou/-/portaria-n-1",
+                            "abstract": "Dispõe sobre a <span class='highlight' "
+                            "style='background:#FFA;'>LGPD</span> no âmbito do "
+                            "Ministério ...",
+                            "date": "02/09/2021",
+                        },
+                        {
+                            "section": "Seção 2",
+                            "title": "PORTARIA Nº 2, DE 2 DE SETEMBRO DE 2021",
+                            "href": "https://www.in.gov.br/web/dou/-/portaria-n-2",
+                            "abstract": "Designa o encarregado pelo tratamento de "
+                            "dados pessoais ...",
+                            "date": "02/09/2021",
+                        },
+                    ],
+                    "Ministério da Saúde": [
+                        {
+                            "section": "Seção 3",
+                            "title": "EXTRATO DE CONTRATO Nº 3/2021",
+                            "href": "https://www.in.gov.br/web/dou/-/extrato-3",
+                            "abstract": "Contratação de consultoria em <span "
+                            "class='highlight' style='background:#FFA;'>LGPD"
+                            "</span> ...",
+                            "date": "01/09/2021",
+                        },
+                    ],
+                },
+                "dados pessoais": {
+                    "single_department": [
+                        {
+                            "section": "Seção Extra",
+                            "title": "RESOLUÇÃO Nº 4, DE 1º DE SETEMBRO DE 2021",
+                            "href": "https://www.in.gov.br/web/dou/-/resolucao-4",
+                            "abstract": "Regulamenta o tratamento de <span "
+                            "class='highlight' style='background:#FFA;'>dados "
+                            "pessoais</span> ...",
+                            "date": "01/09/2021",
+                        },
+                    ],
+                },
+            },
+            "Grupo 2": {},
+        },
+    },
+    {
+        "header": None,
+        "department": None,
+        "result": {
+            "single_group": {
+                "acordo de cooperação": {
+                    "single_department": [
+                        {
+                            "section": "Edição Suplementar",
+                            "title": "EXTRATO DE ACORDO DE COOPERAÇÃO Nº 5/2021",
+                            "href": "https://www.in.gov.br/web/dou/-/extrato-5",
+                            "abstract": "Acordo de cooperação técnica entre a "
+                            "União e o Estado ...",
+                            "date": "31/08/2021",
+                        },
+                    ],
+                },
+            },
+        },
+    },
+]
+
+
+def _email_sender(hide_filters: bool) -> EmailSender:
+    sender = EmailSender(
+        ReportConfig(
+            header_text="<p>Relatório diário do DOU</p>",
+            footer_text="<p>Equipe Ro-DOU</p>",
+            hide_filters=hide_filters,
+            no_results_found_text="Nenhum dos termos pesquisados foi encontrado",
+        )
+    )
+    sender.search_report = SEARCH_REPORT
+    return sender
+
+
+def _normalize(html: str) -> list:
+    """Flattens the DOM into (tag, attributes, text) entries, ignoring
+    whitespace and the attribute-less paragraphs that only wrap other
+    blocks, which the previous markdown renderer used to add."""
+    entries = []
+
+    def walk(node: Tag):
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                text = " ".join(child.split())
+                if text:
+                    entries.append(("#text", (), text))
+            elif (
+                child.name == "p"
+                and not child.attrs
+                and all(
+                    isinstance(item, Tag) or not item.strip() for item in child.children
+                )
+                and child.find(["p", "h1", "h3", "ul"]) is not None
+            ):
+                walk(child)
+            else:
+                entries.append((child.name, tuple(sorted(child.attrs.items())), None))
+                walk(child)
+                entries.append(("/" + child.name, (), None))
+
+    walk(BeautifulSoup(html, "html.parser"))
+    return entries
+
+
+@pytest.mark.parametrize(
+    "hide_filters, golden_file",
+    [
+        (False, "filters.html"),
+        (True, "hide_filters.html"),
+    ],
+)
+def test_generate_email_content_matches_golden(hide_filters, golden_file):
+    with open(os.path.join(GOLDEN_DIR, golden_file), encoding="utf-8") as f:
+        golden = f.read()
+
+    content = _email_sender(hide_filters).generate_email_content()
+
+    assert _normalize(content) == _normalize(golden)
+
+
+def test_generate_email_content_matches_golden_report_example(report_example):
+    sender = _email_sender(False)
+    sender.search_report = report_example
+    with open(os.path.join(GOLDEN_DIR, "report_example.html"), encoding="utf-8") as f:
+        golden = f.read()
+
+    assert _normalize(sender.generate_email_content()) == _normalize(golden)
+
+
+def test_generate_email_content_keeps_title_text():
+    sender = _email_sender(False)
+    sender.search_report = [
+        {
+            "header": None,
+            "department": None,
+            "result": {
+                "single_group": {
+                    "lgpd": {
+                        "single_department": [
+                            {
+                                "section": "Seção 1",
+                                "title": "PORTARIA *SEI* Nº 1_2",
+                                "href": "https://www.in.gov.br/web/dou/-/p_1",
+                                "abstract": "<b>resumo</b>",
+                                "date": "02/09/2021",
+                            }
+                        ]
+                    }
+                }
+            },
+        }
+    ]
+
+    content = sender.generate_email_content()
+
+    assert "PORTARIA *SEI* Nº 1_2</a>" in content
+    assert "<b>resumo</b>" in content
+
+
+def test_generate_email_content_escapes_text():
+    sender = _email_sender(False)
+    sender.search_report = [
+        {
+            "header": None,
+            "department": ["Secretaria <Especial>"],
+            "result": {
+                "Grupo <A&B>": {
+                    "P&D": {
+                        "Órgão <X>": [
+                            {
+                                "section": "Seção 1",
+                                "title": "EDITAL <Nº 1> & ANEXOS",
+                                "href": 'https://www.in.gov.br/?a=1&b="2"',
+                                "abstract": "<b>resumo</b>",
+                                "date": "02/09/2021",
+                            }
+                        ]
+                    }
+                }
+            },
+        }
+    ]
+
+    content = sender.generate_email_content()
+
+    assert "<li>Secretaria &lt;Especial&gt;</li>" in content
+    assert "Grupo: Grupo &lt;A&amp;B&gt;" in content
+    assert "Resultados para: P&amp;D" in content
+    assert "<strong>Órgão &lt;X&gt;</strong>" in content
+    assert 'href="https://www.in.gov.br/?a=1&amp;b=&quot;2&quot;"' in content
+    assert "EDITAL &lt;Nº 1&gt; &amp; ANEXOS</a>" in content
+    assert "<b>resumo</b>" in content
+
+
+def test_generate_email_content_reads_style_once():
+    _report_style.cache_clear()
+
+    _email_sender(False).generate_email_content()
+    _email_sender(True).generate_email_content()
+
+    assert _report_style.cache_info().misses == 1
@@ -0,0 +1,48 @@
+"""HTTP session unit tests
+"""
+
+import pytest
+
+from dags.ro_dou_src.searchers import QDSearcher
+from dags.ro_dou_src.utils.http_session import (
+    RETRY_STATUS_FORCELIST,
+    create_session,
+)
+
+
+@pytest.mark.parametrize("scheme", ["http://", "https://"])
+def test_create_session__pooled_adapter(scheme):
+    session = create_session(pool_size=4, max_retries=2, backoff_factor=1)
+    adapter = session.get_adapter(f"{scheme}www.in.gov.br")
+
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 2
+    assert adapter.max_retries.backoff_factor == 1
+    assert adapter.max_retries.respect_retry_after_header
+    assert set(adapter.max_retries.status_forcelist) == set(RETRY_STATUS_FORCELIST)
+
+
+def test_create_session__gzip_keep_alive():
+    session = create_session()
+
+    assert "gzip" in session.headers["Accept-Encoding"]
+    assert session.headers["Connection"] == "keep-alive"
+
+
+def test_dou_hook_session_is_reused(dou_searcher):
+    hook = dou_searcher.dou_hook
+
+    assert hook.session is hook.session
+    assert hook.session_without_retry.get_adapter(
+        hook.IN_API_BASE_URL
+    ).max_retries.total == 0
+
+
+def test_searcher_sessions_leave_retries_to_rate_controller(dou_searcher):
+    dou_session = dou_searcher.dou_hook.session
+    qd_session = QDSearcher().session
+
+    assert dou_session.get_adapter(
+        dou_searcher.dou_hook.IN_API_BASE_URL
+    ).max_retries.total == 0
+    assert qd_session.get_adapter(QDSearcher.API_BASE_URL).max_retries.total == 0
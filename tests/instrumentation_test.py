@@ -0,0 +1,123 @@
+"""Instrumentation unit tests
+"""
+
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from dags.ro_dou_src.utils import instrumentation
+
+
+@pytest.fixture()
+def enabled(monkeypatch):
+    monkeypatch.setenv(instrumentation.ENV_VAR, "true")
+
+
+@pytest.fixture()
+def stats(monkeypatch) -> MagicMock:
+    from airflow import stats as airflow_stats
+
+    stats = MagicMock()
+    monkeypatch.setattr(airflow_stats, "Stats", stats)
+    return stats
+
+
+def _ti() -> SimpleNamespace:
+    return SimpleNamespace(dag_id="dag", task_id="task", xcom_push=MagicMock())
+
+
+def test_disabled__records_nothing(monkeypatch):
+    monkeypatch.delenv(instrumentation.ENV_VAR, raising=False)
+
+    with instrumentation.collect() as collector:
+        with instrumentation.span("dou.request"):
+            instrumentation.incr("dou.requests")
+
+    assert collector is None
+    assert instrumentation.span("dou.request") is instrumentation._NULL_SPAN
+
+
+def test_collect__spans_and_counters(enabled):
+    with instrumentation.collect() as collector:
+        for _ in range(3):
+            with instrumentation.span("dou.request"):
+                pass
+        instrumentation.add_span("dou.stage.signature", 1.5, 10)
+        instrumentation.incr("dou.requests", 3)
+        instrumentation.incr("dou.requests")
+
+    summary = collector.summary()
+    assert summary["spans"]["dou.request"]["count"] == 3
+    assert summary["spans"]["dou.stage.signature"] == {
+        "count": 10,
+        "seconds": 1.5,
+        "max_seconds": 0.15,
+    }
+    assert summary["counters"] == {"dou.requests": 4}
+    assert instrumentation._collector is None
+
+
+def test_collect__counts_from_threads(enabled):
+    with instrumentation.collect() as collector:
+        threads = [
+            threading.Thread(
+                target=lambda: [instrumentation.incr("qd.gazettes") for _ in range(1000)]
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert collector.summary()["counters"]["qd.gazettes"] == 4000
+
+
+def test_instrumented__publishes_summary(enabled, stats):
+    @instrumentation.instrumented
+    def task(**context):
+        with instrumentation.span("notification.email"):
+            instrumentation.incr("smtp.messages", 2)
+        return "done"
+
+    ti = _ti()
+
+    assert task(ti=ti) == "done"
+
+    ti.xcom_push.assert_called_once()
+    assert ti.xcom_push.call_args.kwargs["key"] == instrumentation.XCOM_KEY
+    summary = ti.xcom_push.call_args.kwargs["value"]
+    assert summary["counters"] == {"smtp.messages": 2}
+    assert summary["spans"]["notification.email"]["count"] == 1
+    tags = {"dag_id": "dag", "task_id": "task"}
+    stats.incr.assert_any_call("ro_dou.smtp.messages", 2, tags=tags)
+    assert stats.timing.call_args.args[0] == "ro_dou.notification.email"
+
+
+def test_instrumented__publishes_summary_of_failed_task(enabled, stats):
+    @instrumentation.instrumented
+    def task(**context):
+        instrumentation.incr("dou.requests")
+        raise ValueError("falha")
+
+    ti = _ti()
+
+    with pytest.raises(ValueError):
+        task(ti=ti)
+    assert ti.xcom_push.call_args.kwargs["value"]["counters"] == {"dou.requests": 1}
+
+
+def test_instrumented__disabled(monkeypatch, stats):
+    monkeypatch.delenv(instrumentation.ENV_VAR, raising=False)
+
+    @instrumentation.instrumented
+    def task(**context):
+        return "done"
+
+    ti = _ti()
+
+    assert task(ti=ti) == "done"
+    ti.xcom_push.assert_not_called()
+    stats.incr.assert_not_called()
@@ -0,0 +1,105 @@
+"""Notifier unit tests
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from dags.ro_dou_src.notification.isender import ISender
+from dags.ro_dou_src.notification.notifier import Notifier
+
+
+class FakeSender(ISender):
+    highlight_tags = ("*", "*")
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.sent = []
+
+    def send(self, search_report, report_date=None):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        self.sent.append((search_report, report_date))
+
+
+@pytest.fixture
+def notifier() -> Notifier:
+    report = SimpleNamespace(emails=None, discord=None, slack=None)
+    return Notifier(SimpleNamespace(report=report))
+
+
+def test_send_notification__channels_run_concurrently(notifier):
+    notifier.senders = {
+        "email": FakeSender(delay=0.3),
+        "discord": FakeSender(delay=0.3),
+        "slack": FakeSender(delay=0.3),
+    }
+
+    start = time.monotonic()
+    notifier.send_notification(search_report=[], report_date="02/09/2021")
+
+    assert time.monotonic() - start < 0.6
+    for sender in notifier.senders.values():
+        assert sender.sent == [([], "02/09/2021")]
+
+
+def test_send_notification__failure_does_not_stop_other_channels(notifier):
+    notifier.senders = {
+        "email": FakeSender(error=ConnectionError("SMTP fora do ar")),
+        "slack": FakeSender(delay=0.1),
+    }
+
+    with pytest.raises(RuntimeError, match="email") as exc_info:
+        notifier.send_notification(search_report=[], report_date="02/09/2021")
+
+    assert isinstance(exc_info.value.__cause__, ConnectionError)
+    assert notifier.senders["slack"].sent == [([], "02/09/2021")]
+
+
+def test_send_notification__skips_delivered_channels(notifier):
+    notifier.senders = {
+        "email": FakeSender(),
+        "discord": FakeSender(error=ConnectionError("Discord fora do ar")),
+        "slack": FakeSender(),
+    }
+    delivered = []
+
+    with pytest.raises(RuntimeError, match="discord"):
+        notifier.send_notification(
+            search_report=[],
+            report_date="02/09/2021",
+            delivered={"email"},
+            on_delivered=delivered.append,
+        )
+
+    assert notifier.senders["email"].sent == []
+    assert notifier.senders["slack"].sent == [([], "02/09/2021")]
+    assert delivered == ["slack"]
+
+
+def test_send_notification__all_channels_delivered(notifier):
+    notifier.senders = {"email": FakeSender(error=AssertionError("reenviado"))}
+
+    notifier.send_notification(
+        search_report=[], report_date="02/09/2021", delivered={"email"}
+    )
+
+
+def test_webhook_timeout_passed_to_senders():
+    report = SimpleNamespace(
+        emails=None,
+        discord={"webhook": "https://discord.com/api/webhooks/1"},
+        slack={"webhook": "https://hooks.slack.com/services/1"},
+        hide_filters=False,
+        header_text=None,
+        footer_text=None,
+        no_results_found_text="Nenhum dos termos pesquisados foi encontrado",
+    )
+
+    notifier = Notifier(SimpleNamespace(report=report))
+
+    assert notifier.senders["discord"].client.timeout == Notifier.WEBHOOK_TIMEOUT
+    assert notifier.senders["slack"].client.timeout == Notifier.WEBHOOK_TIMEOUT
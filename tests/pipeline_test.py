@@ -0,0 +1,51 @@
+"""ResultPipeline unit tests
+"""
+
+from dags.ro_dou_src.utils.pipeline import ResultPipeline, Stage
+
+
+def test_pipeline__filters_and_transforms():
+    pipeline = ResultPipeline(
+        [
+            Stage("even", lambda term, r: r if r["n"] % 2 == 0 else None),
+            Stage("term", lambda term, r: {**r, "term": term}),
+        ]
+    )
+
+    assert list(pipeline("lgpd", [{"n": n} for n in range(5)])) == [
+        {"n": 0, "term": "lgpd"},
+        {"n": 2, "term": "lgpd"},
+        {"n": 4, "term": "lgpd"},
+    ]
+
+
+def test_pipeline__is_lazy():
+    seen = []
+    pipeline = ResultPipeline([Stage("record", lambda term, r: seen.append(r) or r)])
+
+    output = pipeline("lgpd", iter([1, 2, 3]))
+    assert seen == []
+    assert next(output) == 1
+    assert seen == [1]
+
+
+def test_pipeline__metrics():
+    calls = []
+    pipeline = ResultPipeline(
+        [
+            Stage("positive", lambda term, r: r if r > 0 else None),
+            Stage("small", lambda term, r: calls.append(r) or (r if r < 10 else None)),
+        ]
+    )
+
+    list(pipeline("a", [-1, 1, 20]))
+    list(pipeline("b", [0, 5]))
+
+    # Results dropped by a stage are not seen by the next ones
+    assert calls == [1, 20, 5]
+    metrics = pipeline.metrics()
+    assert list(metrics) == ["positive", "small"]
+    assert metrics["positive"]["processed"] == 5
+    assert metrics["positive"]["dropped"] == 2
+    assert metrics["small"]["processed"] == 3
+    assert metrics["small"]["dropped"] == 1
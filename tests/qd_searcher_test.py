@@ -1,6 +1,10 @@
+import io
+import json
 from datetime import datetime
 import pytest
+import requests
 from dags.ro_dou_src.searchers import QDSearcher, _build_query_payload
+from dags.ro_dou_src.utils.rate_controller import RateController
 
 
 @pytest.mark.parametrize(
@@ -79,3 +83,187 @@ def test_build_query_payload(pre_tags: str,
     ]
 
     assert payload == expected
+
+
+def _gazette(territory_id: str, number: int) -> dict:
+    return {
+        'date': '2023-02-08',
+        'excerpts': [f'excerpt {number}'],
+        'is_extra_edition': False,
+        'state_code': 'PR',
+        'territory_id': territory_id,
+        'territory_name': 'Curitiba',
+        'url': f'https://querido-diario.example/{territory_id}/{number}',
+    }
+
+
+def _mock_api(mocker, total_gazettes: int, page_size: int = 100, failures=()):
+    """Mocks the QD API returning `total_gazettes` gazettes for each
+    territory requested, `page_size` per page. The first request of
+    each (published_since, offset) in `failures` fails."""
+    failures = set(failures)
+
+    def get(url, params, timeout, stream=False):
+        params = dict(params) | {
+            'territory_ids': [v for k, v in params if k == 'territory_ids']
+        }
+        failure = (params['published_since'], params['offset'])
+        if failure in failures:
+            failures.remove(failure)
+            raise requests.exceptions.ConnectionError('connection reset')
+        territories = params['territory_ids'] or ['0']
+        gazettes = [
+            _gazette(str(territory), number)
+            for territory in territories
+            for number in range(total_gazettes)
+        ]
+        offset = params['offset']
+        body = json.dumps({
+            'total_gazettes': len(gazettes),
+            'gazettes': gazettes[offset:offset + page_size],
+        }).encode()
+        response = mocker.MagicMock()
+        response.__enter__.return_value = response
+        response.raw = io.BytesIO(body)
+        return response
+
+    searcher = QDSearcher()
+    searcher.session = mocker.Mock()
+    searcher.session.get.side_effect = get
+    searcher.rate_controller = RateController(
+        initial_rate=1e6, max_rate=1e6, backoff_base=0
+    )
+    return searcher
+
+
+def test_search_term__pagination(mocker):
+    searcher = _mock_api(mocker, total_gazettes=250)
+    results = searcher._search_term(
+        territory_id=4106902,
+        search_term='lgpd',
+        reference_date=datetime(2023, 2, 9),
+        force_rematch=True,
+    )
+
+    assert len(results) == 250
+    assert len({r['href'] for r in results}) == 250
+    offsets = [dict(call.kwargs['params'])['offset']
+               for call in searcher.session.get.call_args_list]
+    assert offsets == [0, 100, 200]
+
+
+def test_search_term__retries_only_failed_page(mocker):
+    searcher = _mock_api(mocker, total_gazettes=250, failures=[('2023-02-09', 100)])
+    results = searcher._search_term(
+        territory_id=4106902,
+        search_term='lgpd',
+        reference_date=datetime(2023, 2, 9),
+        force_rematch=True,
+    )
+
+    assert len(results) == 250
+    offsets = [dict(call.kwargs['params'])['offset']
+               for call in searcher.session.get.call_args_list]
+    assert offsets == [0, 100, 100, 200]
+    assert searcher.rate_controller.metrics()['requests'] == 4
+    assert searcher.rate_controller.metrics()['retries'] == 1
+
+
+def test_search_term__territory_batches(mocker):
+    searcher = _mock_api(mocker, total_gazettes=2)
+    searcher.TERRITORIES_PER_REQUEST = 2
+    results = searcher._search_term(
+        territory_id=[1, 2, 3, 4, 5],
+        search_term='lgpd',
+        reference_date=datetime(2023, 2, 9),
+        force_rematch=True,
+    )
+
+    assert len(results) == 10
+    assert searcher.session.get.call_count == 3
+    assert [r['href'].split('/')[-2] for r in results] == [
+        '1', '1', '2', '2', '3', '3', '4', '4', '5', '5']
+
+
+@pytest.mark.parametrize(
+    'territory_id, batches',
+    [
+        (None, [[]]),
+        (4106902, [[4106902]]),
+        ([1, 2, 3], [[1, 2], [3]]),
+    ])
+def test_batch_territories(territory_id, batches):
+    searcher = QDSearcher()
+    searcher.TERRITORIES_PER_REQUEST = 2
+    assert searcher._batch_territories(territory_id) == batches
+
+
+@pytest.mark.parametrize(
+    'published_since, published_until, chunks',
+    [
+        (datetime(2023, 2, 9), datetime(2023, 2, 9),
+         [(datetime(2023, 2, 9), datetime(2023, 2, 9))]),
+        (datetime(2023, 2, 3), datetime(2023, 2, 9),
+         [(datetime(2023, 2, 3), datetime(2023, 2, 9))]),
+        (datetime(2023, 1, 8), datetime(2023, 2, 9),
+         [(datetime(2023, 2, 3), datetime(2023, 2, 9)),
+          (datetime(2023, 1, 27), datetime(2023, 2, 2)),
+          (datetime(2023, 1, 20), datetime(2023, 1, 26)),
+          (datetime(2023, 1, 13), datetime(2023, 1, 19)),
+          (datetime(2023, 1, 8), datetime(2023, 1, 12))]),
+    ])
+def test_split_date_range(published_since, published_until, chunks):
+    searcher = QDSearcher()
+    assert searcher._split_date_range(published_since, published_until) == chunks
+
+
+def test_search_term__date_chunks_dedupe(mocker):
+    searcher = _mock_api(mocker, total_gazettes=3)
+    results = searcher._search_term(
+        territory_id=4106902,
+        search_term='lgpd',
+        reference_date=datetime(2023, 2, 9),
+        force_rematch=True,
+        published_since=datetime(2023, 1, 27),
+    )
+
+    date_ranges = sorted(
+        (dict(call.kwargs['params'])['published_since'],
+         dict(call.kwargs['params'])['published_until'])
+        for call in searcher.session.get.call_args_list
+    )
+    assert date_ranges == [
+        ('2023-01-27', '2023-02-02'),
+        ('2023-02-03', '2023-02-09'),
+    ]
+    assert len(results) == 3
+
+
+def test_build_query_payload__date_range():
+    payload = dict(_build_query_payload(
+        search_term='lgpd',
+        reference_date=datetime(2023, 2, 9),
+        published_since=datetime(2023, 1, 10),
+    ))
+
+    assert payload['published_since'] == '2023-01-10'
+    assert payload['published_until'] == '2023-02-09'
+
+
+def test_search_term__retries_only_failed_chunk(mocker):
+    searcher = _mock_api(mocker, total_gazettes=3, failures=[('2023-01-27', 0)])
+    results = searcher._search_term(
+        territory_id=4106902,
+        search_term='lgpd',
+        reference_date=datetime(2023, 2, 9),
+        force_rematch=True,
+        published_since=datetime(2023, 1, 20),
+    )
+
+    requested = sorted(
+        dict(call.kwargs['params'])['published_since']
+        for call in searcher.session.get.call_args_list
+    )
+    assert requested == ['2023-01-20', '2023-01-27', '2023-01-27', '2023-02-03']
+    assert searcher.rate_controller.metrics()['requests'] == 4
+    assert len(results) == 3
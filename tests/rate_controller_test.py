@@ -0,0 +1,135 @@
+"""Rate controller unit tests
+"""
+
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+from dags.ro_dou_src.utils import rate_controller
+from dags.ro_dou_src.utils.rate_controller import RateController, _get_retry_after
+
+
+@pytest.fixture
+def sleep(mocker: MockerFixture):
+    return mocker.patch("dags.ro_dou_src.utils.rate_controller.time.sleep")
+
+
+def _http_error(headers: dict) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = 429
+    response.headers.update(headers)
+    return requests.HTTPError(response=response)
+
+
+def test_call__success_increases_rate(sleep):
+    controller = RateController(initial_rate=1, increase_step=0.5, max_rate=2)
+    for _ in range(3):
+        assert controller.call(lambda: "ok") == "ok"
+
+    assert controller.rate == 2
+    assert controller.metrics()["requests"] == 3
+    assert controller.metrics()["retries"] == 0
+
+
+def test_call__retries_with_backoff(sleep):
+    controller = RateController(initial_rate=1, decrease_factor=0.5, jitter=0)
+    attempts = iter([ValueError("1"), ValueError("2"), "ok"])
+
+    def func():
+        result = next(attempts)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert controller.call(func, max_retries=5) == "ok"
+    backoffs = [call.args[0] for call in sleep.call_args_list]
+    assert 2 in backoffs and 4 in backoffs
+    assert controller.metrics()["retries"] == 2
+    assert controller.rate == pytest.approx(0.25 + controller.increase_step)
+
+
+def test_call__max_retries(sleep):
+    controller = RateController()
+
+    def func():
+        raise ValueError("always")
+
+    with pytest.raises(ValueError):
+        controller.call(func, max_retries=2)
+    assert controller.metrics()["requests"] == 3
+
+
+def test_call__honors_retry_after(sleep):
+    controller = RateController()
+    attempts = iter([_http_error({"Retry-After": "7"}), "ok"])
+
+    def func():
+        result = next(attempts)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    controller.call(func)
+    assert 7 in [call.args[0] for call in sleep.call_args_list]
+
+
+def test_wait__skips_elapsed_interval(sleep, mocker: MockerFixture):
+    monotonic = mocker.patch(
+        "dags.ro_dou_src.utils.rate_controller.time.monotonic",
+        side_effect=[0, 10],
+    )
+    controller = RateController(initial_rate=1, jitter=0)
+    controller.wait()
+    controller.wait()
+
+    sleep.assert_not_called()
+    assert monotonic.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, None),
+        ({"Retry-After": "30"}, 30),
+        ({"Retry-After": "-1"}, 0),
+        ({"Retry-After": "invalid"}, None),
+    ],
+)
+def test_get_retry_after(headers, expected):
+    assert _get_retry_after(_http_error(headers)) == expected
+
+
+def test_get_retry_after__http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+    retry_after = _get_retry_after(
+        _http_error({"Retry-After": format_datetime(retry_at, usegmt=True)})
+    )
+    assert 55 < retry_after <= 60
+
+
+def test_get_retry_after__other_errors():
+    assert _get_retry_after(ValueError()) is None
+
+
+def test_call__instrumentation(sleep, monkeypatch):
+    # The instrumentation module imported by the controller
+    instrumentation = rate_controller.instrumentation
+    monkeypatch.setenv(instrumentation.ENV_VAR, "true")
+    controller = RateController(jitter=0, name="dou")
+    attempts = iter([_http_error({"Retry-After": "3"}), "ok"])
+
+    def func():
+        result = next(attempts)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    with instrumentation.collect() as collector:
+        controller.call(func)
+
+    summary = collector.summary()
+    assert summary["counters"] == {"dou.retries": 1}
+    assert summary["spans"]["dou.sleep"]["max_seconds"] == 3.0
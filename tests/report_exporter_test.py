@@ -0,0 +1,101 @@
+"""ReportExporter unit tests
+"""
+
+import gzip
+import io
+
+import pandas as pd
+
+from dags.ro_dou_src.notification.email_sender import EmailSender
+from dags.ro_dou_src.notification.report_exporter import ReportExporter, ReportSummary
+
+
+def _item(i: int) -> dict:
+    return {
+        "section": "Seção 1",
+        "href": f"https://www.in.gov.br/{i}",
+        "title": f"PORTARIA Nº {i}",
+        "abstract": f"resumo, com vírgula e \"aspas\" {i}",
+        "date": "02/09/2021",
+    }
+
+
+SEARCH_REPORT = [
+    {
+        "header": None,
+        "result": {
+            "single_group": {"lgpd": {"single_department": [_item(1), _item(2)]}},
+        },
+    },
+    {
+        "header": "Consulta 2",
+        "result": {
+            "Grupo A": {"dados": {"Ministério da Saúde": [_item(3)]}},
+            "single_group": {"acordo": {"single_department": [_item(4)]}},
+        },
+    },
+]
+
+
+def test_report_summary(report_example):
+    assert ReportSummary.from_report(report_example) == (True, False, False)
+    assert ReportSummary.from_report(SEARCH_REPORT) == (True, True, True)
+
+
+def test_rows__drops_unused_columns(report_example):
+    exporter = ReportExporter(report_example)
+    rows = list(exporter.rows())
+
+    assert exporter.columns == (
+        "Consulta",
+        "Termo de pesquisa",
+        "Seção",
+        "URL",
+        "Título",
+        "Resumo",
+        "Data",
+    )
+    assert len(rows) == 15
+    assert all(len(row) == 7 for row in rows)
+
+
+def test_rows__blanks_default_group_and_department():
+    rows = list(ReportExporter(SEARCH_REPORT).rows())
+
+    assert [row[:4] for row in rows] == [
+        (None, "", "lgpd", ""),
+        (None, "", "lgpd", ""),
+        ("Consulta 2", "Grupo A", "dados", "Ministério da Saúde"),
+        ("Consulta 2", "", "acordo", ""),
+    ]
+
+
+def test_write_csv__matches_dataframe():
+    exporter = ReportExporter(SEARCH_REPORT)
+    csv_file = io.StringIO()
+
+    exporter.write_csv(csv_file)
+
+    expected = pd.DataFrame(list(exporter.rows()), columns=list(exporter.columns))
+    assert csv_file.getvalue() == expected.to_csv(index=False)
+
+
+def test_write_csv_gzip():
+    exporter = ReportExporter(SEARCH_REPORT)
+    text_file, gzip_file = io.StringIO(), io.BytesIO()
+
+    exporter.write_csv(text_file)
+    exporter.write_csv_gzip(gzip_file)
+
+    assert gzip.decompress(gzip_file.getvalue()).decode("utf-8") == (
+        text_file.getvalue()
+    )
+
+
+def test_get_csv_tempfile__gzip():
+    email_sender = EmailSender(None)
+    email_sender.search_report = SEARCH_REPORT
+
+    with email_sender.get_csv_tempfile(compress=True) as csv_file:
+        assert csv_file.name.endswith(".csv.gz")
+        assert len(pd.read_csv(csv_file.name, compression="gzip")) == 4
@@ -1,10 +1,15 @@
 """Serachers unit tests
 """
 
+import json
+from datetime import date, datetime, timedelta
+
 import pytest
 
 import pandas as pd
 
+from dags.ro_dou_src.utils.search_domains import Field
+
 
 @pytest.mark.parametrize(
     "raw_html, clean_text",
@@ -115,7 +120,7 @@ def test_match_department(dou_searcher):
     department = ["Ministério da Defesa"]
     results = [
         {
-            "section": "Seção 3",
+            "section": "do3",
             "title": "EXTRATO DE COMPROMISSO",
             "href": "https://www.in.gov.br/web/dou/-/extrato-de-compromisso-342504508",
             "abstract": "ALESSANDRO GLAUCO DOS ANJOS DE VASCONCELOS - Secretário-Executivo Adjunto...",
@@ -129,7 +134,7 @@ def test_match_department(dou_searcher):
             ],
         },
         {
-            "section": "Seção 3",
+            "section": "do3",
             "title": "EXTRATO DE COMPROMISSO",
             "href": "https://www.in.gov.br/web/dou/-/extrato-de-compromisso-342504508",
             "abstract": "ALESSANDRO GLAUCO DOS ANJOS DE VASCONCELOS - Secretário-Executivo Adjunto...",
@@ -137,8 +142,13 @@ def test_match_department(dou_searcher):
             "hierarchyList": ["Ministério dos Povos Indígenas"],
         },
     ]
-    dou_searcher._match_department(results, department)
-    assert len(results) == 1
+    pipeline = dou_searcher._build_pipeline(
+        ignore_signature_match=False, force_rematch=False, department=department
+    )
+    kept = list(pipeline("termo", results))
+
+    assert len(kept) == 1
+    assert kept[0]["hierarchyList"][0] == "Ministério da Defesa"
 
 
 @pytest.mark.parametrize(
@@ -241,7 +251,7 @@ def test_group_results__list_term_list(dou_searcher, search_results):
     assert "SILVA" in grouped_result["single_group"]
 
 
-def test_add_standard_highlight_formatting(dou_searcher):
+def test_format_highlight(dou_searcher):
     results = [
         {
             "section": "DOU - Seção 1",
@@ -259,7 +269,7 @@ def test_add_standard_highlight_formatting(dou_searcher):
             "date": "15/03/2023",
         }
     ]
-    dou_searcher._add_standard_highlight_formatting(results)
+    dou_searcher._format_highlight(results[0])
     assert results[0]["abstract"] == (
         "As manifestações registradas na Plataforma Fala.BR versando sobre "
         "a <%%>Lei</%%> de <%%>Acesso à Informação</%%> têm ritoPORTARIA "
@@ -267,3 +277,204 @@ def test_add_standard_highlight_formatting(dou_searcher):
         "Ministério do Meio Ambiente e Mudança do Clima, os procedimentos "
         "para o recebimento e o tratamento de manifestações..."
     )
+
+
+def test_drop_seen(dou_searcher):
+    results = [{"id": 1, "href": "a"}, {"id": 2, "href": "b"}, {"href": "c"}]
+    seen_publications = {("lgpd", "1"), ("lgpd", "c"), ("cultura", "2")}
+
+    assert dou_searcher._drop_seen("lgpd", results, seen_publications) == [
+        {"id": 2, "href": "b"}
+    ]
+    assert dou_searcher._drop_seen("lgpd", results, None) is results
+
+
+def test_search_all_terms__skips_seen_publications(dou_searcher, monkeypatch):
+    results = [
+        {"id": 1, "section": "do1", "abstract": "<span>lgpd</span>"},
+        {"id": 2, "section": "do1", "abstract": "<span>lgpd</span>"},
+    ]
+    monkeypatch.setattr(
+        dou_searcher, "_search_text_with_retry", lambda **kwargs: list(results)
+    )
+    rematched = []
+    monkeypatch.setattr(
+        dou_searcher,
+        "_really_matched",
+        lambda term, abstract: rematched.append(term) or True,
+    )
+
+    search_results = dou_searcher._search_all_terms(
+        term_list=["lgpd"],
+        dou_sections=["SECAO_1"],
+        search_date="DIA",
+        trigger_date=None,
+        field="TUDO",
+        is_exact_search=True,
+        ignore_signature_match=False,
+        force_rematch=True,
+        department=None,
+        seen_publications={("lgpd", "1")},
+    )
+
+    assert [r["id"] for r in search_results["lgpd"]] == [2]
+    assert len(rematched) == 1
+
+
+def test_group_by_department__departments(dou_searcher):
+    defesa = {"id": 1, "hierarchyList": ["Ministério da Defesa", "Comando do Exército"]}
+    exercito = {"id": 2, "hierarchyList": ["Comando do Exército"]}
+    saude = {"id": 3, "hierarchyList": ["Ministério da Saúde"]}
+    search_results = {"lgpd": [defesa, exercito, saude], "cultura": [saude]}
+
+    grouped_result = dou_searcher._group_by_department(
+        search_results, ["comando do exército", "Ministério da Defesa"]
+    )
+
+    assert grouped_result == {
+        "lgpd": {
+            "comando do exército": [defesa, exercito],
+            "Ministério da Defesa": [defesa],
+        },
+        "cultura": {},
+    }
+
+
+def test_build_pipeline__enabled_stages(dou_searcher):
+    pipeline = dou_searcher._build_pipeline(
+        ignore_signature_match=False,
+        force_rematch=True,
+        department=["Ministério da Defesa"],
+        seen_publications=None,
+    )
+
+    assert [stage.name for stage in pipeline.stages] == [
+        "rematch",
+        "department",
+        "section",
+        "highlight",
+    ]
+
+
+def test_build_pipeline__configured_stages(dou_searcher, monkeypatch):
+    monkeypatch.setattr(dou_searcher, "POSTPROCESSING_STAGES", ("department", "seen"))
+    pipeline = dou_searcher._build_pipeline(
+        ignore_signature_match=True,
+        force_rematch=True,
+        department=["Ministério da Defesa"],
+        seen_publications={("lgpd", "1")},
+    )
+    results = [
+        {"id": 1, "hierarchyList": ["Ministério da Defesa"]},
+        {"id": 2, "hierarchyList": ["Ministério da Defesa"]},
+        {"id": 3, "hierarchyList": ["Ministério da Saúde"]},
+    ]
+
+    assert [stage.name for stage in pipeline.stages] == ["department", "seen"]
+    assert [r["id"] for r in pipeline("lgpd", results)] == [2]
+    assert pipeline.metrics()["department"]["dropped"] == 1
+    assert pipeline.metrics()["seen"]["dropped"] == 1
+
+
+def test_search_all_terms__local_index(dou_searcher, tmp_path, monkeypatch):
+    monkeypatch.setenv(
+        "AIRFLOW_CONN_RO_DOU_DB",
+        json.dumps({"conn_type": "sqlite", "host": str(tmp_path / "ro_dou.db")}),
+    )
+    portal = {
+        "27/03/2023": {"id": "1", "abstract": "<span>lgpd</span>"},
+        "28/03/2023": {"id": "2", "abstract": "<span>lgpd</span>"},
+        "29/03/2023": {"id": "3", "abstract": "<span>lgpd</span>"},
+    }
+    searched = []
+
+    def search_text(publish_from, reference_date, **kwargs):
+        searched.append((publish_from.date(), reference_date.date()))
+        return [
+            {
+                "section": "do1",
+                "title": "PORTARIA",
+                "href": f"https://www.in.gov.br/{result['id']}",
+                "date": pub_date,
+                "display_date_sortable": None,
+                "hierarchyList": ["Ministério da Saúde"],
+                **result,
+            }
+            for pub_date, result in portal.items()
+            if publish_from.date()
+            <= datetime.strptime(pub_date, "%d/%m/%Y").date()
+            <= reference_date.date()
+        ]
+
+    monkeypatch.setattr(dou_searcher, "_search_text_with_retry", search_text)
+
+    def search(trigger_date):
+        search_results = dou_searcher._search_all_terms(
+            term_list=["lgpd"],
+            dou_sections=["SECAO_1"],
+            search_date="SEMANA",
+            trigger_date=trigger_date,
+            field="TUDO",
+            is_exact_search=True,
+            ignore_signature_match=False,
+            force_rematch=False,
+            department=None,
+            local_index=True,
+        )
+        return [r["id"] for r in search_results["lgpd"]]
+
+    assert search(datetime(2023, 3, 28, 8)) == ["1", "2"]
+    # The days before the reference date come from the index
+    assert search(datetime(2023, 3, 29, 8)) == ["3", "2", "1"]
+    assert searched == [
+        (date(2023, 3, 22), date(2023, 3, 28)),
+        (date(2023, 3, 29), date(2023, 3, 29)),
+    ]
+
+
+def test_search_indexed__one_request_per_range(dou_searcher, monkeypatch):
+    indexed = {
+        date(2023, 3, 23): [{"id": "23", "date": "23/03/2023"}],
+        date(2023, 3, 26): [{"id": "26", "date": "26/03/2023"}],
+    }
+
+    class FakeIndex:
+        def get_indexed_days(self, query_key, since, until):
+            return set(indexed)
+
+        def index_results(self, query_key, days, results):
+            for day in days:
+                indexed[day] = [r for r in results if r["date"] == f"{day:%d/%m/%Y}"]
+
+        def get_indexed_results(self, query_key, since, until):
+            return [r for day in sorted(indexed, reverse=True) for r in indexed[day]]
+
+    searched = []
+
+    def search_text(publish_from, reference_date, **kwargs):
+        searched.append((publish_from.date(), reference_date.date()))
+        days = range((reference_date - publish_from).days, -1, -1)
+        return [
+            {"id": f"{day:%d}", "date": f"{day:%d/%m/%Y}"}
+            for day in (publish_from.date() + timedelta(days=n) for n in days)
+        ]
+
+    monkeypatch.setattr(dou_searcher, "_search_text_with_retry", search_text)
+
+    results = dou_searcher._search_indexed(
+        FakeIndex(),
+        search_term="lgpd",
+        sections=[],
+        reference_date=datetime(2023, 3, 28, 8),
+        search_date=None,
+        field=Field.TUDO,
+        is_exact_search=True,
+        publish_from=datetime(2023, 3, 22, 8),
+    )
+
+    assert searched == [
+        (date(2023, 3, 27), date(2023, 3, 28)),
+        (date(2023, 3, 24), date(2023, 3, 25)),
+        (date(2023, 3, 22), date(2023, 3, 22)),
+    ]
+    assert [r["id"] for r in results] == ["28", "27", "26", "25", "24", "23", "22"]
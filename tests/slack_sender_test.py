@@ -0,0 +1,70 @@
+"""SlackSender unit tests
+"""
+
+from collections import namedtuple
+
+import pytest
+from pytest_mock import MockerFixture
+
+from dags.ro_dou_src.notification.slack_sender import SlackSender, WebhookClient
+
+
+@pytest.fixture
+def mocked_specs():
+    Specs = namedtuple(
+        "Specs",
+        ["slack", "hide_filters", "header_text", "footer_text", "no_results_found_text"],
+    )
+    return Specs(
+        {"webhook": "https://some-url.com/xxx"},
+        False,
+        None,
+        None,
+        "Nenhum dos termos pesquisados foi encontrado nesta consulta.",
+    )
+
+
+def _search_report(results: int) -> list:
+    return [
+        {
+            "header": "Teste",
+            "result": {
+                "single_group": {
+                    "lgpd": {
+                        "single_department": [
+                            {
+                                "title": f"title {i}",
+                                "abstract": "abstract",
+                                "date": "02/09/2021",
+                                "href": f"http://{i}",
+                            }
+                            for i in range(results)
+                        ]
+                    }
+                }
+            },
+        }
+    ]
+
+
+def test_send__packs_results_without_splitting(mocker: MockerFixture, mocked_specs):
+    mocker.patch.object(WebhookClient, "post")
+
+    SlackSender(mocked_specs).send(_search_report(25))
+
+    messages = [call.args[0]["blocks"] for call in WebhookClient.post.call_args_list]
+    # 2 headers and 4 blocks per result
+    assert [len(blocks) for blocks in messages] == [50, 48, 4]
+    assert all(blocks[-1] == {"type": "divider"} for blocks in messages)
+    assert messages[0][0]["text"]["text"] == "Teste"
+
+
+def test_send__truncates_headers(mocker: MockerFixture, mocked_specs):
+    mocker.patch.object(WebhookClient, "post")
+    sender = SlackSender(mocked_specs)
+
+    sender._add_header("x" * 200)
+    sender._flush()
+
+    (blocks,) = [call.args[0]["blocks"] for call in WebhookClient.post.call_args_list]
+    assert len(blocks[0]["text"]["text"]) == SlackSender.MAX_HEADER_CHARS
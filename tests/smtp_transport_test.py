@@ -0,0 +1,109 @@
+"""SMTPTransport unit tests, against a local SMTP server
+"""
+
+import socket
+
+import pytest
+
+from dags.ro_dou_src.notification import smtp_transport
+from dags.ro_dou_src.notification.smtp_transport import SMTPTransport, send_email
+
+controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = controller.Controller(handler, hostname="127.0.0.1", port=port)
+    server.start()
+    for key, value in {
+        "SMTP__SMTP_HOST": "127.0.0.1",
+        "SMTP__SMTP_PORT": str(port),
+        "SMTP__SMTP_STARTTLS": "False",
+        "SMTP__SMTP_SSL": "False",
+        "SMTP__SMTP_MAIL_FROM": "ro-dou@gestao.gov.br",
+        "EMAIL__EMAIL_BACKEND": smtp_transport.SMTP_BACKEND,
+        "EMAIL__EMAIL_CONN_ID": "smtp_ro_dou_test",
+    }.items():
+        monkeypatch.setenv(f"AIRFLOW__{key}", value)
+    monkeypatch.setattr(SMTPTransport, "_transports", {})
+    yield handler
+    SMTPTransport.close_all()
+    server.stop()
+
+
+def test_send_email__reuses_connection(smtp_server):
+    for i in range(3):
+        send_email(
+            to=["dest@gestao.gov.br"], subject=f"Relatório {i}", html_content="<p>ok</p>"
+        )
+
+    transport = SMTPTransport.get("smtp_ro_dou_test")
+    assert transport.metrics() == {"messages": 3, "connections": 1}
+    assert [envelope.rcpt_tos for envelope in smtp_server.envelopes] == [
+        ["dest@gestao.gov.br"]
+    ] * 3
+    assert smtp_server.envelopes[0].mail_from == "ro-dou@gestao.gov.br"
+    assert b"Subject: =?utf-8?q?Relat=C3=B3rio_0?=" in smtp_server.envelopes[0].content
+
+
+def test_send_email__recipients_in_chunks(smtp_server, monkeypatch):
+    monkeypatch.setattr(SMTPTransport, "MAX_RECIPIENTS", 2)
+    to = [f"dest{i}@gestao.gov.br" for i in range(5)]
+
+    send_email(to=to, subject="Relatório", html_content="<p>ok</p>")
+
+    assert [envelope.rcpt_tos for envelope in smtp_server.envelopes] == [
+        to[0:2],
+        to[2:4],
+        to[4:],
+    ]
+
+
+def test_send_email__folds_long_recipient_list(smtp_server):
+    to = [f"dest{i}@gestao.gov.br" for i in range(120)]
+
+    send_email(to=to, subject="Relatório", html_content="<p>ok</p>")
+
+    content = smtp_server.envelopes[0].content
+    assert max(len(line) for line in content.splitlines()) <= 998
+    assert sum(len(envelope.rcpt_tos) for envelope in smtp_server.envelopes) == 120
+
+
+def test_send_email__reconnects_after_server_disconnect(smtp_server):
+    send_email(to=["dest@gestao.gov.br"], subject="1", html_content="<p>ok</p>")
+    transport = SMTPTransport.get("smtp_ro_dou_test")
+    # Simulate the server dropping the idle connection
+    transport._smtp.sock.shutdown(socket.SHUT_RDWR)
+
+    send_email(to=["dest@gestao.gov.br"], subject="2", html_content="<p>ok</p>")
+
+    assert transport.metrics() == {"messages": 2, "connections": 2}
+    assert len(smtp_server.envelopes) == 2
+
+
+def test_send_email__other_backend(monkeypatch, mocker):
+    monkeypatch.setenv("AIRFLOW__EMAIL__EMAIL_BACKEND", "some.other.backend")
+    airflow_send_email = mocker.patch.object(smtp_transport.email, "send_email")
+
+    send_email(to=["dest@gestao.gov.br"], subject="Relatório", html_content="<p/>")
+
+    airflow_send_email.assert_called_once_with(
+        to=["dest@gestao.gov.br"],
+        subject="Relatório",
+        html_content="<p/>",
+        files=None,
+        mime_charset="utf-8",
+    )
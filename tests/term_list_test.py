@@ -0,0 +1,51 @@
+"""TermList unit tests
+"""
+
+import pytest
+
+from dags.ro_dou_src.utils.term_list import TermList
+
+
+def test_from_records__strips_and_deduplicates():
+    term_list = TermList.from_records(
+        [(" SILVA ", "ATI"), ("ANTONIO", None), ("SILVA", "EPPGG")]
+    )
+
+    assert term_list == TermList(("SILVA", "ANTONIO"), ("ATI", ""))
+    assert term_list.group_map() == {"SILVA": "ATI", "ANTONIO": ""}
+
+
+def test_from_records__without_groups():
+    term_list = TermList.from_records([("SILVA",), ("ANTONIO",)])
+
+    assert term_list == TermList(("SILVA", "ANTONIO"))
+    assert term_list.group_map() == {}
+
+
+@pytest.mark.parametrize(
+    "term_list",
+    [
+        TermList(("SILVA", "ANTONIO"), ("ATI", "EPPGG")),
+        TermList(("SILVA", "ANTONIO")),
+        TermList(("JOSÉ",), ("Seção 1",)),
+    ],
+)
+def test_to_json__roundtrip(term_list):
+    assert TermList.load(term_list.to_json()) == term_list
+
+
+def test_load__pandas_columns_json(term_n_group):
+    assert TermList.load(term_n_group) == TermList(
+        ("ANTONIO DE OLIVEIRA", "SILVA"), ("EPPGG", "ATI")
+    )
+
+
+def test_load__list():
+    assert TermList.load(["SILVA", "ANTONIO"]) == TermList(("SILVA", "ANTONIO"))
+
+
+def test_slice():
+    term_list = TermList(("A", "B", "C"), ("1", "2", "3"))
+
+    assert term_list.slice(1, 3) == TermList(("B", "C"), ("2", "3"))
+    assert TermList(("A", "B")).slice(0, 1) == TermList(("A",))
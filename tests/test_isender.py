@@ -7,7 +7,12 @@ currentdir = os.path.dirname(
     os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
-from notification.isender import _fix_missing_spaces
+from notification.isender import (
+    ISender,
+    _fix_missing_spaces,
+    render_highlights,
+    tokenize_highlights,
+)
 
 
 def test_fix_missing_spaces():
@@ -25,3 +30,43 @@ def test_fix_missing_spaces():
     ]
     for string, expected_result in test_cases:
         assert _fix_missing_spaces(string) == expected_result
+
+
+def test_tokenize_highlights():
+    assert tokenize_highlights("Lei <%%>LGPD</%%>, art. 1") == (
+        ("Lei ", False),
+        ("LGPD", True),
+        (" , art. 1", False),
+    )
+    assert tokenize_highlights("sem destaques") == (("sem destaques", False),)
+
+
+def test_render_highlights():
+    segments = tokenize_highlights("a<%%>b</%%> c <%%>d</%%>")
+
+    assert render_highlights(segments, "*", "*") == "a *b* c *d* "
+    assert render_highlights(segments, "<b>", "</b>") == "a <b>b</b> c <b>d</b> "
+
+
+class _Sender(ISender):
+    highlight_tags = ("__", "__")
+
+    def send(self, search_report, report_date=None):
+        pass
+
+
+def test_highlighted_reports_keeps_original_report():
+    item = {"title": "Portaria", "abstract": "sobre a <%%>LGPD</%%>"}
+    report = {
+        "header": "Teste",
+        "result": {"single_group": {"lgpd": {"single_department": [item]}}},
+    }
+
+    highlighted = _Sender()._highlighted_reports(report)
+
+    result = highlighted["result"]["single_group"]["lgpd"]["single_department"][0]
+    assert highlighted["header"] == "Teste"
+    assert result["abstract"] == "sobre a __LGPD__ "
+    assert result["title"] == "Portaria"
+    assert dict(result) == {"title": "Portaria", "abstract": "sobre a __LGPD__ "}
+    assert item["abstract"] == "sobre a <%%>LGPD</%%>"
@@ -0,0 +1,112 @@
+"""WebhookClient unit tests
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from dags.ro_dou_src.notification import webhook_client
+from dags.ro_dou_src.notification.webhook_client import WebhookClient
+
+URL = "https://some-url.com/webhook"
+
+
+def _response(status_code: int, headers: dict = None, body: dict = None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = json.dumps(body or {}).encode()
+    return response
+
+
+@pytest.fixture()
+def sleeps(monkeypatch) -> list:
+    sleeps = []
+    monkeypatch.setattr(webhook_client.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def _client(*responses) -> WebhookClient:
+    client = WebhookClient(URL)
+    client.session = MagicMock()
+    client.session.post.side_effect = list(responses)
+    return client
+
+
+def test_post__retries_throttled_message_in_order(sleeps):
+    client = _client(
+        _response(429, body={"retry_after": 1.5}),
+        _response(429, headers={"Retry-After": "2"}),
+        _response(204),
+        _response(204),
+    )
+
+    client.post({"content": "first"})
+    client.post({"content": "second"})
+
+    sent = [call.kwargs["json"] for call in client.session.post.call_args_list]
+    assert sent == [{"content": "first"}] * 3 + [{"content": "second"}]
+    assert sleeps == [1.5, 2.0]
+    assert client.metrics()["messages"] == 2
+    assert client.metrics()["retries"] == 2
+    assert client.metrics()["waiting_seconds"] == 3.5
+
+
+def test_post__waits_rate_limit_reset(sleeps):
+    client = _client(
+        _response(
+            204,
+            headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "30"},
+        ),
+        _response(204),
+    )
+
+    client.post({"content": "first"})
+    assert sleeps == []
+    client.post({"content": "second"})
+
+    assert len(sleeps) == 1
+    assert 29 < sleeps[0] <= 30
+
+
+def test_post__retry_after_http_date(sleeps):
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+    client = _client(
+        _response(429, headers={"Retry-After": format_datetime(retry_at, usegmt=True)}),
+        _response(204),
+    )
+
+    client.post({"content": "first"})
+
+    assert len(sleeps) == 1
+    assert 55 < sleeps[0] <= 60
+
+
+def test_post__max_retries(sleeps):
+    client = _client(*[_response(429)] * (WebhookClient.MAX_RETRIES + 1))
+
+    with pytest.raises(requests.HTTPError):
+        client.post({"content": "first"})
+
+    assert len(sleeps) == WebhookClient.MAX_RETRIES
+    assert client.metrics()["messages"] == 0
+
+
+def test_post__instrumentation(sleeps, monkeypatch):
+    # The instrumentation module imported by the client
+    instrumentation = webhook_client.instrumentation
+    monkeypatch.setenv(instrumentation.ENV_VAR, "true")
+    client = _client(_response(429, headers={"Retry-After": "2"}), _response(204))
+    client.name = "discord"
+
+    with instrumentation.collect() as collector:
+        client.post({"content": "first"})
+
+    summary = collector.summary()
+    assert summary["counters"] == {"discord.messages": 1, "discord.retries": 1}
+    assert summary["spans"]["discord.request"]["count"] == 2
+    assert summary["spans"]["discord.sleep"]["seconds"] == 2.0